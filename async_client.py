@@ -0,0 +1,225 @@
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+import ollama
+
+from ollama_client import (
+    DEADLINE_NOTE,
+    CachePolicy,
+    DeepSeekClient,
+    EXPLAIN_MAP_TASK,
+    EXPLAIN_REDUCE_TASK,
+    IMPROVE_MAP_TASK,
+    IMPROVE_REDUCE_TASK,
+    chunk_cache_mode,
+    chunk_prompt,
+    combine_prompt,
+    debug_prompt,
+    explain_prompt,
+    group_sections,
+    improve_prompt,
+    question_prompt,
+    reduce_prompt,
+    summary_sections,
+    usage_prompt,
+)
+from tools.chunker import split_code
+from tools.profiler import NULL_PROFILER, request_stats
+
+
+class AsyncDeepSeekClient(CachePolicy):
+    """Asyncio client for running many prompts against Ollama at once.
+
+    All requests share one pooled HTTP connection (ollama.AsyncClient). A
+    semaphore caps how many run concurrently, each request has its own
+    timeout, and transient failures are retried with exponential backoff.
+    """
+
+    def __init__(self, model: str = "deepseek-coder:1.3b", temperature: float = 0.7,
+                 cache=None, cache_mode: str = "auto", host: str | None = None,
+                 max_concurrency: int = 4, timeout: float = 300.0,
+                 retries: int = 2, backoff: float = 1.0, keep_alive: str | None = None,
+                 profiles: Dict | None = None):
+        self.model = model
+        self.temperature = temperature
+        # Per-task generation profiles (the "generation" config section)
+        self.profiles = profiles or {}
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.keep_alive = keep_alive
+        self._client = None
+        self._semaphore = None
+        # Collects every request's Ollama stats
+        self.profiler = NULL_PROFILER
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _session(self) -> "ollama.AsyncClient":
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            self._client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled HTTP connection."""
+        if self._client is not None:
+            # ollama.AsyncClient has no close(); shut its httpx client down
+            await self._client._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+            return True
+        return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+    async def ask(self, prompt: str, context: str = "", cache_mode: str | None = None,
+                  task: str = "default") -> str:
+        """Send a prompt to DeepSeek Coder via Ollama."""
+        return await self.chat(self._messages(prompt, context), cache_mode, task)
+
+    async def chat(self, messages: List[Dict], cache_mode: str | None = None,
+                   task: str = "default") -> str:
+        """Send a whole conversation (system, user and assistant messages).
+
+        If the task's profile has a deadline and it passes, the request is
+        cancelled and the answer so far is returned, ending with
+        DEADLINE_NOTE (and not cached).
+        """
+        settings = self._settings(messages, task)
+        options = self._options(settings)
+        request = {
+            "model": settings["model"],
+            "messages": messages,
+            "options": options,
+            "keep_alive": self.keep_alive,
+        }
+
+        start = time.perf_counter()
+        key = self._cache_key(messages, options, cache_mode, settings["model"])
+        if key and (cache_mode or self.cache_mode) != "refresh":
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                self.profiler.add_request(request_stats(None, time.perf_counter() - start, cached=True))
+                return cached
+
+        client = self._session()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    if settings["deadline"]:
+                        answer, final, truncated = await self._until_deadline(
+                            client, request, settings["deadline"]
+                        )
+                    else:
+                        final = await asyncio.wait_for(client.chat(**request), timeout=self.timeout)
+                        answer, truncated = final["message"]["content"], False
+                break
+
+            except Exception as e:
+                if attempt >= self.retries or not self._is_transient(e):
+                    self.profiler.add_request(request_stats(None, time.perf_counter() - start, error=True))
+                    return DeepSeekClient._error_message(e)
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                attempt += 1
+
+        self.profiler.add_request(request_stats(final, time.perf_counter() - start,
+                                                model=settings["model"], truncated=truncated))
+
+        if truncated:
+            return answer + DEADLINE_NOTE.format(deadline=settings["deadline"])
+        if key:
+            await asyncio.to_thread(self.cache.put, key, answer)
+        return answer
+
+    @staticmethod
+    async def _until_deadline(client: "ollama.AsyncClient", request: Dict, deadline: float):
+        """Stream a request, cancelling it once the deadline passes.
+
+        Returns (answer so far, final chunk or None, truncated).
+        """
+        parts = []
+        final = None
+
+        async def collect():
+            nonlocal final
+            async for chunk in await client.chat(**request, stream=True):
+                parts.append(chunk["message"]["content"])
+                if chunk.get("done"):
+                    final = chunk
+
+        try:
+            await asyncio.wait_for(collect(), timeout=deadline)
+            return "".join(parts), final, False
+        except asyncio.TimeoutError:
+            # Cancelling collect() closes the stream, so Ollama stops generating
+            return "".join(parts), final, True
+
+    async def explain_code(self, code: str, filename: str = "") -> str:
+        """Explain what a piece of code does with improved prompting."""
+        return await self.ask(explain_prompt(code, filename), task="explain")
+
+    async def debug_code(self, code: str, error: str = "", line_number: int | None = None,
+                         excerpt: bool = False, filename: str = "") -> str:
+        """Help debug a piece of code; excerpt marks code from focus_context."""
+        return await self.ask(debug_prompt(code, error, line_number, excerpt, filename), task="debug")
+
+    async def suggest_improvements(self, code: str, filename: str = "", excerpt: bool = False) -> str:
+        """Suggest improvements for a piece of code; excerpt marks code from diff_excerpt."""
+        return await self.ask(improve_prompt(code, filename, excerpt), task="improve")
+
+    async def explain_code_chunked(self, code: str, filename: str = "",
+                                   token_budget: int = 2000) -> str:
+        """Explain a file too large for one prompt by map-reducing its chunks."""
+        return await self._map_reduce(code, filename, EXPLAIN_MAP_TASK, EXPLAIN_REDUCE_TASK,
+                                      token_budget, "explain")
+
+    async def suggest_improvements_chunked(self, code: str, filename: str = "",
+                                           token_budget: int = 2000) -> str:
+        """Review a file too large for one prompt by map-reducing its chunks."""
+        return await self._map_reduce(code, filename, IMPROVE_MAP_TASK, IMPROVE_REDUCE_TASK,
+                                      token_budget, "improve")
+
+    async def _map_reduce(self, code: str, filename: str, map_task: str, reduce_task: str,
+                          token_budget: int, task: str) -> str:
+        chunks = split_code(code, filename, token_budget)
+        cache_mode = chunk_cache_mode(self.cache_mode)
+
+        summaries = await asyncio.gather(*[
+            self.ask(chunk_prompt(filename, chunk["text"], map_task), cache_mode=cache_mode, task=task)
+            for chunk in chunks
+        ])
+
+        sections = summary_sections(chunks, summaries)
+        while True:
+            groups = group_sections(sections, token_budget)
+            if groups is None:
+                break
+            sections = await asyncio.gather(*[
+                asyncio.sleep(0, group[0]) if len(group) == 1
+                else self.ask(combine_prompt(group), cache_mode=cache_mode, task=task)
+                for group in groups
+            ])
+
+        return await self.ask(reduce_prompt(filename, sections, reduce_task), task=task)
+
+    async def answer_question(self, question: str, code_context: str = "") -> str:
+        """Answer general coding questions with optional code context."""
+        return await self.ask(question_prompt(question, code_context), task="ask")
+
+    async def find_function_usage(self, function_name: str, code: str) -> str:
+        """Explain how a function is used in given code."""
+        return await self.ask(usage_prompt(function_name, code), task="usage")
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from ollama_client import DEADLINE_NOTE, ERROR_PREFIX
+from tools.chunker import estimate_tokens
+from tools.manifest import bytes_hash
+
+TASKS = ("explain", "improve")
+# How answers cut off at their deadline end, whatever the deadline was
+DEADLINE_SUFFIX = DEADLINE_NOTE.rsplit("{deadline:g}", 1)[1]
+
+
+class BatchRunner:
+    """Run explain/improve over every file of a directory as one job queue.
+
+    As many workers as the client runs requests at once take files off the
+    queue, so only the files being worked on are held in memory. Finished
+    files are appended to a JSONL checkpoint as soon as they complete,
+    with the hash of the bytes that were sent. A later run over the same
+    directory skips files whose workspace manifest hash is already in the
+    checkpoint, so interrupted runs resume where they left off.
+    """
+
+    def __init__(self, file_ops, client, task: str, directory: str,
+                 token_budget: int = 2000):
+        if task not in TASKS:
+            raise ValueError(f"Unknown batch task: {task}")
+
+        self.file_ops = file_ops
+        self.client = client  # AsyncDeepSeekClient
+        self.task = task
+        self.directory = directory
+        self.token_budget = token_budget
+
+        slug = hashlib.sha256(f"{task}:{directory}".encode("utf-8")).hexdigest()[:12]
+        self.checkpoint_path = file_ops.cache_dir / "batch" / f"{task}-{slug}.jsonl"
+
+    def load_checkpoint(self) -> Dict[str, Dict]:
+        """Return finished records keyed by file path."""
+        records = {}
+        if not self.checkpoint_path.exists():
+            return records
+
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if not record.get("failed"):
+                    records[record["file"]] = record
+
+        return records
+
+    def reset(self):
+        """Forget previous progress for this task and directory."""
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+
+    def _read(self, file_path: str) -> Dict:
+        """A file's text (newlines as read_file gives them) and its content hash."""
+        path = Path(file_path)
+        if not path.is_absolute():
+            path = self.file_ops.project_root / path
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            return {"error": f"Error reading file: {str(e)}"}
+        content = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+        return {"content": content, "hash": bytes_hash(data)}
+
+    async def _run_job(self, file_path: str, content: str) -> str:
+        if estimate_tokens(content) > self.token_budget:
+            if self.task == "explain":
+                return await self.client.explain_code_chunked(content, file_path, self.token_budget)
+            return await self.client.suggest_improvements_chunked(content, file_path, self.token_budget)
+
+        if self.task == "explain":
+            return await self.client.explain_code(content, file_path)
+        return await self.client.suggest_improvements(content, file_path)
+
+    async def run(self, progress: Callable[[Dict], None] | None = None) -> Dict:
+        """Process every pending file; returns all records, old and new."""
+        files_result = self.file_ops.list_files(self.directory)
+        if "error" in files_result:
+            return {"error": files_result["error"]}
+
+        done = self.load_checkpoint()
+        jobs = []
+        skipped = 0
+
+        # The manifest only re-hashes files whose size or mtime changed
+        self.file_ops.changed_files(files_result["files"])
+        hashes = self.file_ops.manifest.hashes(files_result["files"])
+        for file_path in files_result["files"]:
+            digest = hashes.get(file_path)
+            if digest is None:
+                continue  # unreadable
+            if done.get(file_path, {}).get("hash") == digest:
+                skipped += 1
+                continue
+            jobs.append(file_path)
+
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        finished = 0
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+
+            async def process(file_path):
+                nonlocal finished
+                job_start = time.perf_counter()
+                # Read when the job starts, so only in-flight files are in memory,
+                # and checkpoint the hash of exactly what was sent
+                result = await asyncio.to_thread(self._read, file_path)
+                if "error" in result:
+                    output = result["error"]
+                else:
+                    output = await self._run_job(file_path, result["content"])
+                record = {
+                    "file": file_path,
+                    "hash": result.get("hash"),
+                    "task": self.task,
+                    "seconds": round(time.perf_counter() - job_start, 2),
+                    "result": output,
+                }
+                # Failed and cut-off files are recorded but retried on the next run
+                if "error" in result or output.startswith(ERROR_PREFIX) or output.endswith(DEADLINE_SUFFIX):
+                    record["failed"] = True
+                # One complete line per file, flushed right away
+                checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+                done[file_path] = record
+
+                finished += 1
+                if progress:
+                    elapsed = time.perf_counter() - start
+                    progress({
+                        "file": file_path,
+                        "failed": record.get("failed", False),
+                        "done": finished,
+                        "total": len(jobs),
+                        "eta": elapsed / finished * (len(jobs) - finished),
+                    })
+
+            async def worker():
+                while not queue.empty():
+                    await process(queue.get_nowait())
+
+            workers = max(1, min(self.client.max_concurrency, len(jobs)))
+            await asyncio.gather(*[worker() for _ in range(workers)])
+
+        return {
+            "processed": len(jobs),
+            "skipped": skipped,
+            "records": [done[path] for path in files_result["files"] if path in done],
+        }
+
+    def write_reports(self, records: List[Dict], output: str) -> List[str]:
+        """Write the records as <output>.jsonl and <output>.md."""
+        base = Path(output)
+        if base.suffix in (".md", ".jsonl"):
+            base = base.with_suffix("")
+        jsonl_path = base.with_suffix(".jsonl")
+        md_path = base.with_suffix(".md")
+
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {self.task.capitalize()} report: {self.directory}\n\n")
+            for record in records:
+                f.write(f"## {record['file']}\n\n{record['result'].strip()}\n\n")
+
+        return [str(jsonl_path), str(md_path)]
@@ -0,0 +1,193 @@
+"""
+Stub Ollama HTTP server for benchmarks.
+
+Implements the endpoints the assistant uses (/api/tags, /api/chat,
+/api/generate, /api/embed, /api/embeddings) and simulates model latency:
+prefill costs --prefill-ms per prompt token and decoding --decode-ms per
+generated token. Like Ollama, it remembers the last prompt and only
+"prefills" the part after the prefix it shares with the new one, so
+prompt-layout changes show up in the timings.
+
+Usage (standalone):
+  python benchmarks/fake_ollama.py [--port 11434] [--prefill-ms 0.5] [--decode-ms 10]
+then point the assistant at it with OLLAMA_HOST=http://127.0.0.1:PORT
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+
+def _prompt_text(request: dict) -> str:
+    if "messages" in request:
+        return "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in request["messages"])
+    return request.get("prompt", "")
+
+
+def _shared_prefix(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+class FakeOllama:
+    """Stub Ollama server running in a background thread.
+
+    Use as a context manager; ``host`` is the value for OLLAMA_HOST.
+    ``stats`` counts requests and the prompt tokens actually prefilled.
+    """
+
+    def __init__(self, port: int = 0, prefill_ms: float = 0.5, decode_ms: float = 10.0,
+                 answer_tokens: int = 40):
+        self.prefill_ms = prefill_ms
+        self.decode_ms = decode_ms
+        self.answer_tokens = answer_tokens
+        self.stats = {"requests": 0, "prompt_tokens": 0, "prefilled_tokens": 0}
+        self._last_prompt = ""
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _prefill(self, prompt: str) -> tuple:
+        """Simulate prompt evaluation; returns (prompt tokens, tokens evaluated)."""
+        with self._lock:
+            cached = _shared_prefix(self._last_prompt, prompt)
+            self._last_prompt = prompt
+        total = len(prompt) // CHARS_PER_TOKEN + 1
+        evaluated = max(1, (len(prompt) - cached) // CHARS_PER_TOKEN)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += total
+            self.stats["prefilled_tokens"] += evaluated
+        time.sleep(evaluated * self.prefill_ms / 1000)
+        return total, evaluated
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunk(self, payload: dict):
+                data = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.startswith("/api/tags"):
+                    self._json({"models": [{"name": "deepseek-coder:1.3b", "model": "deepseek-coder:1.3b"}]})
+                else:
+                    self._json({"version": "0.0.0-fake"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path == "/api/embed":
+                    inputs = request.get("input", [])
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    self._json({"embeddings": [[float(len(text) % 7), 1.0, 0.5] for text in inputs]})
+                    return
+                if self.path == "/api/embeddings":
+                    self._json({"embedding": [float(len(request.get("prompt", "")) % 7), 1.0, 0.5]})
+                    return
+
+                chat = self.path == "/api/chat"
+                prompt = _prompt_text(request)
+                if not prompt:
+                    # Model load / keep-alive ping
+                    self._json({"model": request.get("model"), "response": "", "done": True})
+                    return
+
+                start = time.perf_counter()
+                total, evaluated = fake._prefill(prompt)
+                prefill_ns = int((time.perf_counter() - start) * 1e9)
+                words = [f"token{i} " for i in range(fake.answer_tokens)]
+
+                def piece(text, done):
+                    if chat:
+                        return {"message": {"role": "assistant", "content": text}, "done": done}
+                    return {"response": text, "done": done}
+
+                final = {
+                    "prompt_eval_count": evaluated,
+                    "prompt_eval_duration": prefill_ns,
+                    "eval_count": len(words),
+                    "eval_duration": int(len(words) * fake.decode_ms * 1e6),
+                    "load_duration": 0,
+                    "total_duration": prefill_ns + int(len(words) * fake.decode_ms * 1e6),
+                }
+
+                if not request.get("stream", True):
+                    time.sleep(len(words) * fake.decode_ms / 1000)
+                    self._json({**piece("".join(words), True), **final})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for word in words:
+                        time.sleep(fake.decode_ms / 1000)
+                        self._chunk(piece(word, False))
+                    self._chunk({**piece("", True), **final})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client cancelled
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--prefill-ms", type=float, default=0.5, help="latency per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=10.0, help="latency per generated token")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    args = parser.parse_args()
+
+    server = FakeOllama(args.port, args.prefill_ms, args.decode_ms, args.answer_tokens)
+    print(f"Fake Ollama listening on {server.host}")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
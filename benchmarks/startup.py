@@ -0,0 +1,126 @@
+"""
+Start-up benchmark for offline CLI commands.
+
+Offline commands (list, search, function) must not import the model
+stack. This script checks that and measures start-up (importing cli and
+constructing AIDevCLI) for each command; end-to-end times are reported
+alongside. It exits with status 1 when a heavy module sneaks back into
+the offline path or start-up exceeds the budget.
+
+Usage (from the project root):
+  python benchmarks/startup.py [--runs 5] [--budget-ms 100]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Commands that never need the model, and modules they must not import
+OFFLINE_COMMANDS = [
+    ["list"],
+    ["search", "def "],
+    ["function", "main"],
+]
+HEAVY_MODULES = ["ollama", "httpx", "numpy", "asyncio", "sqlite3"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+sys.argv = ["cli.py"] + {args!r}
+import cli
+app = cli.AIDevCLI()
+startup = (time.perf_counter() - start) * 1000
+app.run()
+loaded = [m for m in {heavy!r} if m in sys.modules]
+sys.stderr.write(f"STARTUP={{startup}}\\n")
+sys.stderr.write("LOADED=" + ",".join(loaded) + "\\n")
+"""
+
+
+def time_command(argv, runs):
+    """Median wall time in milliseconds of running a command `runs` times."""
+    # One untimed run first, so on-disk indexes exist and caches are warm
+    subprocess.run(argv, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def probe(args, runs):
+    """Median start-up time (ms) and heavy modules imported by one command."""
+    code = PROBE.format(args=args, heavy=HEAVY_MODULES)
+    startups = []
+    loaded = []
+
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        values = dict(
+            line.split("=", 1) for line in result.stderr.splitlines()
+            if line.startswith(("STARTUP=", "LOADED="))
+        )
+        if "STARTUP" not in values:
+            raise RuntimeError(f"probe failed for {args}: {result.stderr.strip()}")
+        startups.append(float(values["STARTUP"]))
+        loaded = [m for m in values["LOADED"].split(",") if m]
+
+    return statistics.median(startups), loaded
+
+
+def run(runs=5, budget_ms=100.0):
+    """Measure start-up; returns a JSON-serialisable report."""
+    baseline = time_command([sys.executable, "-c", "pass"], runs)
+    report = {"interpreter_ms": round(baseline, 1), "budget_ms": budget_ms, "commands": []}
+
+    for args in OFFLINE_COMMANDS:
+        total = time_command([sys.executable, "cli.py"] + args, runs)
+        startup, heavy = probe(args, runs)
+        report["commands"].append({
+            "command": " ".join(args),
+            "startup_ms": round(startup, 1),
+            "total_ms": round(total, 1),
+            "heavy_imports": heavy,
+        })
+
+    report["ok"] = all(
+        not c["heavy_imports"] and c["startup_ms"] <= budget_ms for c in report["commands"]
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per command (median is used)")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="allowed start-up time (import cli + AIDevCLI())")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.budget_ms)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"interpreter start: {report['interpreter_ms']} ms")
+        for c in report["commands"]:
+            heavy = ", ".join(c["heavy_imports"]) or "none"
+            print(f"{c['command']:<16} start-up {c['startup_ms']:>6} ms  "
+                  f"total {c['total_ms']:>7} ms  heavy imports: {heavy}")
+        print("OK" if report["ok"] else f"REGRESSION (budget {args.budget_ms} ms)")
+
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+End-to-end benchmark suite.
+
+Generates a synthetic repository (see synthetic.py), then times:
+  * list_files, search_code, find_function and find_class, each
+    - cold: no .ai_assistant cache at all,
+    - warm: a new process with the on-disk indexes in place,
+    - hot:  repeated calls in one process (median);
+  * full CLI commands (list, search, function, explain, ask, debug,
+    usage) run as subprocesses against a fake Ollama server that
+    simulates prefill and decode latency (see fake_ollama.py).
+
+Results are written as JSON. With --baseline, every metric is compared
+to an earlier report and the run fails (exit status 1) if any got slower
+than the threshold allows.
+
+Usage (from the project root):
+  python benchmarks/suite.py [--shape medium] [--runs 5] [--out report.json]
+  python benchmarks/suite.py --baseline report.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_ollama import FakeOllama  # noqa: E402
+from synthetic import ROOT, SHAPES, generate  # noqa: E402
+
+REPORT_VERSION = 1
+
+# Runs inside the synthetic repo; prints one JSON object of timings (ms)
+LIBRARY_PROBE = """
+import json, shutil, statistics, sys, time
+sys.path.insert(0, {root!r})
+from tools.file_ops import FileOperations
+from tools.search import CodeSearch
+
+mode, runs = {mode!r}, {runs!r}
+if mode == "cold":
+    shutil.rmtree(".ai_assistant", ignore_errors=True)
+
+ops = FileOperations()
+search = CodeSearch(ops)
+calls = {{
+    "list_files": lambda: ops.list_files("."),
+    "search_code": lambda: search.search_code("TODO"),
+    "find_function": lambda: search.find_function({function!r}),
+    "find_class": lambda: search.find_class({cls!r}),
+}}
+
+timings = {{}}
+for name, call in calls.items():
+    start = time.perf_counter()
+    call()
+    timings[name + "." + mode] = (time.perf_counter() - start) * 1000
+
+if mode == "warm":
+    for name, call in calls.items():
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[name + ".hot"] = statistics.median(samples)
+
+print(json.dumps(timings))
+"""
+
+
+def library_timings(repo: dict, runs: int) -> dict:
+    """Cold, warm and hot timings of the search/listing API."""
+    metrics = {}
+    for mode in ("cold", "warm"):
+        code = LIBRARY_PROBE.format(root=ROOT, mode=mode, runs=runs,
+                                    function=repo["function"], cls=repo["class"] or "Missing")
+        result = subprocess.run([sys.executable, "-c", code], cwd=repo["path"],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"library probe ({mode}) failed: {result.stderr.strip()}")
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        metrics.update({f"library.{name}": round(ms, 2) for name, ms in timings.items()})
+    return metrics
+
+
+def cli_commands(repo: dict) -> dict:
+    """Name -> cli.py arguments for the end-to-end timings."""
+    sample = repo["sample_file"]
+    return {
+        "list": ["list"],
+        "search": ["search", "TODO"],
+        "function": ["function", repo["function"]],
+        "explain": ["explain", sample, "--no-cache"],
+        "ask": ["ask", "What does this file do?", sample, "--no-cache"],
+        "debug": ["debug", sample, "ValueError on line 6", "--no-cache"],
+        "usage": ["usage", repo["function"], "--no-cache"],
+    }
+
+
+def cli_timings(repo: dict, runs: int, server: FakeOllama) -> dict:
+    """Median wall time of each CLI command against the fake server."""
+    env = dict(os.environ, OLLAMA_HOST=server.host)
+    metrics = {}
+
+    for name, args in cli_commands(repo).items():
+        argv = [sys.executable, os.path.join(ROOT, "cli.py")] + args
+        # One untimed run first, so on-disk indexes exist
+        subprocess.run(argv, cwd=repo["path"], env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(argv, cwd=repo["path"], env=env, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+            samples.append((time.perf_counter() - start) * 1000)
+        metrics[f"cli.{name}"] = round(statistics.median(samples), 2)
+
+    return metrics
+
+
+def run(files: int, depth: int, fanout: int, definitions: int, runs: int = 5,
+        skip_cli: bool = False, prefill_ms: float = 0.5, decode_ms: float = 10.0,
+        repo_dir: str | None = None) -> dict:
+    """Generate the repository and time everything; returns the report."""
+    with tempfile.TemporaryDirectory(prefix="ai-assistant-bench-") as scratch:
+        repo = generate(repo_dir or os.path.join(scratch, "repo"), files, depth, fanout, definitions)
+
+        metrics = library_timings(repo, runs)
+        server_stats = None
+        if not skip_cli:
+            with FakeOllama(prefill_ms=prefill_ms, decode_ms=decode_ms) as server:
+                metrics.update(cli_timings(repo, runs, server))
+                server_stats = dict(server.stats)
+
+    return {
+        "version": REPORT_VERSION,
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repo": {key: repo[key] for key in ("files", "depth", "fanout", "definitions")},
+            "runs": runs,
+            "fake_model": {"prefill_ms": prefill_ms, "decode_ms": decode_ms, "stats": server_stats},
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float = 0.2, min_delta_ms: float = 5.0) -> dict:
+    """Compare metrics to a baseline report.
+
+    A metric regresses when it is more than ``threshold`` (a fraction)
+    slower and by more than ``min_delta_ms``, so noise on very fast
+    operations doesn't fail the run.
+    """
+    rows = []
+    for name, value in report["metrics"].items():
+        old = baseline.get("metrics", {}).get(name)
+        if old is None:
+            continue
+        change = (value - old) / old if old else 0.0
+        rows.append({
+            "metric": name,
+            "baseline_ms": old,
+            "current_ms": value,
+            "change": round(change, 3),
+            "regression": value > old * (1 + threshold) and value - old > min_delta_ms,
+        })
+
+    return {
+        "threshold": threshold,
+        "same_repo": report["meta"]["repo"] == baseline.get("meta", {}).get("repo"),
+        "rows": rows,
+        "regressions": [row["metric"] for row in rows if row["regression"]],
+    }
+
+
+def print_report(report: dict, comparison: dict | None):
+    repo = report["meta"]["repo"]
+    print(f"Synthetic repo: {repo['files']} files, depth {repo['depth']}, fanout {repo['fanout']}")
+
+    if comparison is None:
+        for name, value in report["metrics"].items():
+            print(f"  {name:<28} {value:>10.1f} ms")
+        return
+
+    if not comparison["same_repo"]:
+        print("  ⚠ baseline was measured on a different repository shape")
+    for row in comparison["rows"]:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"  {row['metric']:<28} {row['baseline_ms']:>10.1f} -> {row['current_ms']:>10.1f} ms "
+              f"({row['change']:+.0%}){flag}")
+    if comparison["regressions"]:
+        print(f"\n{len(comparison['regressions'])} regression(s) over {comparison['threshold']:.0%}")
+    else:
+        print(f"\nNo regressions over {comparison['threshold']:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="medium",
+                        help="preset repository size (overridden by --files etc.)")
+    parser.add_argument("--files", type=int)
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--fanout", type=int)
+    parser.add_argument("--definitions", type=int, help="functions/classes per file")
+    parser.add_argument("--runs", type=int, default=5, help="runs per measurement (median is used)")
+    parser.add_argument("--skip-cli", action="store_true", help="only time the library calls")
+    parser.add_argument("--prefill-ms", type=float, default=0.5, help="fake model latency per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=10.0, help="fake model latency per output token")
+    parser.add_argument("--repo-dir", help="generate the repository here and keep it")
+    parser.add_argument("--out", help="write the JSON report to this path")
+    parser.add_argument("--baseline", help="compare against this earlier report")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown as a fraction (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="ignore slowdowns smaller than this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    files, depth, fanout, definitions = SHAPES[args.shape]
+    report = run(
+        args.files or files, args.depth or depth, args.fanout or fanout,
+        args.definitions or definitions, args.runs, args.skip_cli,
+        args.prefill_ms, args.decode_ms, args.repo_dir,
+    )
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            comparison = compare(report, json.load(f), args.threshold, args.min_delta_ms)
+        report["comparison"] = comparison
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, comparison)
+
+    sys.exit(1 if comparison and comparison["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
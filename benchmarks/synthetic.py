@@ -0,0 +1,169 @@
+"""
+Synthetic repositories for benchmarking.
+
+Generates a deterministic project tree of a given size and shape: nested
+packages of source files in several languages, each with functions and
+classes whose names are known in advance (so searches have real hits),
+plus the clutter a real checkout has (node_modules, build output listed
+in .gitignore, a large generated file).
+
+Usage (standalone):
+  python benchmarks/synthetic.py OUT_DIR [--files 2000] [--depth 3] [--fanout 6]
+                                         [--definitions 8]
+"""
+
+import argparse
+import json
+import os
+import shutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LANGUAGES = {
+    ".py": (
+        "import os\nimport sys\n\n",
+        "def {name}(value, *args):\n    total = value\n    for item in args:\n"
+        "        total += len(str(item))\n    return total\n\n",
+        "class {name}:\n    def __init__(self, size):\n        self.size = size\n\n"
+        "    def method_{n}(self):\n        return self.size * {n}\n\n",
+    ),
+    ".js": (
+        "const path = require('path');\n\n",
+        "function {name}(value, ...args) {{\n  let total = value;\n"
+        "  for (const item of args) {{ total += String(item).length; }}\n  return total;\n}}\n\n",
+        "class {name} {{\n  constructor(size) {{ this.size = size; }}\n"
+        "  method_{n}() {{ return this.size * {n}; }}\n}}\n\n",
+    ),
+    ".ts": (
+        "import {{ join }} from 'path';\n\n",
+        "export const {name} = (value: number, ...args: string[]): number => {{\n"
+        "  return args.reduce((total, item) => total + item.length, value);\n}};\n\n",
+        "export class {name} {{\n  constructor(private size: number) {{}}\n"
+        "  public method_{n}(): number {{ return this.size * {n}; }}\n}}\n\n",
+    ),
+    ".go": (
+        "package main\n\nimport \"fmt\"\n\n",
+        "func {name}(value int, args ...string) int {{\n\ttotal := value\n"
+        "\tfor _, item := range args {{\n\t\ttotal += len(item)\n\t}}\n\treturn total\n}}\n\n",
+        "type {name} struct {{\n\tsize int\n}}\n\n"
+        "func (s *{name}) Method{n}() int {{\n\treturn s.size * {n}\n}}\n\n",
+    ),
+    ".java": (
+        "import java.util.List;\n\n",
+        "class Helpers{n} {{\n    public static int {name}(int value, List<String> args) {{\n"
+        "        int total = value;\n        for (String item : args) {{ total += item.length(); }}\n"
+        "        return total;\n    }}\n}}\n\n",
+        "class {name} {{\n    private int size;\n    public int method{n}() {{ return size * {n}; }}\n}}\n\n",
+    ),
+}
+
+# Every fourth definition is a class
+CLASS_SLOT = 3
+
+# Shapes: (files, depth, fanout, definitions per file)
+SHAPES = {
+    "small": (200, 2, 4, 6),
+    "medium": (2000, 3, 6, 8),
+    "large": (20000, 4, 8, 8),
+}
+
+
+def function_name(file_index: int, i: int) -> str:
+    return f"compute_{file_index}_{i}"
+
+
+def class_name(file_index: int, i: int) -> str:
+    return f"Widget{file_index}x{i}"
+
+
+def _directories(depth: int, fanout: int):
+    """All package directories of a tree with the given depth and fanout."""
+    level = [""]
+    dirs = []
+    for d in range(depth):
+        level = [os.path.join(parent, f"pkg{d}_{i}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    return dirs or [""]
+
+
+def generate(out_dir: str, files: int = 2000, depth: int = 3, fanout: int = 6,
+             definitions: int = 8) -> dict:
+    """Write a synthetic repository to out_dir (replacing it); returns its description.
+
+    The tree depends only on the arguments, so runs are comparable.
+    """
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    dirs = _directories(depth, fanout)
+    extensions = list(LANGUAGES)
+    written = []
+
+    for index in range(files):
+        ext = extensions[index % len(extensions)]
+        header, function_template, class_template = LANGUAGES[ext]
+        directory = os.path.join(out_dir, dirs[index % len(dirs)])
+        os.makedirs(directory, exist_ok=True)
+
+        parts = [header.format()]
+        for i in range(definitions):
+            if i % 4 == CLASS_SLOT:
+                parts.append(class_template.format(name=class_name(index, i), n=i))
+            else:
+                parts.append(function_template.format(name=function_name(index, i), n=i))
+        if index % 10 == 0:
+            parts.append("// TODO: remove this workaround\n" if ext != ".py" else "# TODO: remove this workaround\n")
+
+        path = os.path.join(directory, f"module_{index}{ext}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("".join(parts))
+        written.append(os.path.relpath(path, out_dir))
+
+    # Clutter that listing and search must skip
+    for i in range(max(1, files // 20)):
+        vendored = os.path.join(out_dir, "node_modules", f"lib{i}")
+        os.makedirs(vendored, exist_ok=True)
+        with open(os.path.join(vendored, "index.js"), 'w', encoding='utf-8') as f:
+            f.write("function vendored() { return 1; }\n")
+    os.makedirs(os.path.join(out_dir, "build"), exist_ok=True)
+    with open(os.path.join(out_dir, "build", "bundle.js"), 'w', encoding='utf-8') as f:
+        f.write("function bundled(){return 1}" * 2000)
+    with open(os.path.join(out_dir, ".gitignore"), 'w', encoding='utf-8') as f:
+        f.write("build/\n*.log\n")
+
+    # The assistant's own config, pointed at the synthetic tree
+    with open(os.path.join(ROOT, "config.json"), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config["project_root"] = "."
+    with open(os.path.join(out_dir, "config.json"), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    middle = files // 2
+    return {
+        "path": out_dir,
+        "files": files,
+        "depth": depth,
+        "fanout": fanout,
+        "definitions": definitions,
+        "sample_file": written[middle],
+        "function": function_name(middle, 0),
+        "class": class_name(middle, CLASS_SLOT) if definitions > CLASS_SLOT else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=6)
+    parser.add_argument("--definitions", type=int, default=8, help="functions/classes per file")
+    args = parser.parse_args()
+
+    info = generate(args.out_dir, args.files, args.depth, args.fanout, args.definitions)
+    print(json.dumps(info, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from typing import Dict, Iterator, List
+
+from ollama_client import ERROR_PREFIX, SYSTEM_PROMPT, code_block, question_prompt, summary_prompt
+from tools.chunker import estimate_tokens
+
+
+class ChatSession:
+    """A multi-turn conversation with the model, optionally about one file.
+
+    Every request is laid out so it extends the previous one: the system
+    prompt and file context come first and never change, then the summary
+    of older turns, then the recent turns and the new question. With the
+    model kept loaded (keep_alive), Ollama only has to prefill what was
+    added since the last turn.
+
+    Once the recent turns grow past ``history_tokens``, all but the last
+    ``keep_turns`` exchanges are folded into the summary, so prompts stay
+    bounded however long the session runs.
+    """
+
+    def __init__(self, client, history_tokens: int = 1500, keep_turns: int = 2):
+        # client is a DeepSeekClient
+        self.client = client
+        self.history_tokens = history_tokens
+        self.keep_turns = keep_turns
+        self.filename = ""
+        self.context = ""
+        self.summary = ""
+        self.turns: List[Dict] = []
+
+    def set_file(self, code: str, filename: str):
+        """Talk about this file from now on (history is kept)."""
+        self.filename = filename
+        self.context = code_block(code, filename)
+
+    def reset(self):
+        """Forget the conversation, keeping the file."""
+        self.summary = ""
+        self.turns = []
+
+    def messages(self, question: str, extra_context: str = "") -> List[Dict]:
+        """The full request for a new question."""
+        system = SYSTEM_PROMPT
+        if self.context:
+            system += f"\n\n{self.context}"
+        if self.summary:
+            system += f"\n\nSummary of the conversation so far:\n{self.summary}"
+
+        return (
+            [{"role": "system", "content": system}]
+            + self.turns
+            + [{"role": "user", "content": question_prompt(question, extra_context)}]
+        )
+
+    def ask(self, question: str, extra_context: str = "", stream: bool = False):
+        """Ask the next question; returns the answer, or an iterator of chunks."""
+        self._compact()
+        messages = self.messages(question, extra_context)
+
+        if stream:
+            return self._record(messages[-1], self.client.chat_stream(messages, task="chat"))
+
+        answer = self.client.chat(messages, task="chat")
+        self._remember(messages[-1], answer)
+        return answer
+
+    def _record(self, message: Dict, chunks: Iterator[str]) -> Iterator[str]:
+        parts = []
+        finished = False
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            finished = True
+        finally:
+            chunks.close()
+            if finished:
+                self._remember(message, "".join(parts))
+
+    def _remember(self, message: Dict, answer: str):
+        if answer.startswith(ERROR_PREFIX):
+            return
+        # Stored exactly as sent, so the next request starts with this one
+        self.turns.append(message)
+        self.turns.append({"role": "assistant", "content": answer})
+
+    def history_size(self) -> int:
+        """Estimated tokens in the recent turns."""
+        return sum(estimate_tokens(turn["content"]) for turn in self.turns)
+
+    def _compact(self):
+        """Fold older turns into the summary once the history is over budget."""
+        keep = self.keep_turns * 2
+        if len(self.turns) <= keep or self.history_size() <= self.history_tokens:
+            return
+
+        older, self.turns = self.turns[:-keep], self.turns[-keep:]
+        summary = self.client.ask(summary_prompt(self.summary, older), task="chat")
+        if not summary.startswith(ERROR_PREFIX):
+            self.summary = summary.strip()
+
+
+# Simple test when running directly (python chat.py); needs Ollama
+if __name__ == "__main__":
+    from ollama_client import DeepSeekClient
+
+    session = ChatSession(DeepSeekClient(temperature=0), history_tokens=200, keep_turns=1)
+    session.set_file("def add(a, b):\n    return a + b\n", "math_utils.py")
+    for question in ["What does add do?", "How would I make it handle lists?", "Write a test for it."]:
+        print(f"> {question}")
+        print(session.ask(question)[:300], "\n")
+    print("Summary:", session.summary or "(none)")
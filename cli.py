@@ -1,23 +1,117 @@
 import sys
 import os
-from colorama import Fore, Style, init, just_fix_windows_console
+import shlex
 from ollama_client import DeepSeekClient
+import daemon
 from tools.file_ops import FileOperations
 from tools.search import CodeSearch
+from tools.chunker import estimate_tokens
+from tools.profiler import NULL_PROFILER, Profiler, append_record
 
-# Fix Windows console for colors
-just_fix_windows_console()
-init(autoreset=True)
+# Heavy or model-related modules (ollama, numpy, asyncio, sqlite3, colorama)
+# are imported where they are first needed, so offline commands start fast.
+_colorama = None
+
+
+def _load_colorama():
+    global _colorama
+    if _colorama is None:
+        import colorama
+
+        # Fix Windows console for colors
+        colorama.just_fix_windows_console()
+        colorama.init(autoreset=True)
+        _colorama = colorama
+    return _colorama
+
+
+class _LazyColor:
+    """Stand-in for colorama's Fore/Style that loads colorama on first use."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(getattr(_load_colorama(), self._name), attr)
+
+
+Fore = _LazyColor("Fore")
+Style = _LazyColor("Style")
+
+# Options that take a value, e.g. "--jobs 8" or "-C 3"
+VALUE_OPTIONS = {"--jobs", "--dir", "--out", "--limit", "-C", "-A", "-B"}
+# Value options that must be counts
+COUNT_OPTIONS = {"limit": "--limit", "C": "-C", "A": "-A", "B": "-B"}
+# Options that are simple on/off switches
+FLAG_OPTIONS = {"--no-cache", "--refresh", "--chunked", "--restart", "--full", "--profile",
+                "--count", "--rank", "--diff"}
+# Position (after the command) of the argument naming a file or function,
+# the only place where @N stands for a result of the last find
+PICK_ARGUMENTS = {"explain": 0, "improve": 0, "debug": 0, "chat": 0, "ask": 1,
+                  "function": 0, "usage": 0}
+# Commands that ask the model, and the generation profile each one uses
+MODEL_TASKS = {"explain": "explain", "debug": "debug", "improve": "improve",
+               "ask": "ask", "usage": "usage", "chat": "chat"}
+
+
+def parse_options(args):
+    """Split command-line arguments into positionals and --options."""
+    positional = []
+    options = {}
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in VALUE_OPTIONS and i + 1 < len(args):
+            options[arg.lstrip("-")] = args[i + 1]
+            i += 2
+            continue
+        if arg in FLAG_OPTIONS:
+            options[arg.lstrip("-")] = True
+            i += 1
+            continue
+        positional.append(arg)
+        i += 1
+
+    return positional, options
 
 
 class AIDevCLI:
     def __init__(self):
         print(f"{Fore.YELLOW}Initializing AI Assistant...{Style.RESET_ALL}")
-        self.client = DeepSeekClient()
         self.file_ops = FileOperations()
         self.search = CodeSearch(self.file_ops)
+        self.cache_mode = "auto"
+        self._client = None
+        self.profiler = NULL_PROFILER
         print(f"{Fore.GREEN}✓ Ready!{Style.RESET_ALL}\n")
 
+    @property
+    def client(self):
+        """The model client, created on first use so offline commands never load it."""
+        if self._client is None:
+            config = self.file_ops.config
+            self._client = DeepSeekClient(
+                model=config.get("model", "deepseek-coder:1.3b"),
+                temperature=config.get("temperature", 0.7),
+                cache=self._build_cache(),
+                cache_mode=self.cache_mode,
+                keep_alive=config.get("keep_alive"),
+                profiles=config.get("generation"),
+            )
+            self._client.profiler = self.profiler
+        return self._client
+
+    def _build_cache(self):
+        """Create the response cache described by the "cache" config section."""
+        settings = self.file_ops.config.get("cache", {})
+        if not settings.get("enabled", True):
+            return None
+
+        from response_cache import ResponseCache
+
+        return ResponseCache.from_config(settings, self.file_ops.cache_dir)
+
     def print_header(self, text):
         print(f"\n{Fore.CYAN}{'='*60}{Style.RESET_ALL}")
         print(f"{Fore.CYAN}{text}{Style.RESET_ALL}")
@@ -32,7 +126,47 @@ class AIDevCLI:
     def print_info(self, text):
         print(f"{Fore.YELLOW}ℹ {text}{Style.RESET_ALL}")
 
-    def explain_command(self, file_path):
+    def print_stream(self, chunks):
+        """Print streamed answer chunks as they arrive, then timing stats."""
+        try:
+            for chunk in chunks:
+                print(chunk, end="", flush=True)
+        except KeyboardInterrupt:
+            chunks.close()
+            print()
+            self.print_error("Generation cancelled")
+        print()
+
+        stats = self.client.last_stats
+        if stats.get("cached"):
+            self.print_info("Answer served from cache")
+        elif stats.get("ttft") is not None:
+            summary = f"First token after {stats['ttft']:.2f}s"
+            if stats.get("prompt_tokens") is not None:
+                summary += f" ({stats['prompt_tokens']} prompt tokens evaluated)"
+            summary += f", {stats['tokens']} tokens"
+            if stats.get("tokens_per_sec"):
+                summary += f" at {stats['tokens_per_sec']:.1f} tokens/s"
+            self.print_info(summary)
+
+    def _use_chunks(self, content, force=False):
+        """Whether a file needs the chunked map-reduce prompts."""
+        budget = self.file_ops.config.get("chunk_token_budget", 2000)
+        return force or estimate_tokens(content) > budget
+
+    def _chunked_options(self):
+        return {
+            "token_budget": self.file_ops.config.get("chunk_token_budget", 2000),
+            "workers": self.file_ops.config.get("chunk_workers", 2),
+            "stream": True,
+            "progress": lambda done, total: print(
+                f"\r{Fore.YELLOW}ℹ Summarized {done}/{total} chunks{Style.RESET_ALL}",
+                end="\n" if done == total else "",
+                flush=True,
+            ),
+        }
+
+    def explain_command(self, file_path, chunked=False):
         """Explain a file"""
         self.print_header(f"Explaining: {file_path}")
 
@@ -45,21 +179,26 @@ class AIDevCLI:
         self.print_success(f"Read {result['lines']} lines ({result['size']} bytes)")
         self.print_info("Asking DeepSeek Coder...\n")
 
-        explanation = self.client.explain_code(result['content'], file_path)
-        print(explanation)
+        if self._use_chunks(result['content'], chunked):
+            self.print_stream(self.client.explain_code_chunked(
+                result['content'], file_path, **self._chunked_options()
+            ))
+        else:
+            self.print_stream(self.client.explain_code(result['content'], file_path, stream=True))
 
-    def search_command(self, query):
+    def search_command(self, query, limit=None, count_only=False, rank=False, before=0, after=0):
         """Search for code"""
         self.print_header(f"Searching for: {query}")
 
-        result = self.search.search_code(query)
+        result = self.search.search_code(query, limit=limit, count_only=count_only, rank=rank)
 
         if "error" in result:
             self.print_error(result["error"])
             return
 
+        at_least = "" if result['complete'] else "at least "
         print(
-            f"Found {Fore.GREEN}{result['total_matches']}{Style.RESET_ALL} matches "
+            f"Found {at_least}{Fore.GREEN}{result['total_matches']}{Style.RESET_ALL} matches "
             f"in {Fore.CYAN}{result['files_with_matches']}{Style.RESET_ALL} files "
             f"(searched {result['files_searched']} files)\n"
         )
@@ -67,22 +206,214 @@ class AIDevCLI:
         if result['total_matches'] == 0:
             self.print_info("No matches found. Try a different search term.")
             return
+        if count_only:
+            return
 
-        for match in result['matches'][:15]:
+        shown = result['matches'] if limit is not None else result['matches'][:15]
+        if before or after:
+            self._print_context(self.search.add_context(shown, before, after))
+        else:
+            for match in shown:
+                print(
+                    f"{Fore.YELLOW}Line {match['line']}{Style.RESET_ALL} "
+                    f"in {Fore.CYAN}{match['file']}{Style.RESET_ALL}"
+                )
+                print(f"  {match['content']}\n")
+
+        if not result['complete']:
+            self.print_info(f"Stopped after {len(shown)} matches (--limit)")
+        elif result['total_matches'] > len(shown):
             print(
-                f"{Fore.YELLOW}Line {match['line']}{Style.RESET_ALL} "
-                f"in {Fore.CYAN}{match['file']}{Style.RESET_ALL}"
+                f"{Fore.YELLOW}... and {result['total_matches'] - len(shown)} more matches"
+                f"{Style.RESET_ALL}"
             )
-            print(f"  {match['content']}\n")
 
-        if result['total_matches'] > 15:
+    def _print_context(self, matches):
+        """Print matches with their context lines, merging overlapping ones like grep."""
+        hits = {(match['file'], match['line']) for match in matches}
+        last_file, last_line, last_end = None, 0, 0
+        for match in matches:
+            context = match.get('context', {"start": match['line'], "lines": [match['content']]})
+            start = context['start']
+            merged = match['file'] == last_file and last_line < match['line'] and start <= last_end + 1
+            if not merged and match['file'] == last_file:
+                print("    --")
+            elif not merged:
+                if last_file is not None:
+                    print()
+                print(f"{Fore.CYAN}{match['file']}{Style.RESET_ALL}")
+            for number, text in enumerate(context['lines'], start=start):
+                if merged and number <= last_end:
+                    continue
+                if (match['file'], number) in hits:
+                    print(f"{Fore.YELLOW}{number:>6}:{Style.RESET_ALL} {text}")
+                else:
+                    print(f"{number:>6}- {text}")
+            last_file, last_line = match['file'], match['line']
+            last_end = max(last_end if merged else 0, start + len(context['lines']) - 1)
+        print()
+
+    def find_command(self, query, limit=None):
+        """Fuzzy-find files and symbols, numbered for use as @N"""
+        self.print_header(f"Finding: {query}")
+
+        result = self.search.find(query, limit or 10)
+
+        if "error" in result:
+            self.print_error(result["error"])
+            return
+        if not result['files'] and not result['symbols']:
+            self.print_info("Nothing matches. Try fewer characters.")
+            return
+
+        picks = []
+        if result['files']:
+            print(f"{Fore.GREEN}Files{Style.RESET_ALL}")
+            for path in result['files']:
+                picks.append({"file": path})
+                print(f"  {Fore.YELLOW}@{len(picks):<3}{Style.RESET_ALL} {Fore.CYAN}{path}{Style.RESET_ALL}")
+            print()
+
+        if result['symbols']:
+            print(f"{Fore.GREEN}Symbols{Style.RESET_ALL}")
+            for symbol in result['symbols']:
+                picks.append({"file": symbol['file'], "name": symbol['name']})
+                owner = f" of {symbol['parent']}" if symbol.get('parent') else ""
+                more = f", +{symbol['definitions'] - 1} more" if symbol['definitions'] > 1 else ""
+                print(
+                    f"  {Fore.YELLOW}@{len(picks):<3}{Style.RESET_ALL} {symbol['name']} "
+                    f"({symbol['kind']}{owner}) in {Fore.CYAN}{symbol['file']}:{symbol['line']}"
+                    f"{Style.RESET_ALL}{more}"
+                )
+            print()
+
+        try:
+            import json
+
+            self.file_ops.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.file_ops.cache_dir / "last_find.json", 'w', encoding='utf-8') as f:
+                json.dump(picks, f)
+        except OSError as e:
+            self.print_error(f"Could not save the results: {str(e)}")
+            return
+        self.print_info("Use @N in place of a file or function name, e.g. python cli.py explain @1")
+
+    def _resolve_picks(self, command, args, options):
+        """Replace an @N file or function argument with the Nth result of the last find.
+
+        Only the argument that names a file or function (PICK_ARGUMENTS) is
+        replaced, so a search for "@1" or a question mentioning it is left
+        alone. A symbol stands for its name in function/usage and for its
+        file everywhere else. Returns None (after printing why) on a bad pick.
+        """
+        position = PICK_ARGUMENTS.get(command)
+        if options.get("diff") or position is None or len(args) <= position:
+            return args
+        arg = args[position]
+        if not (arg[:1] == "@" and arg[1:].isdigit()):
+            return args
+
+        import json
+
+        try:
+            with open(self.file_ops.cache_dir / "last_find.json", 'r', encoding='utf-8') as f:
+                picks = json.load(f)
+        except (OSError, ValueError):
+            self.print_error("No find results to pick from; run python cli.py find <query> first")
+            return None
+
+        number = int(arg[1:])
+        if not 1 <= number <= len(picks):
+            self.print_error(f"{arg}: the last find had {len(picks)} results")
+            return None
+        pick = picks[number - 1]
+        if command in ("function", "usage") and "name" in pick:
+            return args[:position] + [pick["name"]] + args[position + 1:]
+        return args[:position] + [pick["file"]] + args[position + 1:]
+
+    def batch_command(self, task, directory, output=None, restart=False):
+        """Explain or improve every file in a directory"""
+        self.print_header(f"Batch {task}: {directory}")
+
+        import asyncio
+        from async_client import AsyncDeepSeekClient
+        from batch import BatchRunner
+
+        config = self.file_ops.config
+        client = AsyncDeepSeekClient(
+            model=self.client.model,
+            temperature=self.client.temperature,
+            cache=self.client.cache,
+            cache_mode=self.cache_mode,
+            max_concurrency=config.get("batch_concurrency", 2),
+            keep_alive=self.client.keep_alive,
+            profiles=self.client.profiles,
+        )
+        client.profiler = self.profiler
+        runner = BatchRunner(
+            self.file_ops, client, task, directory,
+            token_budget=config.get("chunk_token_budget", 2000),
+        )
+        if restart:
+            runner.reset()
+
+        def progress(update):
+            minutes, seconds = divmod(int(update["eta"]), 60)
+            status = f"{Fore.RED}failed{Style.RESET_ALL}" if update["failed"] else "done"
             print(
-                f"{Fore.YELLOW}... and {result['total_matches'] - 15} more matches"
-                f"{Style.RESET_ALL}"
+                f"[{update['done']}/{update['total']}] {update['file']} {status} "
+                f"{Fore.YELLOW}(ETA {minutes}m{seconds:02d}s){Style.RESET_ALL}"
             )
 
-    def debug_command(self, file_path, error_msg=""):
+        async def run():
+            async with client:
+                return await runner.run(progress)
+
+        try:
+            result = asyncio.run(run())
+        except KeyboardInterrupt:
+            print()
+            self.print_info("Interrupted; run the same command again to resume")
+            return
+
+        if "error" in result:
+            self.print_error(result["error"])
+            return
+
+        self.print_success(
+            f"Processed {result['processed']} files "
+            f"({result['skipped']} unchanged files resumed from checkpoint)"
+        )
+        failed = sum(1 for record in result["records"] if record.get("failed"))
+        if failed:
+            self.print_error(f"{failed} files failed and will be retried on the next run")
+
+        paths = runner.write_reports(result["records"], output or f"{task}-report")
+        self.print_success(f"Report written to {', '.join(paths)}")
+
+    def _focus(self, file_path, content, line):
+        """Cut a file down to the code around a line, within the token budget."""
+        from tools.focus import focus_context
+
+        config = self.file_ops.config
+        with self.profiler.phase("focus"):
+            focus = focus_context(
+                content, file_path, line,
+                window=config.get("context_window_lines", 20),
+                token_budget=config.get("chunk_token_budget", 2000),
+            )
+        if focus["focused"]:
+            where = f" in {focus['symbol']}" if focus["symbol"] else ""
+            self.print_info(
+                f"Sending lines {focus['start']}-{focus['end']} around line {focus['line']}{where} "
+                f"(use --full for the whole file)\n"
+            )
+        return focus
+
+    def debug_command(self, file_path, error_msg="", full=False):
         """Debug a file"""
+        from tools.focus import parse_error_line
+
         self.print_header(f"Debugging: {file_path}")
 
         result = self.file_ops.read_file(file_path)
@@ -94,12 +425,21 @@ class AIDevCLI:
         if error_msg:
             print(f"Error: {Fore.RED}{error_msg}{Style.RESET_ALL}\n")
 
+        code = result['content']
+        line = parse_error_line(error_msg, file_path)
+        excerpt = False
+        if line and not full:
+            focus = self._focus(file_path, code, line)
+            if focus["focused"]:
+                code, excerpt = focus["content"], True
+
         self.print_info("Analyzing code...\n")
 
-        debug_info = self.client.debug_code(result['content'], error_msg)
-        print(debug_info)
+        self.print_stream(self.client.debug_code(
+            code, error_msg, line, stream=True, excerpt=excerpt, filename=file_path
+        ))
 
-    def improve_command(self, file_path):
+    def improve_command(self, file_path, chunked=False):
         """Suggest improvements"""
         self.print_header(f"Analyzing: {file_path}")
 
@@ -111,11 +451,80 @@ class AIDevCLI:
 
         self.print_info("Looking for improvements...\n")
 
-        suggestions = self.client.suggest_improvements(result['content'])
-        print(suggestions)
+        if self._use_chunks(result['content'], chunked):
+            self.print_stream(self.client.suggest_improvements_chunked(
+                result['content'], file_path, **self._chunked_options()
+            ))
+        else:
+            self.print_stream(self.client.suggest_improvements(
+                result['content'], stream=True, filename=file_path
+            ))
 
-    def ask_command(self, question, file_path=None):
+    def improve_diff_command(self, rev=None):
+        """Review only the code changed since rev (HEAD by default)"""
+        from concurrent.futures import ThreadPoolExecutor
+        from tools.git_diff import batch_excerpts, changed_lines, diff_excerpt, read_source
+
+        if rev and (rev.startswith("-") or (self.file_ops.project_root / rev).is_file()):
+            self.print_error(f"Not a git revision: {rev} (usage: improve --diff [REV], e.g. main...HEAD)")
+            return
+
+        self.print_header(f"Reviewing changes since: {rev or 'HEAD'}")
+
+        diff = changed_lines(self.file_ops.project_root, rev)
+        if "error" in diff:
+            self.print_error(diff["error"])
+            return
+        if not diff['files']:
+            self.print_info("No changes to review.")
+            return
+
+        budget = self.file_ops.config.get("chunk_token_budget", 2000)
+        max_file_size = int(self.file_ops.config.get("max_file_size_mb", 10) * 1024 * 1024)
+        excerpts = []
+        whole = 0
+        for path, ranges in diff['files'].items():
+            if not self.file_ops.is_valid_path(self.file_ops.project_root / path):
+                continue  # excluded directory or not a source file
+            # For a range (main...feature) the line numbers are the target's
+            source = read_source(self.file_ops.project_root, path, diff['target'], max_file_size)
+            if source is None:
+                continue  # binary, too large or unreadable
+            excerpts.append(diff_excerpt(source, path, ranges, token_budget=budget))
+            whole += estimate_tokens(source)
+
+        batches = batch_excerpts(excerpts, budget)
+        if not batches:
+            self.print_info("No changed source files to review.")
+            return
+
+        sent = sum(batch['tokens'] for batch in batches)
+        self.print_success(
+            f"{len(excerpts)} changed files, ~{sent} tokens of changed code in {len(batches)} "
+            f"request(s) (the whole files would be ~{whole})\n"
+        )
+
+        if len(batches) == 1:
+            self.print_stream(self.client.suggest_improvements(
+                batches[0]['content'], stream=True, filename=", ".join(batches[0]['files']), excerpt=True
+            ))
+            return
+
+        def review(batch):
+            return self.client.suggest_improvements(batch['content'], filename=", ".join(batch['files']),
+                                                    excerpt=True)
+
+        workers = self.file_ops.config.get("chunk_workers", 2)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for batch, answer in zip(batches, executor.map(review, batches)):
+                print(f"{Fore.CYAN}── {', '.join(batch['files'])}{Style.RESET_ALL}\n")
+                print(answer)
+                print()
+
+    def ask_command(self, question, file_path=None, full=False):
         """Ask a question"""
+        from tools.focus import parse_error_line
+
         self.print_header("AI Assistant")
 
         print(f"{Fore.CYAN}Question:{Style.RESET_ALL} {question}\n")
@@ -126,13 +535,78 @@ class AIDevCLI:
             if "error" not in result:
                 context = result['content']
                 self.print_success(f"Using context from: {file_path}\n")
+                # A question about a specific line only needs the code around it
+                line = parse_error_line(question, file_path)
+                if line and not full:
+                    focus = self._focus(file_path, context, line)
+                    if focus["focused"]:
+                        context = focus["content"]
             else:
                 self.print_error(f"Could not read context file: {result['error']}\n")
+        else:
+            context = self._retrieve_context(question)
 
         self.print_info("Thinking...\n")
 
-        answer = self.client.answer_question(question, context)
-        print(answer)
+        self.print_stream(self.client.answer_question(question, context, stream=True))
+
+    def _embedding_index(self):
+        from tools.embeddings import EmbeddingIndex, OllamaEmbedder
+
+        config = self.file_ops.config
+        return EmbeddingIndex(
+            self.file_ops,
+            OllamaEmbedder(config.get("embedding_model", "nomic-embed-text")),
+            chunk_tokens=config.get("embedding_chunk_tokens", 300),
+        )
+
+    def index_command(self, directory="."):
+        """Embed project files for retrieval-augmented questions"""
+        self.print_header(f"Indexing: {directory}")
+
+        index = self._embedding_index()
+        try:
+            with self.profiler.phase("embed"):
+                result = index.update(directory, progress=lambda done, total: print(
+                    f"\r{Fore.YELLOW}ℹ Chunked {done}/{total} changed files{Style.RESET_ALL}",
+                    end="\n" if done == total else "",
+                    flush=True,
+                ))
+        except Exception as e:
+            self.print_error(f"Could not build the index: {str(e)}")
+            return
+
+        if "error" in result:
+            self.print_error(result["error"])
+            return
+
+        self.print_success(
+            f"Embedded {result['chunks_embedded']} chunks from {result['files_indexed']} "
+            f"changed files ({result['files_removed']} removed, "
+            f"{result['total_chunks']} chunks total)"
+        )
+
+    def _retrieve_context(self, question):
+        """Build context for a question from the embedding index, if there is one."""
+        index = self._embedding_index()
+        if not index.exists():
+            return ""
+
+        try:
+            with self.profiler.phase("retrieve"):
+                hits = index.search(question, self.file_ops.config.get("retrieval_top_k", 4))
+        except Exception as e:
+            self.print_error(f"Could not search the index: {str(e)}\n")
+            return ""
+
+        sections = []
+        for hit in hits:
+            self.print_success(f"Using context from: {hit['file']} (lines {hit['start']}-{hit['end']})")
+            sections.append(f"# {hit['file']} (lines {hit['start']}-{hit['end']})\n{hit['text']}")
+        if sections:
+            print()
+
+        return "\n\n".join(sections)
 
     def list_command(self, directory="."):
         """List files"""
@@ -168,44 +642,282 @@ class AIDevCLI:
         self.print_success(f"Found {result['total_matches']} definitions\n")
 
         for match in result['matches']:
+            owner = f" of {match['parent']}" if match.get('parent') else ""
             print(
-                f"{Fore.YELLOW}Line {match['line']}{Style.RESET_ALL} "
-                f"in {Fore.CYAN}{match['file']}{Style.RESET_ALL}"
+                f"{Fore.YELLOW}Lines {match['line']}-{match['end']}{Style.RESET_ALL} "
+                f"in {Fore.CYAN}{match['file']}{Style.RESET_ALL} ({match['kind']}{owner})"
             )
             print(f"  {match['content']}\n")
 
-    def run(self):
+    def usage_command(self, function_name):
+        """Explain how a function is used, from its definition and call sites"""
+        self.print_header(f"Usage of: {function_name}")
+
+        result = self.search.usage_context(
+            function_name,
+            token_budget=self.file_ops.config.get("chunk_token_budget", 2000),
+        )
+
+        if "error" in result:
+            self.print_error(result["error"])
+            return
+        if not result['definitions'] and not result['call_sites']:
+            self.print_error(f"Function '{function_name}' not found")
+            return
+
+        self.print_success(
+            f"{len(result['definitions'])} definitions, {len(result['call_sites'])} call sites "
+            f"({result['sites_included']} sent to the model)\n"
+        )
+
+        self.print_stream(self.client.find_function_usage(function_name, result['context'], stream=True))
+
+    def chat_command(self, file_path=None):
+        """Multi-turn conversation, optionally about one file"""
+        from chat import ChatSession
+
+        self.print_header(f"Chat: {file_path}" if file_path else "Chat")
+
+        config = self.file_ops.config
+        session = ChatSession(self.client, history_tokens=config.get("chat_history_tokens", 1500))
+
+        def load(path):
+            result = self.file_ops.read_file(path)
+            if "error" in result:
+                self.print_error(result["error"])
+                return
+            session.set_file(result['content'], path)
+            self.print_success(f"Talking about: {path}")
+
+        if file_path:
+            load(file_path)
+
+        try:
+            import readline  # noqa: F401  (line editing and history)
+        except ImportError:
+            pass
+
+        keepalive = self._warm_up()
+        self.print_info("Ask follow-up questions. /file <path> switches files, /reset clears "
+                        "the history, /exit leaves.\n")
+
+        while True:
+            try:
+                line = input(f"{Fore.CYAN}you> {Style.RESET_ALL}").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+
+            if not line:
+                continue
+            if line in ("/exit", "/quit", "exit", "quit"):
+                break
+            if line == "/reset":
+                session.reset()
+                self.print_success("History cleared")
+                continue
+            if line.startswith("/file "):
+                load(line[len("/file "):].strip())
+                continue
+
+            # Without a file, each question brings its own retrieved context
+            extra = "" if session.context else self._retrieve_context(line)
+            print()
+            self.print_stream(session.ask(line, extra, stream=True))
+            print()
+
+        keepalive.stop()
+
+    def _warm_up(self):
+        """Keep state warm for a long-lived session (shell or serve)."""
+        config = self.file_ops.config
+        self.file_ops.listing_ttl = config.get("listing_ttl", 2)
+        keepalive = daemon.KeepAlive(
+            self.client,
+            interval=config.get("keepalive_interval", 240),
+            keep_alive=config.get("keep_alive", "10m"),
+        )
+        keepalive.start()
+        return keepalive
+
+    def shell_command(self):
+        """Interactive session that keeps the model and indexes warm"""
+        try:
+            import readline  # noqa: F401  (line editing and history)
+        except ImportError:
+            pass
+
+        keepalive = self._warm_up()
+        self.print_info("Interactive shell. Type a command without 'python cli.py', or 'exit'.")
+
+        while True:
+            try:
+                line = input(f"{Fore.CYAN}ai> {Style.RESET_ALL}")
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                self.print_error(str(e))
+                continue
+
+            if not args:
+                continue
+            if args[0] in ("exit", "quit"):
+                break
+            if args[0] in ("shell", "serve"):
+                self.print_error(f"'{args[0]}' is not available inside the shell")
+                continue
+
+            try:
+                self.run(["cli.py"] + args)
+            except KeyboardInterrupt:
+                print()
+                self.print_error("Cancelled")
+
+        keepalive.stop()
+
+    def serve_command(self):
+        """Serve commands from thin clients over a Unix socket"""
+        self.print_header("AI Assistant daemon")
+        keepalive = self._warm_up()
+        daemon.serve(self, daemon.socket_path())
+        keepalive.stop()
+
+    def run(self, argv=None):
         """Main CLI loop"""
-        if len(sys.argv) < 2:
+        argv, options = parse_options(sys.argv if argv is None else argv)
+
+        if len(argv) < 2:
             self.print_help()
             return
 
-        command = sys.argv[1].lower()
-
-        if command == "explain" and len(sys.argv) > 2:
-            self.explain_command(sys.argv[2])
+        # Options apply to one command only (matters in shell/serve sessions)
+        try:
+            self.search.jobs = max(1, int(options.get("jobs", 1)))
+        except ValueError:
+            self.print_error(f"Invalid --jobs value: {options['jobs']}")
+            return
+        for name, flag in COUNT_OPTIONS.items():
+            if name in options:
+                try:
+                    options[name] = max(0, int(options[name]))
+                except ValueError:
+                    self.print_error(f"Invalid {flag} value: {options[name]}")
+                    return
+
+        if options.get("no-cache"):
+            self.cache_mode = "off"
+        elif options.get("refresh"):
+            self.cache_mode = "refresh"
+        else:
+            self.cache_mode = "auto"
+        if self._client is not None:
+            self._client.cache_mode = self.cache_mode
 
-        elif command == "search" and len(sys.argv) > 2:
-            self.search_command(sys.argv[2])
+        command = argv[1].lower()
 
-        elif command == "debug" and len(sys.argv) > 2:
-            error = " ".join(sys.argv[3:]) if len(sys.argv) > 3 else ""
-            self.debug_command(sys.argv[2], error)
+        picked = self._resolve_picks(command, argv[2:], options)
+        if picked is None:
+            return
+        argv = argv[:2] + picked
 
-        elif command == "improve" and len(sys.argv) > 2:
-            self.improve_command(sys.argv[2])
+        if command in ("shell", "serve"):
+            # Every command inside the session is profiled on its own
+            self._dispatch(command, argv, options)
+            return
 
-        elif command == "ask" and len(sys.argv) > 2:
-            question = sys.argv[2]
-            file_path = sys.argv[3] if len(sys.argv) > 3 else None
-            self.ask_command(question, file_path)
+        self._set_profiler(Profiler(command, argv[2:]))
+
+        # Load the model while the command is still reading files
+        task = MODEL_TASKS.get(command)
+        if task and (len(argv) > 2 or command == "chat" or options.get("diff")) and "dir" not in options:
+            self.client.preload(task)
+
+        try:
+            self._dispatch(command, argv, options)
+        finally:
+            self._finish_profile(options.get("profile", False))
+
+    def _set_profiler(self, profiler):
+        self.profiler = profiler
+        self.file_ops.profiler = profiler
+        if self._client is not None:
+            self._client.profiler = profiler
+
+    def _finish_profile(self, show):
+        """Print the phase timings (--profile) and append them to the metrics log."""
+        profiler = self.profiler
+        self._set_profiler(NULL_PROFILER)
+
+        if show:
+            self.print_header("Profile")
+            for line in profiler.summary():
+                print(line)
+
+        path = self.file_ops.config.get("metrics_log")
+        if path:
+            try:
+                append_record(self.file_ops.project_root / path, profiler.record())
+            except OSError as e:
+                self.print_error(f"Could not write the metrics log: {str(e)}")
+
+    def _dispatch(self, command, argv, options):
+        if command in ("explain", "improve") and "dir" in options:
+            self.batch_command(command, options["dir"], options.get("out"),
+                               options.get("restart", False))
+
+        elif command == "explain" and len(argv) > 2:
+            self.explain_command(argv[2], options.get("chunked", False))
+
+        elif command == "search" and len(argv) > 2:
+            context = options.get("C", 0)
+            self.search_command(argv[2], options.get("limit"), options.get("count", False),
+                                options.get("rank", False), options.get("B", context),
+                                options.get("A", context))
+
+        elif command == "find" and len(argv) > 2:
+            self.find_command(" ".join(argv[2:]), options.get("limit"))
+
+        elif command == "debug" and len(argv) > 2:
+            error = " ".join(argv[3:]) if len(argv) > 3 else ""
+            self.debug_command(argv[2], error, options.get("full", False))
+
+        elif command == "improve" and options.get("diff"):
+            self.improve_diff_command(argv[2] if len(argv) > 2 else None)
+
+        elif command == "improve" and len(argv) > 2:
+            self.improve_command(argv[2], options.get("chunked", False))
+
+        elif command == "ask" and len(argv) > 2:
+            question = argv[2]
+            file_path = argv[3] if len(argv) > 3 else None
+            self.ask_command(question, file_path, options.get("full", False))
+
+        elif command == "index":
+            directory = argv[2] if len(argv) > 2 else "."
+            self.index_command(directory)
 
         elif command == "list":
-            directory = sys.argv[2] if len(sys.argv) > 2 else "."
+            directory = argv[2] if len(argv) > 2 else "."
             self.list_command(directory)
 
-        elif command == "function" and len(sys.argv) > 2:
-            self.function_command(sys.argv[2])
+        elif command == "function" and len(argv) > 2:
+            self.function_command(argv[2])
+
+        elif command == "usage" and len(argv) > 2:
+            self.usage_command(argv[2])
+
+        elif command == "chat":
+            self.chat_command(argv[2] if len(argv) > 2 else None)
+
+        elif command == "shell":
+            self.shell_command()
+
+        elif command == "serve":
+            self.serve_command()
 
         else:
             self.print_help()
@@ -220,23 +932,67 @@ Usage:
 Commands:
   explain <file>          Explain what a file does
   search <query>          Search for code patterns
+  find <query>            Fuzzy-find files and symbols; use a result as @N
   debug <file> [error]    Debug a file with optional error message
   improve <file>          Suggest code improvements
   ask <question> [file]   Ask a question (with optional context)
+  chat [file]             Conversation with follow-up questions (about a file)
+  index [directory]       Embed files so ask can find relevant code itself
   list [directory]        List files in directory
-  function <name>         Find function definitions
+  function <name>         Find function definitions (name, prefix.* or regex)
+  usage <name>            Explain how a function is used across the project
+  shell                   Interactive session that keeps everything warm
+  serve                   Background daemon; other cli.py calls forward to it
+
+Options:
+  --jobs N                Scan files in N parallel workers (search)
+  --limit N               Show N search matches and stop scanning once found
+                          (find: N files and N symbols)
+  --count                 Only count search matches
+  --rank                  Show the best search matches: definitions first,
+                          then recently changed files
+  -C N, -A N, -B N        Show N lines of context around (after, before)
+                          each search match
+  --no-cache              Don't read or write the response cache
+  --refresh               Ignore cached answers and store fresh ones
+  --chunked               Explain/improve in chunks (automatic for large files)
+  --dir DIR               Explain/improve every file in DIR, resumably
+  --out PATH              Report path for --dir (default: <command>-report)
+  --restart               Ignore the --dir checkpoint and start over
+  --full                  Debug/ask with the whole file, not just the code
+                          around the line named in the error
+  --diff [REV]            Improve: review only what changed since REV (default
+                          HEAD), with the functions around each change
+  --profile               Show where the time went (walk, read, prompt, model...)
 
 Examples:
   python cli.py explain app.py
   python cli.py search "def login"
   python cli.py debug auth.py "TypeError on line 45"
+  python cli.py debug auth.py "$(cat traceback.txt)" --full
   python cli.py improve utils.py
+  python cli.py improve --dir src --out release-review
+  python cli.py improve --diff main...HEAD
   python cli.py ask "How does this work?" app.py
+  python cli.py chat app.py
+  python cli.py index
   python cli.py list src
   python cli.py function calculate_total
+  python cli.py usage calculate_total
+  python cli.py search "TODO" --jobs 8
+  python cli.py search "import" --limit 20
+  python cli.py search "login" --rank
+  python cli.py search "raise" -C 2
+  python cli.py explain app.py --profile
+  python cli.py find usrctl
+  python cli.py explain @1
         """)
 
 
 if __name__ == "__main__":
-    cli = AIDevCLI()
-    cli.run()
+    # Hand the command to a running daemon, if there is one
+    forwardable = len(sys.argv) > 1 and sys.argv[1].lower() not in ("shell", "serve", "chat")
+    path = daemon.socket_path() if forwardable else None
+    if not (path and daemon.forward(path, sys.argv[1:])):
+        cli = AIDevCLI()
+        cli.run()
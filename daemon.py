@@ -0,0 +1,163 @@
+import json
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stdout
+from pathlib import Path
+
+
+def socket_path(config_path: str = "config.json") -> Path | None:
+    """Where the daemon for the project in the current directory listens."""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    root = Path(config.get('project_root', '.')).resolve()
+    return root / config.get('cache_dir', '.ai_assistant') / "daemon.sock"
+
+
+class KeepAlive:
+    """Pings Ollama periodically so it keeps the model loaded in memory."""
+
+    def __init__(self, client, interval: float = 240, keep_alive: str = "10m"):
+        self.client = client
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.client.ping_model(self.keep_alive)
+            self._stop.wait(self.interval)
+
+
+class _SocketWriter:
+    """File-like object that sends everything written to a client socket."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+
+    def write(self, text: str) -> int:
+        self.conn.sendall(text.encode("utf-8"))
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return True  # the thin client prints to a terminal
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        cli = self.server.cli
+        try:
+            with redirect_stdout(_SocketWriter(self.connection)):
+                cli.run(["cli.py"] + request["args"])
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away (e.g. Ctrl-C); drop the command
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """Runs CLI commands sent over a Unix socket, one at a time.
+
+    The AIDevCLI instance, and with it the model client, caches and search
+    indexes, stays alive between commands.
+    """
+
+    def __init__(self, path: Path, cli):
+        self.cli = cli
+        super().__init__(str(path), _CommandHandler)
+
+
+def serve(cli, path: Path):
+    """Run the daemon until interrupted."""
+    if not hasattr(socket, "AF_UNIX"):
+        cli.print_error("serve needs Unix domain sockets, which this platform lacks")
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if forward_available(path):
+            cli.print_error(f"A daemon is already listening on {path}")
+            return
+        path.unlink()  # left behind by a daemon that crashed
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    # Treat "kill" like Ctrl-C so the socket file gets cleaned up
+    signal.signal(signal.SIGTERM, stop)
+
+    server = CommandServer(path, cli)
+    cli.print_success(f"Listening on {path} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+        if path.exists():
+            path.unlink()
+
+
+def forward_available(path: Path) -> bool:
+    """Whether a daemon is accepting connections on the socket."""
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            probe.connect(str(path))
+        return True
+    except OSError:
+        return False
+
+
+def forward(path: Path, args) -> bool:
+    """Send a command to a running daemon and print its output.
+
+    Returns False if no daemon is reachable, so the caller can run the
+    command itself.
+    """
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return False
+
+    try:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(str(path))
+    except OSError:
+        return False
+
+    with conn:
+        conn.sendall((json.dumps({"args": args}) + "\n").encode("utf-8"))
+        out = sys.stdout.buffer if hasattr(sys.stdout, "buffer") else None
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                if out is not None:
+                    out.write(data)
+                    out.flush()
+                else:
+                    sys.stdout.write(data.decode("utf-8", errors="replace"))
+        except KeyboardInterrupt:
+            print()
+
+    return True
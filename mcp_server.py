@@ -0,0 +1,490 @@
+"""
+MCP (Model Context Protocol) server for the AI Developer Assistant.
+
+Speaks JSON-RPC 2.0 over stdio, one message per line, and exposes the file,
+search and DeepSeek tools to MCP clients (editors, agents). The server is
+long-lived, so listings, file contents, search results and model answers
+are kept in memory and reused until the files behind them change.
+
+Run from the project root:
+  python mcp_server.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from ollama_client import DeepSeekClient, ERROR_PREFIX
+from tools.chunker import estimate_tokens
+from tools.file_ops import FileOperations
+from tools.focus import focus_context, parse_error_line
+from tools.search import CodeSearch
+
+PROTOCOL_VERSION = "2024-11-05"
+SERVER_INFO = {"name": "ai-dev-assistant", "version": "1.0.0"}
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+# Search results and model answers kept; the least recently used are dropped
+MAX_RESULTS = 256
+
+
+def _schema(properties: Dict, required: List[str]) -> Dict:
+    return {"type": "object", "properties": properties, "required": required}
+
+
+_STRING = {"type": "string"}
+_DIRECTORY = {"type": "string", "description": "Directory relative to the project root", "default": "."}
+_FILE = {"type": "string", "description": "File path relative to the project root"}
+
+TOOLS = [
+    {
+        "name": "read_file",
+        "description": "Read a project file, or only lines start_line..end_line of it.",
+        "inputSchema": _schema({
+            "file_path": _FILE,
+            "start_line": {"type": "integer", "minimum": 1},
+            "end_line": {"type": "integer", "minimum": 1},
+        }, ["file_path"]),
+    },
+    {
+        "name": "list_files",
+        "description": "List the source files in a directory (respects excluded_dirs and .gitignore).",
+        "inputSchema": _schema({"directory": _DIRECTORY, "recursive": {"type": "boolean", "default": True}}, []),
+    },
+    {
+        "name": "get_file_info",
+        "description": "Size and modification time of a file.",
+        "inputSchema": _schema({"file_path": _FILE}, ["file_path"]),
+    },
+    {
+        "name": "search_code",
+        "description": "Regex search across project files.",
+        "inputSchema": _schema({
+            "query": _STRING,
+            "directory": _DIRECTORY,
+            "case_sensitive": {"type": "boolean", "default": False},
+        }, ["query"]),
+    },
+    {
+        "name": "find_function",
+        "description": "Find function definitions by name.",
+        "inputSchema": _schema({"function_name": _STRING, "directory": _DIRECTORY}, ["function_name"]),
+    },
+    {
+        "name": "find_class",
+        "description": "Find class, interface and struct definitions by name.",
+        "inputSchema": _schema({"class_name": _STRING, "directory": _DIRECTORY}, ["class_name"]),
+    },
+    {
+        "name": "fuzzy_find",
+        "description": "Fuzzy-find file paths and symbol names (the query's characters in order, "
+                       "e.g. 'usrctl' finds user_controller.py).",
+        "inputSchema": _schema({
+            "query": _STRING,
+            "limit": {"type": "integer", "minimum": 1, "default": 20},
+            "directory": _DIRECTORY,
+        }, ["query"]),
+    },
+    {
+        "name": "explain_code",
+        "description": "Ask DeepSeek Coder to explain a file.",
+        "inputSchema": _schema({"file_path": _FILE}, ["file_path"]),
+    },
+    {
+        "name": "debug_code",
+        "description": "Ask DeepSeek Coder to debug a file, optionally given an error message. "
+                       "When the error names a line, only the code around it is sent unless full is set.",
+        "inputSchema": _schema({
+            "file_path": _FILE,
+            "error": _STRING,
+            "line_number": {"type": "integer"},
+            "full": {"type": "boolean", "default": False},
+        }, ["file_path"]),
+    },
+    {
+        "name": "suggest_improvements",
+        "description": "Ask DeepSeek Coder to review a file.",
+        "inputSchema": _schema({"file_path": _FILE}, ["file_path"]),
+    },
+    {
+        "name": "answer_question",
+        "description": "Ask DeepSeek Coder a coding question, optionally about a file.",
+        "inputSchema": _schema({"question": _STRING, "file_path": _FILE}, ["question"]),
+    },
+    {
+        "name": "find_function_usage",
+        "description": "Ask DeepSeek Coder how a function is used, in one file or (without "
+                       "file_path) from its definitions and call sites across the project.",
+        "inputSchema": _schema({"function_name": _STRING, "file_path": _FILE}, ["function_name"]),
+    },
+]
+TOOL_NAMES = {tool["name"] for tool in TOOLS}
+MODEL_TOOLS = {"explain_code", "debug_code", "suggest_improvements", "answer_question", "find_function_usage"}
+
+
+def _stat_signature(path: str) -> Tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class WarmFileOperations(FileOperations):
+    """FileOperations that keeps file contents between calls.
+
+    A file's content is reused while its mtime and size are unchanged.
+    Listings need no cache of their own: the workspace manifest already
+    re-scans only directories whose mtime or .gitignore changed.
+    """
+
+    def __init__(self, config_path="config.json", max_cached_bytes: int = 64 * 1024 * 1024):
+        super().__init__(config_path)
+        self.max_cached_bytes = max_cached_bytes
+        self._lock = threading.Lock()
+        self._contents = OrderedDict()  # absolute path -> (signature, result)
+        self._cached_bytes = 0
+
+    def _abs(self, file_path: str) -> str:
+        path = file_path.replace('/', os.sep).replace('\\', os.sep)
+        return path if os.path.isabs(path) else os.path.join(str(self.project_root), path)
+
+    def file_signature(self, file_path: str) -> Tuple[int, int] | None:
+        """(mtime_ns, size) of a file, or None if it can't be stat'ed."""
+        return _stat_signature(self._abs(file_path))
+
+    def read_file(self, file_path: str, start_line: int | None = None, end_line: int | None = None) -> dict:
+        if start_line is not None or end_line is not None:
+            return self.read_lines(file_path, start_line or 1, end_line)
+        path = self._abs(file_path)
+        signature = _stat_signature(path)
+        with self._lock:
+            cached = self._contents.get(path)
+            if cached and signature is not None and cached[0] == signature:
+                self._contents.move_to_end(path)
+                return dict(cached[1])
+
+        result = super().read_file(file_path)
+        if "error" in result or signature is None:
+            return result
+
+        with self._lock:
+            old = self._contents.pop(path, None)
+            if old:
+                self._cached_bytes -= old[1]["size"]
+            self._contents[path] = (signature, result)
+            self._cached_bytes += result["size"]
+            # Evict least recently read files over the byte budget
+            while self._cached_bytes > self.max_cached_bytes and len(self._contents) > 1:
+                _, (_, evicted) = self._contents.popitem(last=False)
+                self._cached_bytes -= evicted["size"]
+
+        return dict(result)
+
+
+class MCPServer:
+    """Handles MCP requests; each tool call runs in a worker thread."""
+
+    def __init__(self, config_path="config.json"):
+        self.file_ops = WarmFileOperations(config_path)
+        self.search = CodeSearch(self.file_ops)
+        self._client = None
+        self._client_lock = threading.Lock()
+        # The trigram index is shared state, so searches run one at a time
+        self._search_lock = threading.Lock()
+        self._results_lock = threading.Lock()
+        self._results: "OrderedDict[tuple, tuple]" = OrderedDict()  # (tool, arguments) -> (signature, result)
+        self._tree_checked = {}  # directory -> time its files were last stat'ed
+        self._tasks = {}  # request id -> asyncio.Task
+        self._write_lock = threading.Lock()
+        self._out = None
+
+    @property
+    def client(self) -> DeepSeekClient:
+        with self._client_lock:
+            if self._client is None:
+                config = self.file_ops.config
+                settings = config.get("cache", {})
+                cache = None
+                if settings.get("enabled", True):
+                    from response_cache import ResponseCache
+
+                    cache = ResponseCache.from_config(settings, self.file_ops.cache_dir)
+                self._client = DeepSeekClient(model=config.get("model", "deepseek-coder:1.3b"),
+                                              temperature=config.get("temperature", 0.7), cache=cache,
+                                              keep_alive=config.get("keep_alive"),
+                                              profiles=config.get("generation"))
+            return self._client
+
+    # Memoization ----------------------------------------------------------
+
+    def _memoized(self, key, signature, compute):
+        """Return the stored result for key if its signature still matches."""
+        with self._results_lock:
+            cached = self._results.get(key)
+            if cached and cached[0] == signature:
+                self._results.move_to_end(key)
+                return cached[1]
+
+        result = compute()
+        with self._results_lock:
+            self._results[key] = (signature, result)
+            self._results.move_to_end(key)
+            while len(self._results) > MAX_RESULTS:
+                self._results.popitem(last=False)
+        return result
+
+    def _tree_signature(self, directory: str):
+        """The manifest generation once the files under directory are checked.
+
+        Listing costs a stat per directory. The files themselves are
+        stat'ed (and changed ones re-hashed) at most once per listing_ttl
+        seconds per directory, so repeated calls in a burst stay cheap.
+        """
+        files_result = self.file_ops.list_files(directory)
+        if "error" in files_result:
+            return None
+        ttl = self.file_ops.config.get("listing_ttl", 2)
+        now = time.monotonic()
+        if now - self._tree_checked.get(directory, float("-inf")) >= ttl:
+            self.file_ops.changed_files(files_result["files"])
+            self._tree_checked[directory] = now
+        return self.file_ops.manifest.generation
+
+    # Tools ----------------------------------------------------------------
+
+    def _search_tool(self, name: str, arguments: Dict) -> Dict:
+        directory = arguments.get("directory", ".")
+
+        def compute():
+            with self._search_lock:
+                if name == "search_code":
+                    return self.search.search_code(
+                        arguments["query"], directory, arguments.get("case_sensitive", False)
+                    )
+                if name == "find_function":
+                    return self.search.find_function(arguments["function_name"], directory)
+                return self.search.find_class(arguments["class_name"], directory)
+
+        signature = self._tree_signature(directory)
+        if signature is None:
+            return compute()  # let the search report the error
+        key = (name, json.dumps(arguments, sort_keys=True))
+        return self._memoized(key, signature, compute)
+
+    def _model_tool(self, name: str, arguments: Dict) -> Dict:
+        file_path = arguments.get("file_path")
+        code = ""
+        if file_path:
+            result = self.file_ops.read_file(file_path)
+            if "error" in result:
+                return result
+            code = result["content"]
+
+        config = self.file_ops.config
+        budget = config.get("chunk_token_budget", 2000)
+        signature = self.file_ops.file_signature(file_path) if file_path else None
+
+        if name == "find_function_usage" and not file_path:
+            # Only the definitions and call sites, not whole files
+            with self._search_lock:
+                usage = self.search.usage_context(arguments["function_name"], token_budget=budget)
+            if "error" in usage:
+                return usage
+            code = usage["context"]
+            signature = self._tree_signature(".")
+
+        line_number = arguments.get("line_number")
+        excerpt = False
+        if name == "debug_code":
+            line_number = line_number or parse_error_line(arguments.get("error", ""), file_path)
+            if line_number and not arguments.get("full"):
+                focus = focus_context(code, file_path, line_number,
+                                      window=config.get("context_window_lines", 20), token_budget=budget)
+                if focus["focused"]:
+                    code, excerpt = focus["content"], True
+        chunked = {"token_budget": budget, "workers": config.get("chunk_workers", 2)}
+        large = estimate_tokens(code) > budget
+
+        def compute():
+            client = self.client
+            if name == "explain_code":
+                if large:
+                    return client.explain_code_chunked(code, file_path, **chunked)
+                return client.explain_code(code, file_path)
+            if name == "suggest_improvements":
+                if large:
+                    return client.suggest_improvements_chunked(code, file_path, **chunked)
+                return client.suggest_improvements(code, filename=file_path)
+            if name == "debug_code":
+                return client.debug_code(code, arguments.get("error", ""), line_number,
+                                         excerpt=excerpt, filename=file_path)
+            if name == "answer_question":
+                return client.answer_question(arguments["question"], code)
+            return client.find_function_usage(arguments["function_name"], code)
+
+        # Only deterministic answers are worth remembering
+        if config.get("temperature", 0.7) != 0:
+            return {"answer": compute()}
+
+        key = (name, json.dumps(arguments, sort_keys=True))
+        answer = self._memoized(key, signature, compute)
+        if answer.startswith(ERROR_PREFIX):
+            with self._results_lock:
+                self._results.pop(key, None)  # retry next time
+        return {"answer": answer}
+
+    def call_tool(self, name: str, arguments: Dict) -> Dict:
+        """Run a tool synchronously; returns the repo's usual result dict."""
+        if name == "read_file":
+            return self.file_ops.read_file(
+                arguments["file_path"], arguments.get("start_line"), arguments.get("end_line")
+            )
+        if name == "list_files":
+            return self.file_ops.list_files(arguments.get("directory", "."), arguments.get("recursive", True))
+        if name == "get_file_info":
+            return self.file_ops.get_file_info(arguments["file_path"])
+        if name == "fuzzy_find":
+            # The search keeps its own index up to date; no need to memoize
+            with self._search_lock:
+                return self.search.find(arguments["query"], arguments.get("limit", 20),
+                                        arguments.get("directory", "."))
+        if name in MODEL_TOOLS:
+            return self._model_tool(name, arguments)
+        return self._search_tool(name, arguments)
+
+    # JSON-RPC -------------------------------------------------------------
+
+    async def handle(self, message: Dict) -> Dict | None:
+        """Handle one request or notification; returns the response, if any."""
+        method = message.get("method")
+        params = message.get("params") or {}
+
+        if method == "initialize":
+            return {
+                "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": SERVER_INFO,
+            }
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": TOOLS}
+        if method == "tools/call":
+            name = params.get("name")
+            arguments = params.get("arguments") or {}
+            if name not in TOOL_NAMES:
+                raise _RPCError(INVALID_PARAMS, f"Unknown tool: {name}")
+            schema = next(tool["inputSchema"] for tool in TOOLS if tool["name"] == name)
+            missing = [arg for arg in schema["required"] if arg not in arguments]
+            if missing:
+                raise _RPCError(INVALID_PARAMS, f"Missing arguments for {name}: {', '.join(missing)}")
+
+            # File I/O and inference block, so keep them off the event loop
+            try:
+                result = await asyncio.to_thread(self.call_tool, name, arguments)
+            except Exception as e:
+                result = {"error": f"{name} failed: {str(e)}"}
+            if "error" in result:
+                return {"content": [{"type": "text", "text": result["error"]}], "isError": True}
+            text = result["answer"] if name in MODEL_TOOLS else json.dumps(result, indent=2)
+            return {"content": [{"type": "text", "text": text}], "isError": False}
+        if method == "notifications/cancelled":
+            task = self._tasks.get(params.get("requestId"))
+            if task:
+                task.cancel()
+            return None
+        if method and method.startswith("notifications/"):
+            return None
+
+        raise _RPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    def _write(self, message: Dict):
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._write_lock:
+            self._out.write(data)
+            self._out.flush()
+
+    async def _dispatch(self, message: Dict):
+        request_id = message.get("id")
+        try:
+            result = await self.handle(message)
+        except _RPCError as e:
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": str(e)}}
+        except asyncio.CancelledError:
+            return  # the client no longer wants an answer
+        else:
+            if request_id is None:
+                return  # notifications get no response
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        finally:
+            self._tasks.pop(request_id, None)
+
+        if request_id is not None:
+            self._write(response)
+
+    async def serve(self, stdin=None, stdout=None):
+        """Read requests from stdin until EOF, answering them concurrently."""
+        stdin = stdin or sys.stdin.buffer
+        self._out = stdout or sys.stdout.buffer
+        pending = set()
+
+        while True:
+            # A thread read works for pipes on every platform, unlike connect_read_pipe
+            line = await asyncio.to_thread(stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                message = json.loads(line)
+            except ValueError:
+                self._write({"jsonrpc": "2.0", "id": None,
+                             "error": {"code": PARSE_ERROR, "message": "Parse error"}})
+                continue
+            if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+                self._write({"jsonrpc": "2.0", "id": None,
+                             "error": {"code": INVALID_REQUEST, "message": "Invalid request"}})
+                continue
+
+            task = asyncio.create_task(self._dispatch(message))
+            if message.get("id") is not None:
+                self._tasks[message["id"]] = task
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self.search.close()
+
+
+class _RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def main():
+    out = sys.stdout.buffer
+    # stdout carries the protocol; anything printed (e.g. connection warnings) goes to stderr
+    sys.stdout = sys.stderr
+    server = MCPServer()
+    try:
+        asyncio.run(server.serve(sys.stdin.buffer, out))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
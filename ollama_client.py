@@ -1,161 +1,644 @@
-import ollama
 import json
 import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List
 
+from tools.chunker import estimate_tokens, split_code
+from tools.profiler import NULL_PROFILER, request_stats
 
-class DeepSeekClient:
-    def __init__(self, model: str = "deepseek-coder:1.3b"):
-        self.model = model
-        self._test_connection()
 
-    def _test_connection(self):
-        """Test if Ollama is running."""
-        try:
-            # This will fail if Ollama isn't running
-            ollama.list()
-        except Exception as e:
-            print("⚠️  Warning: Cannot connect to Ollama. Make sure Ollama is running.")
-            print(f"   Error: {str(e)}")
-            print("   Try running: ollama serve")
-            print()
-            # We don't exit here so the rest of the code can still be imported
+# Cache modes: "auto" caches deterministic (temperature 0) requests only,
+# "always" caches everything, "refresh" skips lookups but stores the new
+# answer, and "off" bypasses the cache entirely.
+CACHE_MODES = ("auto", "always", "refresh", "off")
 
-    def ask(self, prompt: str, context: str = "") -> str:
-        """Send a prompt to DeepSeek Coder via Ollama."""
-        try:
-            full_prompt = f"{context}\n\n{prompt}" if context else prompt
+# Answers starting with this are error reports, not model output
+ERROR_PREFIX = "❌ Error communicating with DeepSeek"
 
-            response = ollama.chat(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": full_prompt,
-                    }
-                ],
-                options={
-                    "temperature": 0.7,
-                },
-            )
+# Ends an answer that was cut off at its profile's deadline
+DEADLINE_NOTE = "\n\n⏱ Stopped at the {deadline:g}s deadline; this answer is incomplete."
 
-            return response["message"]["content"]
+# Generation settings that are sent to Ollama as request options
+OPTION_KEYS = ("temperature", "num_ctx", "num_predict")
 
-        except Exception as e:
-            return (
-                f"❌ Error communicating with DeepSeek: {str(e)}\n\n"
-                "Make sure Ollama is running (ollama serve) and the model is pulled."
-            )
 
-    def explain_code(self, code: str, filename: str = "") -> str:
-        """Explain what a piece of code does with improved prompting."""
-        prompt = f"""
-You are a code analysis assistant.
-You CAN see the full code provided. Never say you lack access.
+# Sent as the system message of every request. It never changes, so
+# together with the file context that follows it forms a prompt prefix
+# Ollama can keep cached (with keep_alive) across commands and chat turns.
+SYSTEM_PROMPT = """You are DeepSeek Coder, a local coding assistant.
+You CAN see any code provided in the conversation. Never say you lack access.
+Be specific and refer to concrete parts of the code where possible."""
 
-File Name: {filename or 'unknown file'}
+
+def code_block(code: str, filename: str = "", note: str = "") -> str:
+    """File context in the fixed layout all prompts share.
+
+    Prompts start with this block and put their instructions after it, so
+    different questions about one file share the same prompt prefix.
+    """
+    header = f"File Name: {filename or 'unknown file'}"
+    if note:
+        header += f"\n{note}"
+    return f"""{header}
 
 ====== CODE START ======
 {code}
-====== CODE END ======
+====== CODE END ======"""
+
+
+def explain_prompt(code: str, filename: str = "") -> str:
+    """Prompt asking for an explanation of a piece of code."""
+    prompt = f"""{code_block(code, filename)}
 
 Now explain clearly:
 1. What this code does overall
 2. What each important function does
 3. Any important logic or patterns
 4. Any potential bugs or edge cases
-        """
+"""
 
-        return self.ask(prompt)
+    return prompt
 
-    def debug_code(self, code: str, error: str = "", line_number: int | None = None) -> str:
-        """Help debug a piece of code."""
-        location = f"Line {line_number}" if line_number else "Unknown location"
 
-        prompt = f"""
-You are a debugging assistant.
-You CAN see the full code provided below.
+def debug_prompt(code: str, error: str = "", line_number: int | None = None,
+                 excerpt: bool = False, filename: str = "") -> str:
+    """Prompt asking to debug a piece of code (or a numbered excerpt of it)."""
+    location = f"Line {line_number}" if line_number else "Unknown location"
+    note = (
+        "Excerpt: the file's imports and the code around the error, with line numbers.\n"
+        "The error line is marked with >>." if excerpt else ""
+    )
+
+    prompt = f"""{code_block(code, filename, note)}
+
+You are debugging the code above.
 
 Error message: {error or 'General debugging requested'}
 Location: {location}
 
-====== CODE START ======
-{code}
-====== CODE END ======
-
 Analyze the code and error and provide:
 1. What is likely wrong
 2. Why it happens
 3. How to fix it (specific explanation)
 4. A corrected code snippet or patch
-        """
+"""
 
-        return self.ask(prompt)
+    return prompt
 
-    def suggest_improvements(self, code: str) -> str:
-        """Suggest improvements for a piece of code."""
-        prompt = f"""
-You are a senior software engineer reviewing this code.
 
-====== CODE START ======
-{code}
-====== CODE END ======
+def improve_prompt(code: str, filename: str = "", excerpt: bool = False) -> str:
+    """Prompt asking for a code review (of a whole file, or of changed-line excerpts)."""
+    note = (
+        "Excerpts: the changed lines and the functions around them, with line numbers.\n"
+        "Changed lines are marked with >>. Review the changes, not the unchanged code." if excerpt else ""
+    )
 
-Review it and suggest improvements focusing on:
+    prompt = f"""{code_block(code, filename, note)}
+
+Review the code above as a senior software engineer and suggest improvements focusing on:
 1. Code quality and readability
 2. Performance optimizations
 3. Best practices and style
 4. Potential bugs or edge cases
 5. Security concerns (if any)
+"""
 
-Be specific and refer to concrete parts of the code where possible.
-        """
+    return prompt
 
-        return self.ask(prompt)
 
-    def answer_question(self, question: str, code_context: str = "") -> str:
-        """Answer general coding questions with optional code context."""
-        if code_context:
-            prompt = f"""
-You are a coding assistant. Use the code context below to answer the question.
-
-====== CODE CONTEXT START ======
+def question_prompt(question: str, code_context: str = "") -> str:
+    """Prompt for a general question with optional code context."""
+    if code_context:
+        prompt = f"""====== CODE CONTEXT START ======
 {code_context}
 ====== CODE CONTEXT END ======
 
+Use the code context above to answer the question.
+
 Question: {question}
 
 Give a clear, specific answer that references the code where helpful.
-            """
-        else:
-            prompt = f"""
-You are a coding assistant.
-
-Question: {question}
+"""
+    else:
+        prompt = f"""Question: {question}
 
 Give a clear, helpful answer with examples if relevant.
-            """
-
-        return self.ask(prompt)
+"""
 
-    def find_function_usage(self, function_name: str, code: str) -> str:
-        """Explain how a function is used in given code."""
-        prompt = f"""
-You are analyzing usage of a function in code.
+    return prompt
 
-Function name: {function_name}
 
-====== CODE START ======
-{code}
-====== CODE END ======
+def usage_prompt(function_name: str, code: str) -> str:
+    """Prompt asking how a function is used in some code."""
+    prompt = f"""{code_block(code)}
 
-Explain:
+Analyze how the function `{function_name}` is used in the code above. Explain:
 1. What this function does
 2. Its parameters and return value
 3. Where and how it is used in the code
 4. Any important implementation details or caveats
+"""
+
+    return prompt
+
+
+def summary_prompt(summary: str, turns: List[Dict]) -> str:
+    """Prompt folding older chat turns into the running conversation summary."""
+    transcript = "\n\n".join(f"{turn['role'].upper()}: {turn['content']}" for turn in turns)
+    prompt = f"""====== EARLIER SUMMARY ======
+{summary or '(none)'}
+
+====== MORE CONVERSATION ======
+{transcript}
+
+Update the summary so it covers everything above: the questions asked, the
+answers given and any facts, decisions or code changes worth remembering.
+Keep it under 200 words.
+"""
+
+    return prompt
+
+
+EXPLAIN_MAP_TASK = """Summarize what this part of the file does: its functions and classes,
+their purpose, important logic, and any potential bugs. Be concise."""
+
+EXPLAIN_REDUCE_TASK = """Using these summaries of consecutive parts of one file, explain clearly:
+1. What this code does overall
+2. What each important function does
+3. Any important logic or patterns
+4. Any potential bugs or edge cases"""
+
+IMPROVE_MAP_TASK = """Review this part of the file as a senior software engineer. List concrete
+improvements (quality, performance, best practices, bugs, security), naming
+the functions or lines they apply to. Be concise."""
+
+IMPROVE_REDUCE_TASK = """Using these reviews of consecutive parts of one file, suggest improvements
+focusing on:
+1. Code quality and readability
+2. Performance optimizations
+3. Best practices and style
+4. Potential bugs or edge cases
+5. Security concerns (if any)
+
+Merge duplicates and be specific about which parts of the code they refer to."""
+
+
+def generation_settings(profiles: Dict | None, task: str, prompt_tokens: int,
+                        model: str, temperature: float) -> Dict:
+    """Model, options and deadline for one request.
+
+    ``profiles`` is the "generation" config section. Its "default" entry
+    applies to every task and the task's own entry (explain, debug,
+    improve, ask, usage, chat) overrides it. Either may list "routes":
+    the first route whose min_prompt_tokens..max_prompt_tokens range
+    holds the prompt overrides the settings again, e.g. to send long
+    prompts to a larger context or model.
+    """
+    settings = {"model": model, "temperature": temperature, "num_ctx": None,
+                "num_predict": None, "deadline": None}
+    profiles = profiles or {}
+
+    routes = []
+    for name in ("default", task):
+        profile = profiles.get(name) or {}
+        settings.update({key: value for key, value in profile.items() if key != "routes"})
+        routes = profile.get("routes", routes)
+
+    for route in routes:
+        if route.get("min_prompt_tokens", 0) <= prompt_tokens <= route.get("max_prompt_tokens", prompt_tokens):
+            settings.update({key: value for key, value in route.items() if not key.endswith("_prompt_tokens")})
+            break
+
+    return settings
+
+
+def chunk_cache_mode(cache_mode: str) -> str:
+    """Chunk summaries are always worth caching, even at temperature > 0."""
+    return cache_mode if cache_mode in ("off", "refresh") else "always"
+
+
+def chunk_prompt(filename: str, text: str, task: str) -> str:
+    """Map-step prompt for one chunk of a larger file."""
+    prompt = f"""{code_block(text, filename, "This is one part of a larger file.")}
+
+{task}
+"""
+
+    return prompt
+
+
+def summary_sections(chunks: List[Dict], summaries: List[str]) -> List[str]:
+    """Label each chunk summary with the lines it covers."""
+    return [
+        f"--- Lines {chunk['start']}-{chunk['end']} ---\n{summary.strip()}"
+        for chunk, summary in zip(chunks, summaries)
+    ]
+
+
+def group_sections(sections: List[str], token_budget: int) -> List[List[str]] | None:
+    """Group summaries that must be combined to fit one prompt.
+
+    Returns None once the summaries fit (or cannot be merged any further).
+    """
+    if len(sections) <= 1 or estimate_tokens("\n".join(sections)) <= token_budget:
+        return None
+
+    groups = []
+    current = []
+    for section in sections:
+        if current and estimate_tokens("\n".join(current + [section])) > token_budget:
+            groups.append(current)
+            current = []
+        current.append(section)
+    groups.append(current)
+
+    if len(groups) == len(sections):
+        return None  # every summary is already over budget on its own
+    return groups
+
+
+def combine_prompt(group: List[str]) -> str:
+    """Prompt merging several chunk summaries into one."""
+    prompt = f"""
+Combine these summaries of consecutive parts of a file into one concise summary,
+keeping the line ranges of anything important.
+
+{chr(10).join(group)}
+    """
+
+    return prompt
+
+
+def reduce_prompt(filename: str, sections: List[str], task: str) -> str:
+    """Reduce-step prompt over all chunk summaries of a file."""
+    prompt = f"""File Name: {filename or 'unknown file'}
+
+====== SUMMARIES START ======
+{chr(10).join(sections)}
+====== SUMMARIES END ======
+
+{task}
+"""
+
+    return prompt
+
+
+class CachePolicy:
+    """Generation-profile and response-cache policy shared by the sync and
+    async clients.
+
+    Subclasses provide ``model``, ``temperature``, ``profiles``, ``cache``
+    and ``cache_mode``.
+    """
+
+    def _settings(self, messages: List[Dict], task: str) -> Dict:
+        """Generation settings for a request, routed on its size."""
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        return generation_settings(self.profiles, task, prompt_tokens, self.model, self.temperature)
+
+    @staticmethod
+    def _options(settings: Dict) -> dict:
+        return {key: settings[key] for key in OPTION_KEYS if settings.get(key) is not None}
+
+    def _cache_key(self, messages: List[Dict], options: dict, cache_mode: str | None,
+                   model: str | None = None):
+        """Return the cache key for a request, or None if it must not be cached."""
+        mode = cache_mode or self.cache_mode
+        if self.cache is None or mode == "off":
+            return None
+        if mode == "auto" and options.get("temperature") != 0:
+            return None
+        # The whole conversation decides the answer, not just the last message
+        conversation = "\n\n".join(f"[{m['role']}]\n{m['content']}" for m in messages)
+        return self.cache.make_key(model or self.model, conversation, options)
+
+    @staticmethod
+    def _messages(prompt: str, context: str = "") -> List[Dict]:
+        """System instructions first, then the (context and) prompt."""
+        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": full_prompt},
+        ]
+
+
+class DeepSeekClient(CachePolicy):
+    def __init__(self, model: str = "deepseek-coder:1.3b", temperature: float = 0.7,
+                 cache=None, cache_mode: str = "auto", keep_alive: str | None = None,
+                 profiles: Dict | None = None):
+        self.model = model
+        self.temperature = temperature
+        # Per-task generation profiles (the "generation" config section)
+        self.profiles = profiles or {}
+        # cache is an optional ResponseCache
+        self.cache = cache
+        self.cache_mode = cache_mode
+        # How long Ollama keeps the model (and its prompt cache) loaded
+        # after a request; None uses the server default
+        self.keep_alive = keep_alive
+        # Timing/token stats of the last streamed request
+        self.last_stats = {}
+        # Collects prompt-building time and every request's Ollama stats
+        self.profiler = NULL_PROFILER
+        # Ollama clients whose reads time out at a deadline, by deadline
+        self._timed_clients = {}
+        # Check the server in the background instead of blocking start-up
+        threading.Thread(target=self._test_connection, daemon=True).start()
+
+    def _test_connection(self):
+        """Test if Ollama is running."""
+        try:
+            import ollama
+
+            # This will fail if Ollama isn't running
+            ollama.list()
+        except Exception as e:
+            print("⚠️  Warning: Cannot connect to Ollama. Make sure Ollama is running.")
+            print(f"   Error: {str(e)}")
+            print("   Try running: ollama serve")
+            print()
+            # We don't exit here so the rest of the code can still be imported
+
+    def ping_model(self, keep_alive: str | None = "10m", task: str = "default") -> bool:
+        """Load the task's model if needed and ask Ollama to keep it resident."""
+        try:
+            import ollama
+
+            settings = generation_settings(self.profiles, task, 0, self.model, self.temperature)
+            # An empty prompt only loads the model; nothing is generated. The
+            # options matter: a different num_ctx would make Ollama reload it.
+            ollama.generate(model=settings["model"], prompt="", keep_alive=keep_alive,
+                            options=self._options(settings))
+            return True
+        except Exception:
+            return False
+
+    def preload(self, task: str = "default") -> threading.Thread:
+        """Start loading the task's model in the background.
+
+        Called before a command reads its files, so model loading overlaps
+        with that work. Routes depend on the prompt, which isn't known yet,
+        so this loads the profile's own model.
+        """
+        thread = threading.Thread(target=self.ping_model, args=(self.keep_alive, task), daemon=True)
+        thread.start()
+        return thread
+
+    def _prepare(self, messages: List[Dict], cache_mode: str | None, task: str):
+        """Pick the generation settings and look the request up in the cache.
+
+        Returns (settings, options, cache_key, cached_answer).
         """
+        settings = self._settings(messages, task)
+        options = self._options(settings)
+
+        key = self._cache_key(messages, options, cache_mode, settings["model"])
+        cached = None
+        if key and (cache_mode or self.cache_mode) != "refresh":
+            cached = self.cache.get(key)
+
+        return settings, options, key, cached
+
+    def _session(self, deadline: float | None):
+        """The ollama module, or a client whose reads give up at the deadline."""
+        import ollama
+
+        if not deadline:
+            return ollama
+        client = self._timed_clients.get(deadline)
+        if client is None:
+            client = self._timed_clients[deadline] = ollama.Client(timeout=deadline)
+        return client
+
+    def ask(self, prompt: str, context: str = "", cache_mode: str | None = None,
+            task: str = "default") -> str:
+        """Send a prompt to DeepSeek Coder via Ollama."""
+        return self.chat(self._messages(prompt, context), cache_mode, task)
+
+    def ask_stream(self, prompt: str, context: str = "", cache_mode: str | None = None,
+                   task: str = "default") -> Iterator[str]:
+        """Stream the answer to a prompt chunk by chunk."""
+        return self.chat_stream(self._messages(prompt, context), cache_mode, task)
+
+    def chat(self, messages: List[Dict], cache_mode: str | None = None, task: str = "default") -> str:
+        """Send a whole conversation (system, user and assistant messages)."""
+        if self._settings(messages, task)["deadline"]:
+            # Only a stream can be stopped part-way with what it has so far
+            return "".join(self.chat_stream(messages, cache_mode, task))
+
+        start = time.perf_counter()
+        try:
+            settings, options, key, cached = self._prepare(messages, cache_mode, task)
+            if cached is not None:
+                self.profiler.add_request(request_stats(None, time.perf_counter() - start, cached=True))
+                return cached
+
+            with self.profiler.phase("import"):
+                import ollama
+            start = time.perf_counter()  # import time isn't latency
+
+            response = ollama.chat(
+                model=settings["model"],
+                messages=messages,
+                options=options,
+                keep_alive=self.keep_alive,
+            )
+            self.profiler.add_request(request_stats(response, time.perf_counter() - start,
+                                                    model=settings["model"]))
 
-        return self.ask(prompt)
+            answer = response["message"]["content"]
+            if key:
+                self.cache.put(key, answer)
+            return answer
+
+        except Exception as e:
+            self.profiler.add_request(request_stats(None, time.perf_counter() - start, error=True))
+            return self._error_message(e)
+
+    def chat_stream(self, messages: List[Dict], cache_mode: str | None = None,
+                    task: str = "default") -> Iterator[str]:
+        """Stream the answer to a conversation chunk by chunk.
+
+        When the generator finishes (or is closed early, e.g. on Ctrl-C),
+        ``last_stats`` holds time-to-first-token, token count and tokens/sec.
+        If the profile's deadline passes first, generation is cancelled and
+        the answer so far ends with DEADLINE_NOTE; it is not cached.
+        """
+        start = time.perf_counter()
+        stats = {"cached": False, "cancelled": False, "truncated": False, "ttft": None, "tokens": 0}
+        self.last_stats = stats
+
+        try:
+            settings, options, key, cached = self._prepare(messages, cache_mode, task)
+        except Exception as e:
+            yield self._error_message(e)
+            return
+
+        if cached is not None:
+            stats.update(cached=True, ttft=time.perf_counter() - start,
+                         elapsed=time.perf_counter() - start)
+            self.profiler.add_request(request_stats(None, stats["elapsed"], cached=True))
+            yield cached
+            return
+
+        deadline = settings["deadline"]
+        with self.profiler.phase("import"):
+            session = self._session(deadline)
+        start = time.perf_counter()  # import time isn't latency
+
+        parts = []
+        final = {}
+        stream = None
+        finished = False
+        failed = False
+        try:
+            stream = session.chat(
+                model=settings["model"],
+                messages=messages,
+                options=options,
+                keep_alive=self.keep_alive,
+                stream=True,
+            )
+
+            for chunk in stream:
+                text = chunk.get("message", {}).get("content", "")
+                if chunk.get("done"):
+                    final = chunk
+                if text:
+                    if stats["ttft"] is None:
+                        stats["ttft"] = time.perf_counter() - start
+                    stats["tokens"] += 1
+                    parts.append(text)
+                    yield text
+                if deadline and not chunk.get("done") and time.perf_counter() - start > deadline:
+                    stats["truncated"] = True
+                    break
+
+            finished = not stats["truncated"]
+            if finished and key:
+                self.cache.put(key, "".join(parts))
+
+        except Exception as e:
+            # A read that timed out at the deadline is a cut-off answer, not a failure
+            if deadline and time.perf_counter() - start >= deadline:
+                stats["truncated"] = True
+            else:
+                failed = True
+                yield self._error_message(e)
+
+        finally:
+            # Closing the stream drops the connection, which makes Ollama stop
+            # generating when we are cancelled part-way through.
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+
+            elapsed = time.perf_counter() - start
+            stats["elapsed"] = elapsed
+            stats["cancelled"] = not finished and not stats["truncated"] and not failed
+
+            if final.get("prompt_eval_count") is not None:
+                # Prompt tokens Ollama actually evaluated (a cached prefix is skipped)
+                stats["prompt_tokens"] = final["prompt_eval_count"]
+            if final.get("eval_count"):
+                stats["tokens"] = final["eval_count"]
+            if final.get("eval_duration"):
+                stats["tokens_per_sec"] = final["eval_count"] / (final["eval_duration"] / 1e9)
+            elif stats["ttft"] is not None and elapsed > stats["ttft"]:
+                stats["tokens_per_sec"] = stats["tokens"] / (elapsed - stats["ttft"])
+
+            self.profiler.add_request(request_stats(final, elapsed, error=failed, model=settings["model"],
+                                                    truncated=stats["truncated"]))
+
+        if stats["truncated"]:
+            yield DEADLINE_NOTE.format(deadline=deadline)
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        return (
+            f"{ERROR_PREFIX}: {str(error)}\n\n"
+            "Make sure Ollama is running (ollama serve) and the model is pulled."
+        )
+
+    def _send(self, build: Callable[..., str], args: tuple, stream: bool, task: str):
+        """Build a prompt with build(*args) and send it with the task's profile."""
+        with self.profiler.phase("prompt"):
+            prompt = build(*args)
+        return self.ask_stream(prompt, task=task) if stream else self.ask(prompt, task=task)
+
+    def explain_code(self, code: str, filename: str = "", stream: bool = False):
+        """Explain what a piece of code does with improved prompting."""
+        return self._send(explain_prompt, (code, filename), stream, "explain")
+
+    def debug_code(self, code: str, error: str = "", line_number: int | None = None,
+                   stream: bool = False, excerpt: bool = False, filename: str = ""):
+        """Help debug a piece of code; excerpt marks code from focus_context."""
+        return self._send(debug_prompt, (code, error, line_number, excerpt, filename), stream, "debug")
+
+    def suggest_improvements(self, code: str, stream: bool = False, filename: str = "",
+                             excerpt: bool = False):
+        """Suggest improvements for a piece of code; excerpt marks code from diff_excerpt."""
+        return self._send(improve_prompt, (code, filename, excerpt), stream, "improve")
+
+    def explain_code_chunked(self, code: str, filename: str = "", token_budget: int = 2000,
+                             workers: int = 2, stream: bool = False,
+                             progress: Callable[[int, int], None] | None = None):
+        """Explain a file too large for one prompt by map-reducing its chunks."""
+        return self._map_reduce(code, filename, EXPLAIN_MAP_TASK, EXPLAIN_REDUCE_TASK,
+                                token_budget, workers, stream, progress, "explain")
+
+    def suggest_improvements_chunked(self, code: str, filename: str = "", token_budget: int = 2000,
+                                     workers: int = 2, stream: bool = False,
+                                     progress: Callable[[int, int], None] | None = None):
+        """Review a file too large for one prompt by map-reducing its chunks."""
+        return self._map_reduce(code, filename, IMPROVE_MAP_TASK, IMPROVE_REDUCE_TASK,
+                                token_budget, workers, stream, progress, "improve")
+
+    def _map_reduce(self, code: str, filename: str, map_task: str, reduce_task: str,
+                    token_budget: int, workers: int, stream: bool,
+                    progress: Callable[[int, int], None] | None, task: str):
+        """Run map_task over each chunk concurrently, then reduce the results.
+
+        Chunk prompts don't mention line numbers, so an unchanged chunk always
+        produces the same prompt and its summary comes from the cache.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        chunks = split_code(code, filename, token_budget)
+        cache_mode = chunk_cache_mode(self.cache_mode)
+
+        summaries = [None] * len(chunks)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [
+                executor.submit(self.ask, chunk_prompt(filename, chunk["text"], map_task),
+                                cache_mode=cache_mode, task=task)
+                for chunk in chunks
+            ]
+            for i, future in enumerate(futures):
+                summaries[i] = future.result()
+                if progress:
+                    progress(i + 1, len(chunks))
+
+        sections = summary_sections(chunks, summaries)
+        while True:
+            groups = group_sections(sections, token_budget)
+            if groups is None:
+                break
+            sections = [
+                group[0] if len(group) == 1
+                else self.ask(combine_prompt(group), cache_mode=cache_mode, task=task)
+                for group in groups
+            ]
+
+        return self._send(reduce_prompt, (filename, sections, reduce_task), stream, task)
+
+    def answer_question(self, question: str, code_context: str = "", stream: bool = False):
+        """Answer general coding questions with optional code context."""
+        return self._send(question_prompt, (question, code_context), stream, "ask")
+
+    def find_function_usage(self, function_name: str, code: str, stream: bool = False):
+        """Explain how a function is used in given code."""
+        return self._send(usage_prompt, (function_name, code), stream, "usage")
 
 
 # Simple test when running this file directly
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class ResponseCache:
+    """Persistent, size-bounded cache of model responses.
+
+    Entries are keyed by a hash of (model, full prompt, options) and stored in
+    a small SQLite database. Least recently used entries are evicted once the
+    entry or byte limits are exceeded, and entries older than the TTL are
+    treated as misses.
+    """
+
+    def __init__(self, path, max_entries: int = 1000, max_bytes: int = 100 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings: dict, cache_dir) -> Optional["ResponseCache"]:
+        """Build the cache described by the "cache" config section, or None if disabled."""
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            Path(cache_dir) / "responses.sqlite3",
+            max_entries=settings.get("max_entries", 1000),
+            max_bytes=int(settings.get("max_mb", 100) * 1024 * 1024),
+            ttl_seconds=settings.get("ttl_hours", 168) * 3600,
+        )
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: dict) -> str:
+        payload = json.dumps([model, prompt, options], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    return None
+
+                now = time.time()
+                if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                conn.commit()
+                return row[0]
+
+        except sqlite3.Error:
+            return None
+
+    def put(self, key: str, response: str):
+        """Store a response and evict old entries if the cache is over budget."""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, created, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+
+        except sqlite3.Error:
+            pass  # caching is best-effort
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+
+        # Keep the most recently used entries that fit in both limits
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key,"
+            "   ROW_NUMBER() OVER (ORDER BY last_used DESC) AS n,"
+            "   SUM(size) OVER (ORDER BY last_used DESC) AS total"
+            "  FROM responses)"
+            " WHERE n > ? OR total > ?)",
+            (self.max_entries, self.max_bytes),
+        )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+
+# Simple test when running directly
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(Path(tmp) / "responses.sqlite3", max_entries=2)
+        keys = [ResponseCache.make_key("m", f"prompt {i}", {}) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, f"answer {i}")
+            time.sleep(0.01)
+
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) == "answer 2"
+        print("✓ Response cache works")
@@ -0,0 +1,32 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules live at the project root (cli.py imports "tools.*" directly)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A project root with a config.json; returns a function that writes files."""
+    config = {
+        "project_root": str(tmp_path),
+        "excluded_dirs": ["node_modules", ".git", "__pycache__", ".ai_assistant"],
+        "allowed_extensions": [".py", ".js", ".ts", ".md"],
+    }
+    (tmp_path / "config.json").write_text(json.dumps(config), encoding="utf-8")
+
+    def write(path, content=""):
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            target.write_bytes(content)
+        else:
+            target.write_text(content, encoding="utf-8")
+        return target
+
+    write.root = tmp_path
+    write.config = str(tmp_path / "config.json")
+    return write
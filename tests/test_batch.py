@@ -0,0 +1,80 @@
+import asyncio
+
+from batch import BatchRunner
+from ollama_client import DEADLINE_NOTE
+from tools.file_ops import FileOperations
+from tools.manifest import content_hash
+
+
+class RecordingClient:
+    """Stands in for AsyncDeepSeekClient; answers with the first line sent."""
+
+    def __init__(self, max_concurrency=2, answer=None):
+        self.max_concurrency = max_concurrency
+        self.answer = answer
+        self.sent = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def explain_code(self, code, filename=""):
+        self.sent.append((filename, code))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.answer(filename, code) if self.answer else code.splitlines()[0]
+
+    explain_code_chunked = explain_code
+
+
+def run(project, client):
+    runner = BatchRunner(FileOperations(project.config), client, "explain", ".")
+    return asyncio.run(runner.run())
+
+
+def test_resume_skips_finished_files(project):
+    for i in range(5):
+        project(f"m{i}.py", f"# module {i}\n")
+    client = RecordingClient()
+    result = run(project, client)
+    assert (result["processed"], result["skipped"]) == (5, 0)
+    assert client.peak <= 2
+    assert [record["result"] for record in result["records"]] == [f"# module {i}" for i in range(5)]
+
+    project("m3.py", "# module 3, edited\n")
+    client = RecordingClient()
+    result = run(project, client)
+    assert (result["processed"], result["skipped"]) == (1, 4)
+    assert [name for name, _ in client.sent] == ["m3.py"]
+
+
+def test_checkpoint_hash_is_of_the_content_sent(project):
+    target = project("a.py", "# first\n")
+
+    def edit_while_running(filename, code):
+        target.write_text("# second, longer\n")
+        return "ok"
+
+    result = run(project, RecordingClient(answer=edit_while_running))
+    assert result["records"][0]["hash"] != content_hash(str(target))
+
+    # The edited file is sent again on the next run
+    client = RecordingClient()
+    assert run(project, client)["processed"] == 1
+    assert client.sent == [("a.py", "# second, longer\n")]
+
+
+def test_cut_off_answers_are_retried(project):
+    project("slow.py", "# slow\n")
+    project("fast.py", "# fast\n")
+
+    def answer(filename, code):
+        return "partial" + DEADLINE_NOTE.format(deadline=30) if filename == "slow.py" else "done"
+
+    result = run(project, RecordingClient(answer=answer))
+    failed = {record["file"] for record in result["records"] if record.get("failed")}
+    assert failed == {"slow.py"}
+
+    client = RecordingClient()
+    assert run(project, client)["processed"] == 1
+    assert [name for name, _ in client.sent] == ["slow.py"]
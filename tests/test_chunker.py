@@ -0,0 +1,58 @@
+from tools.chunker import estimate_tokens, split_code, split_segments
+
+
+PYTHON = '''import os
+
+
+@decorator
+def first():
+    return 1
+
+
+class Thing:
+    """Doc."""
+
+    def method(self):
+        return 2
+'''
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 40) == 11
+
+
+def test_python_segments_follow_definitions():
+    starts = [segment["start"] for segment in split_segments(PYTHON, "a.py")]
+    assert starts == [1, 4, 9, 12]
+
+
+def test_generic_segments_and_broken_python():
+    js = "const a = 1;\nfunction f() {\n  return a;\n}\nexport class C {}\n"
+    assert [s["start"] for s in split_segments(js, "a.js")] == [1, 2, 5]
+    assert [s["start"] for s in split_segments("def f(:\n  pass\ndef g(): pass\n", "a.py")] == [1, 3]
+
+
+def test_chunks_cover_the_code_within_budget():
+    code = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(200))
+    chunks = split_code(code, "a.py", token_budget=50)
+    assert "".join(chunk["text"] for chunk in chunks) == code
+    assert chunks[0]["start"] == 1 and chunks[-1]["end"] == 600
+    for before, after in zip(chunks, chunks[1:]):
+        assert after["start"] == before["end"] + 1
+    assert all(estimate_tokens(chunk["text"]) <= 50 + 10 for chunk in chunks)
+
+
+def test_oversized_definitions_are_cut_by_lines():
+    code = "def big():\n" + "".join(f"    x{i} = {i}\n" for i in range(100))
+    chunks = split_code(code, "a.py", token_budget=20)
+    assert len(chunks) > 1
+    assert "".join(chunk["text"] for chunk in chunks) == code
+
+
+def test_boundaries_are_stable_under_edits_above():
+    code = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(200))
+    edited = "import os\n" + code
+    before = {chunk["text"] for chunk in split_code(code, "a.py", token_budget=200)}
+    after = {chunk["text"] for chunk in split_code(edited, "a.py", token_budget=200)}
+    assert len(before & after) >= len(before) - 2
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from cli import AIDevCLI
+
+
+@pytest.fixture
+def cli(project, monkeypatch):
+    monkeypatch.chdir(project.root)
+    app = AIDevCLI()
+    app.file_ops.cache_dir.mkdir(parents=True, exist_ok=True)
+    picks = [{"file": "a.py"}, {"file": "b.py", "name": "beta"}]
+    (app.file_ops.cache_dir / "last_find.json").write_text(json.dumps(picks), encoding="utf-8")
+    return app
+
+
+def test_picks_replace_file_and_name_arguments(cli):
+    assert cli._resolve_picks("explain", ["@1"], {}) == ["a.py"]
+    assert cli._resolve_picks("debug", ["@2", "@1 failed"], {}) == ["b.py", "@1 failed"]
+    assert cli._resolve_picks("ask", ["what is @1?", "@2"], {}) == ["what is @1?", "b.py"]
+    assert cli._resolve_picks("function", ["@2"], {}) == ["beta"]
+    assert cli._resolve_picks("usage", ["@1"], {}) == ["a.py"]
+
+
+def test_queries_and_revisions_stay_literal(cli):
+    assert cli._resolve_picks("search", ["@1"], {}) == ["@1"]
+    assert cli._resolve_picks("find", ["@2"], {}) == ["@2"]
+    assert cli._resolve_picks("improve", ["@1"], {"diff": True}) == ["@1"]
+
+
+def test_out_of_range_pick_is_an_error(cli, capsys):
+    assert cli._resolve_picks("explain", ["@3"], {}) is None
+    assert "the last find had 2 results" in capsys.readouterr().out
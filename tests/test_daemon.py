@@ -0,0 +1,54 @@
+import json
+import socket
+import threading
+
+import pytest
+
+import daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+class EchoCLI:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, argv):
+        self.calls.append(argv)
+        print("ran", " ".join(argv[1:]))
+
+
+def test_socket_path(project):
+    config = json.loads((project.root / "config.json").read_text())
+    config["cache_dir"] = "cache"
+    project("config.json", json.dumps(config))
+    assert daemon.socket_path(project.config) == project.root / "cache" / "daemon.sock"
+    assert daemon.socket_path(str(project.root / "missing.json")) is None
+
+
+def test_commands_are_forwarded(tmp_path, capsys):
+    path = tmp_path / "d.sock"
+    cli = EchoCLI()
+    server = daemon.CommandServer(path, cli)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert daemon.forward_available(path)
+        assert daemon.forward(path, ["search", "néedle"])
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert cli.calls == [["cli.py", "search", "néedle"]]
+    assert capsys.readouterr().out == "ran search néedle\n"
+
+
+def test_no_daemon_runs_locally(tmp_path):
+    path = tmp_path / "d.sock"
+    assert not daemon.forward(path, ["list"])
+    # A socket file left behind by a daemon that crashed
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    assert path.exists()
+    assert not daemon.forward_available(path)
+    assert not daemon.forward(path, ["list"])
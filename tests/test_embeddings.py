@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from tools.embeddings import EmbeddingIndex, HashEmbedder
+from tools.file_ops import FileOperations
+
+
+def make_index(project):
+    return EmbeddingIndex(FileOperations(project.config), HashEmbedder())
+
+
+def indexed_files(index):
+    return sorted({chunk["file"] for chunk in index.chunks})
+
+
+def test_update_and_search_round_trip(project):
+    project("billing.py", "def charge_invoice(invoice):\n    return invoice.total\n")
+    project("mailer.py", "def send_welcome_email(user):\n    return user.email\n")
+    index = make_index(project)
+
+    result = index.update()
+    assert result["files_indexed"] == 2
+    assert indexed_files(index) == ["billing.py", "mailer.py"]
+    assert index.search("charge invoice", top_k=1)[0]["file"] == "billing.py"
+
+    # A fresh index loads the saved vectors and finds the same chunk
+    hits = make_index(project).search("send welcome email", top_k=1)
+    assert hits[0]["file"] == "mailer.py"
+    assert "send_welcome_email" in hits[0]["text"]
+
+    # Nothing changed: nothing is embedded again
+    assert index.update()["files_indexed"] == 0
+
+
+def test_changed_and_removed_files(project):
+    project("billing.py", "def charge_invoice(invoice):\n    return invoice.total\n")
+    mailer = project("mailer.py", "def send_welcome_email(user):\n    return user.email\n")
+    index = make_index(project)
+    index.update()
+
+    project("billing.py", "def refund_payment(payment):\n    return payment.amount\n")
+    mailer.unlink()
+    result = index.update()
+    assert result == {"files_indexed": 1, "files_removed": 1, "chunks_embedded": 1, "total_chunks": 1}
+    assert indexed_files(index) == ["billing.py"]
+    assert set(index.files) == {"billing.py"}
+    assert "refund_payment" in index.search("refund payment", top_k=1)[0]["text"]
+
+
+def test_unreadable_files_are_retried(project, monkeypatch):
+    project("billing.py", "def charge_invoice(invoice):\n    return invoice.total\n")
+    index = make_index(project)
+    read_file = index.file_ops.read_file
+    monkeypatch.setattr(index.file_ops, "read_file", lambda path: {"error": "busy"})
+
+    assert index.update()["files_indexed"] == 0
+    assert index.files == {}
+
+    monkeypatch.setattr(index.file_ops, "read_file", read_file)
+    assert index.update()["files_indexed"] == 1
+    assert indexed_files(index) == ["billing.py"]
@@ -0,0 +1,34 @@
+from tools.focus import _same_file, focus_context, parse_error_line
+
+
+def test_same_file_compares_whole_components():
+    assert _same_file("/srv/app/tools/x.py", "tools/x.py")
+    assert _same_file("tools/x.py", "/srv/app/tools/x.py")
+    assert _same_file("./tools/x.py", "tools/x.py")
+    assert _same_file("tools\\x.py", "tools/x.py")
+    assert not _same_file("/srv/app/fix.py", "x.py")
+    assert not _same_file("fix.py", "x.py")
+    assert not _same_file("lib/a.py", "b/lib/a.py")
+    assert not _same_file("/srv/blib/a.py", "lib/a.py")
+
+
+def test_error_line_comes_from_the_right_frame():
+    traceback = (
+        'Traceback (most recent call last):\n'
+        '  File "/srv/app/x.py", line 10, in main\n'
+        '  File "/srv/app/fix.py", line 99, in helper\n'
+        'ValueError: bad'
+    )
+    assert parse_error_line(traceback, "x.py") == 10
+    assert parse_error_line(traceback, "fix.py") == 99
+    assert parse_error_line("src/a.js:12:5 TypeError", "src/a.js") == 12
+    assert parse_error_line("TypeError on line 45") == 45
+
+
+def test_focus_keeps_the_enclosing_function():
+    code = "import os\n\n" + "".join(f"def f{i}(x):\n    y = x + {i}\n    return y\n\n" for i in range(60))
+    result = focus_context(code, "a.py", 123, window=2, token_budget=400)
+    assert result["focused"]
+    assert "def f30(x):" in result["content"]
+    assert "import os" in result["content"]
+    assert "def f0(" not in result["content"]
@@ -0,0 +1,37 @@
+from tools.fuzzy import MAX_CANDIDATES, FuzzyIndex
+
+
+PATHS = ["cli.py", "ollama_client.py", "tools/search.py", "tools/symbols.py",
+         "tools/file_ops.py", "tools/trigram_index.py"]
+
+
+def test_characters_in_order():
+    index = FuzzyIndex(PATHS)
+    assert index.search("fops", 1) == ["tools/file_ops.py"]
+    assert index.search("olcl", 1) == ["ollama_client.py"]
+    assert index.search("TSym", 1) == ["tools/symbols.py"]
+    assert index.search("zzz") == []
+    assert index.search("  ") == []
+
+
+def test_exact_and_prefix_names_rank_first():
+    index = FuzzyIndex(["a/searcher.py", "b/research.py", "c/search.py", "s_e_a_r_c_h.py"])
+    assert index.search("search") == ["c/search.py", "a/searcher.py", "b/research.py", "s_e_a_r_c_h.py"]
+
+
+def test_exact_name_is_not_crowded_out():
+    crowded = [f"pkg/test_utils_{i}.py" for i in range(MAX_CANDIDATES + 1000)]
+    crowded.append("services/billing/internal/util.py")
+    assert FuzzyIndex(crowded).search("util", 1) == ["services/billing/internal/util.py"]
+
+
+def test_symbol_names_with_another_separator():
+    index = FuzzyIndex(["Parser.parse", "Lexer.next_token", "parse_args"], separator=".")
+    assert index.search("parse") == ["Parser.parse", "parse_args"]
+
+
+def test_non_ascii_entries():
+    index = FuzzyIndex(["docs/İndex.md", "docs/straße.md"])
+    assert index.search("straße") == ["docs/straße.md"]
+    # lower() lengthens "İ", so that entry is matched case-sensitively
+    assert index.search("ndex") == ["docs/İndex.md"]
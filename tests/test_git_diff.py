@@ -0,0 +1,85 @@
+import shutil
+import subprocess
+
+import pytest
+
+from tools.git_diff import batch_excerpts, changed_lines, diff_excerpt, new_side, parse_diff, read_source
+
+DIFF = """\
+diff --git a/a.py b/a.py
+--- a/a.py
++++ b/a.py
+@@ -3 +3 @@ def one():
+-    return 1
++    return 2
+@@ -10,2 +9,0 @@ def two():
+-    x = 1
+-    y = 2
+@@ -0,0 +1,2 @@
++import os
++import sys
+diff --git a/gone.py b/gone.py
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-x = 1
+"""
+
+
+def test_parse_diff():
+    # The deletion after line 9 marks lines 9 and 10, around the gap
+    assert parse_diff(DIFF) == {"a.py": [(3, 3), (9, 10), (1, 2)]}
+    assert parse_diff("+++ b/top.py\n@@ -1,2 +0,0 @@\n") == {"top.py": [(1, 1)]}
+
+
+def test_new_side():
+    assert new_side(None) is None
+    assert new_side("main") is None
+    assert new_side("main...feature") == "feature"
+    assert new_side("v1..") == "HEAD"
+
+
+def test_excerpts_and_batches():
+    code = "".join(f"def f{i}(x):\n    return x + {i}\n\n" for i in range(30))
+    item = diff_excerpt(code, "a.py", [(41, 41)])
+    assert ">>  41 |     return x + 13" in item["content"]
+    assert "  40 | def f13(x):" in item["content"]
+    assert "def f0(" not in item["content"]
+
+    batches = batch_excerpts([item, dict(item, file="b.py")], token_budget=10_000)
+    assert [batch["files"] for batch in batches] == [["a.py", "b.py"]]
+    assert len(batch_excerpts([item, dict(item, file="b.py")], token_budget=1)) == 2
+
+
+def test_options_are_not_revisions(tmp_path):
+    assert "error" in changed_lines(tmp_path, "--output=/tmp/x")
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_ranges_are_read_as_of_their_end(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "dev")
+    source = tmp_path / "a.py"
+    source.write_text("".join(f"def f{i}():\n    return {i}\n\n" for i in range(10)))
+    (tmp_path / "blob.py").write_bytes(b"x = 1\0")
+    git("add", "-A")
+    git("commit", "-q", "-m", "base")
+    git("checkout", "-q", "-b", "feature")
+    source.write_text(source.read_text().replace("return 5", "return 50"))
+    git("commit", "-q", "-am", "change")
+    # The working tree moves every line down
+    source.write_text("# header\n" * 20 + source.read_text())
+
+    diff = changed_lines(tmp_path, "main...feature")
+    assert diff["target"] == "feature"
+    assert diff["files"] == {"a.py": [(17, 17)]}
+    code = read_source(tmp_path, "a.py", diff["target"])
+    assert code.splitlines()[16] == "    return 50"
+
+    assert changed_lines(tmp_path)["files"] == {"a.py": [(1, 20)]}
+    assert read_source(tmp_path, "blob.py") is None
+    assert read_source(tmp_path, "a.py", max_file_size=10) is None
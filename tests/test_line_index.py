@@ -0,0 +1,45 @@
+import os
+
+from tools.line_index import LineIndex
+
+
+def test_lines_and_offsets(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"one\r\ntwo\nthree")
+    index = LineIndex()
+    assert list(index.offsets(str(path))) == [0, 5, 9, 14]
+    assert index.line_count(str(path)) == 3
+    assert index.lines(str(path)) == ["one", "two", "three"]
+    assert index.lines(str(path), 2, 2) == ["two"]
+    assert index.lines(str(path), 3, 99) == ["three"]
+    assert index.lines(str(path), 4) == []
+
+
+def test_trailing_newline_and_empty_file(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"one\n\n")
+    index = LineIndex()
+    assert index.lines(str(path)) == ["one", ""]
+    path.write_bytes(b"")
+    os.utime(path, ns=(0, 1))
+    assert index.line_count(str(path)) == 0
+
+
+def test_rebuilt_when_the_file_changes(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("one\ntwo\n")
+    index = LineIndex()
+    assert index.lines(str(path), 2) == ["two"]
+    path.write_text("one\nTWO\nthree\n")
+    assert index.lines(str(path), 2) == ["TWO", "three"]
+
+
+def test_least_recently_used_files_are_dropped(tmp_path):
+    index = LineIndex(max_files=2)
+    paths = []
+    for name in "abc":
+        path = tmp_path / name
+        path.write_text(name + "\n")
+        paths.append(str(path))
+        index.offsets(paths[-1])
+    assert list(index._files) == paths[1:]
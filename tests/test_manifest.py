@@ -0,0 +1,71 @@
+import os
+
+from tools.file_ops import FileOperations
+
+
+def listing(ops):
+    return [path.replace(os.sep, "/") for path in ops.list_files(".")["files"]]
+
+
+def test_listing_follows_the_tree(project):
+    project("a.py")
+    project("sub/b.py")
+    ops = FileOperations(project.config)
+    assert listing(ops) == ["a.py", "sub/b.py"]
+
+    project("sub/c.py")
+    project("sub/deep/d.py")
+    assert listing(ops) == ["a.py", "sub/b.py", "sub/c.py", "sub/deep/d.py"]
+
+    project(".gitignore", "deep/\n")
+    assert listing(ops) == ["a.py", "sub/b.py", "sub/c.py"]
+
+    os.remove(project.root / "sub" / "b.py")
+    assert listing(ops) == ["a.py", "sub/c.py"]
+
+
+def test_listing_survives_a_new_process(project):
+    project("a.py")
+    FileOperations(project.config).list_files(".")
+    assert (project.root / ".ai_assistant" / "manifest.json").exists()
+
+    project("b.py")
+    assert listing(FileOperations(project.config)) == ["a.py", "b.py"]
+
+
+def test_gitignore_edited_in_place(project):
+    project("a.py")
+    project("b.py")
+    project(".gitignore", "a.py\n")
+    ops = FileOperations(project.config)
+    assert listing(ops) == ["b.py"]
+
+    stat = os.stat(project.root)
+    project(".gitignore", "b.py\n")
+    os.utime(project.root, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert listing(ops) == ["a.py"]
+
+
+def test_update_files_reports_the_delta(project):
+    project("a.py", "one\n")
+    project("b.py", "two\n")
+    ops = FileOperations(project.config)
+    files = ["a.py", "b.py"]
+
+    assert ops.changed_files(files)["added"] == files
+    generation = ops.manifest.generation
+    assert ops.changed_files(files) == {"added": [], "modified": [], "removed": []}
+    assert ops.manifest.generation == generation
+
+    path = project("a.py", "ONE\n")
+    os.utime(path, ns=(0, 10 ** 18))
+    touched = project("b.py", "two\n")
+    os.utime(touched, ns=(0, 10 ** 18))
+    delta = ops.changed_files(files)
+    assert delta == {"added": [], "modified": ["a.py"], "removed": []}
+    assert ops.manifest.generation > generation
+
+    os.remove(path)
+    assert ops.changed_files(files)["removed"] == ["a.py"]
+    assert ops.changed_files(["b.py"], prune=True)["removed"] == []
+    assert set(ops.manifest.hashes(files)) == {"b.py"}
@@ -0,0 +1,48 @@
+import json
+
+import mcp_server
+from mcp_server import MCPServer
+
+
+def make_server(project, ttl=0):
+    config = json.loads(project.root.joinpath("config.json").read_text())
+    config["listing_ttl"] = ttl
+    project("config.json", json.dumps(config))
+    return MCPServer(project.config)
+
+
+def test_search_results_follow_file_changes(project):
+    project("a.py", "def alpha():\n    pass\n")
+    server = make_server(project)
+    arguments = {"query": "needle"}
+
+    first = server._search_tool("search_code", arguments)
+    assert first["total_matches"] == 0
+    assert server._search_tool("search_code", arguments) is first
+
+    project("a.py", "def alpha():\n    return 'needle and more'\n")
+    assert server._search_tool("search_code", arguments)["total_matches"] == 1
+
+    project("sub/b.py", "needle = 1\n")
+    assert server._search_tool("search_code", arguments)["total_matches"] == 2
+
+
+def test_files_are_not_restated_within_listing_ttl(project, monkeypatch):
+    project("a.py", "x = 1\n")
+    server = make_server(project, ttl=60)
+    server._search_tool("search_code", {"query": "x"})
+
+    calls = []
+    monkeypatch.setattr(server.file_ops, "changed_files", lambda *args, **kw: calls.append(args))
+    server._search_tool("search_code", {"query": "x"})
+    assert calls == []
+
+
+def test_results_are_bounded(project, monkeypatch):
+    monkeypatch.setattr(mcp_server, "MAX_RESULTS", 3)
+    server = make_server(project)
+    for i in range(5):
+        server._memoized(("tool", i), 0, lambda: i)
+    assert list(server._results) == [("tool", 2), ("tool", 3), ("tool", 4)]
+    assert server._memoized(("tool", 2), 0, lambda: "recomputed") == 2
+    assert list(server._results)[-1] == ("tool", 2)
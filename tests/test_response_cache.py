@@ -0,0 +1,45 @@
+import time
+
+from response_cache import ResponseCache
+
+
+def test_round_trip_and_key():
+    key = ResponseCache.make_key("m", "prompt", {"temperature": 0.2})
+    assert key == ResponseCache.make_key("m", "prompt", {"temperature": 0.2})
+    assert key != ResponseCache.make_key("m", "prompt", {"temperature": 0.3})
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", max_entries=2)
+    cache.put("a", "answer a")
+    time.sleep(0.01)
+    cache.put("b", "answer b")
+    time.sleep(0.01)
+    assert cache.get("a") == "answer a"
+    time.sleep(0.01)
+    cache.put("c", "answer c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "answer a"
+    assert cache.get("c") == "answer c"
+
+
+def test_byte_limit_and_ttl(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", max_bytes=10)
+    cache.put("a", "12345678")
+    time.sleep(0.01)
+    cache.put("b", "12345678")
+    assert cache.get("a") is None
+    assert cache.get("b") == "12345678"
+
+    expired = ResponseCache(tmp_path / "other.sqlite3", ttl_seconds=0.01)
+    expired.put("a", "old")
+    time.sleep(0.02)
+    assert expired.get("a") is None
+
+
+def test_from_config(tmp_path):
+    assert ResponseCache.from_config({"enabled": False}, tmp_path) is None
+    cache = ResponseCache.from_config({"max_mb": 1, "ttl_hours": 2}, tmp_path)
+    assert cache.path == tmp_path / "responses.sqlite3"
+    assert (cache.max_bytes, cache.ttl_seconds) == (1024 * 1024, 7200)
+    cache.clear()
@@ -0,0 +1,31 @@
+from tools.symbols import extract_symbols, tokenize
+
+
+def spans(code, filename):
+    return {symbol[0]: (symbol[2], symbol[3]) for symbol in extract_symbols(code, filename)}
+
+
+def test_js_braces_inside_single_quoted_strings():
+    code = "class A {\n  one() { return 'a}b'; }\n  two() {\n    return 1;\n  }\n}\n"
+    assert spans(code, "a.js") == {"A": (1, 6), "one": (2, 2), "two": (3, 5)}
+
+    code = "function after() {\n  const t = 'x { y';\n  return t;\n}\nfunction next() {}\n"
+    assert spans(code, "a.ts") == {"after": (1, 4), "next": (5, 5)}
+
+
+def test_js_private_members_are_not_directives():
+    code = "class C {\n  #count = 0;\n  #priv() {\n    return 1;\n  }\n  pub() {}\n}\n"
+    assert spans(code, "c.js") == {"C": (1, 7), "priv": (3, 5), "pub": (6, 6)}
+
+
+def test_char_literals_and_directives_in_c_and_rust():
+    code = "#define OPEN '{'\nint main() {\n  char c = '}';\n  return 0;\n}\n"
+    assert spans(code, "a.c") == {"main": (2, 5)}
+
+    code = "#[derive(Debug)]\nfn f(c: char) -> bool {\n    c == '{'\n}\nfn g<'a>(x: &'a str) {}\n"
+    assert spans(code, "a.rs") == {"f": (2, 4), "g": (5, 5)}
+
+
+def test_strings_are_single_tokens():
+    assert [t[1] for t in tokenize("x = 'a b';", "js")] == ["x", "=", "'a b'", ";"]
+    assert [t[1] for t in tokenize("x = 'a';", "c")] == ["x", "=", "'a'", ";"]
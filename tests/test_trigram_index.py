@@ -0,0 +1,77 @@
+import re
+
+from tools.trigram_index import TrigramIndex, pattern_trigrams, trigrams
+
+
+def make_index(project, **kwargs):
+    return TrigramIndex(project.root, project.root / ".ai_assistant" / "trigrams.json", **kwargs)
+
+
+def test_required_trigrams():
+    assert pattern_trigrams(re.compile("def main")) == trigrams("def main")
+    # Literal runs are cut at anything that isn't a plain character
+    assert pattern_trigrams(re.compile(r"foo\w+bar")) == {"foo", "bar"}
+    assert pattern_trigrams(re.compile(r"a.b")) is None
+
+
+def test_ignorecase_non_ascii_literals_need_a_full_scan():
+    assert pattern_trigrams(re.compile("İx", re.IGNORECASE)) is None
+    assert pattern_trigrams(re.compile("straße", re.IGNORECASE)) is None
+    assert pattern_trigrams(re.compile("straße")) == trigrams("straße")
+    assert pattern_trigrams(re.compile("Main", re.IGNORECASE)) == trigrams("main")
+
+
+def test_candidates_follow_changes(project):
+    project("a.py", "def main():\n    pass\n")
+    project("b.py", "def helper():\n    pass\n")
+    files = ["a.py", "b.py"]
+    index = make_index(project)
+    index.refresh(files)
+    assert index.candidates(re.compile("MAIN", re.IGNORECASE), files) == ["a.py"]
+
+    project("b.py", "def helper():\n    main()\n")
+    index.refresh(files)
+    assert index.candidates(re.compile("main"), files) == ["a.py", "b.py"]
+
+    # Files the index has never seen are always candidates
+    assert index.candidates(re.compile("main"), files + ["new.py"]) == ["a.py", "b.py", "new.py"]
+
+
+def test_saved_index_loads_and_prunes(project):
+    project("a.py", "alpha = 1\n")
+    project("b.py", "beta = 2\n")
+    index = make_index(project)
+    index.refresh(["a.py", "b.py"])
+    index.save()
+    assert [p.name for p in index.index_path.parent.iterdir()] == ["trigrams.json"]
+
+    loaded = make_index(project)
+    loaded.refresh(["a.py"], prune=True)
+    assert set(loaded.files) == {"a.py"}
+    assert loaded.candidates(re.compile("beta"), ["a.py", "b.py"]) == ["b.py"]
+    assert loaded.candidates(re.compile("alpha"), ["a.py"]) == ["a.py"]
+
+
+def test_binary_and_large_files_are_recorded_once(project, monkeypatch):
+    project("blob.py", b"x = 1\0\0")
+    project("big.py", "needle = 1\n" * 100)
+    project("small.py", "other = 1\n")
+    files = ["big.py", "blob.py", "small.py"]
+    index = make_index(project, max_file_size=500)
+    index.refresh(files)
+    assert index.files["blob.py"] == {"skipped": index.files["blob.py"]["skipped"]}
+    assert "skipped" in index.files["big.py"]
+    # No trigrams for them, so they can't be ruled out
+    assert index.candidates(re.compile("needle"), files) == ["big.py", "blob.py"]
+
+    reads = []
+    real = TrigramIndex._index_file
+    monkeypatch.setattr(TrigramIndex, "_index_file", lambda self, *args: reads.append(args) or real(self, *args))
+    index.refresh(files)
+    assert reads == []
+
+    index.save()
+    reloaded = make_index(project, max_file_size=500)
+    reloaded.refresh(files)
+    assert reads == []
+    assert reloaded.candidates(re.compile("other"), files) == ["big.py", "blob.py", "small.py"]
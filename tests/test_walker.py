@@ -0,0 +1,45 @@
+import os
+
+from tools.walker import FileWalker, GitIgnore
+
+
+def walk(project, **kwargs):
+    walker = FileWalker(project.root, {"node_modules", ".git"}, {".py", ".md"}, **kwargs)
+    return sorted(os.path.relpath(path, project.root).replace(os.sep, "/")
+                  for path in walker.walk(str(project.root)))
+
+
+def test_gitignore_rules():
+    ignore = GitIgnore(["# comment", "*.log", "build/", "/top.py", "docs/**/*.md", "!keep.log"])
+    assert ignore.match("debug.log", False) is True
+    assert ignore.match("sub/debug.log", False) is True
+    assert ignore.match("keep.log", False) is False
+    assert ignore.match("build", True) is True
+    assert ignore.match("build", False) is None
+    assert ignore.match("top.py", False) is True
+    assert ignore.match("sub/top.py", False) is None
+    assert ignore.match("docs/a/b/c.md", False) is True
+    assert ignore.match("readme.md", False) is None
+
+
+def test_walk_prunes_excluded_and_ignored(project):
+    project("a.py")
+    project("notes.txt")
+    project("node_modules/dep/index.py")
+    project("environment.py")
+    project("build/out.py")
+    project("src/gen/skip.py")
+    project("src/keep.py")
+    project(".gitignore", "build/\n")
+    project("src/.gitignore", "gen/\n")
+    assert walk(project) == ["a.py", "environment.py", "src/keep.py"]
+    assert "build/out.py" in walk(project, use_gitignore=False)
+
+
+def test_deeper_gitignore_overrides(project):
+    project(".gitignore", "*.md\n")
+    project("docs/.gitignore", "!guide.md\n")
+    project("readme.md")
+    project("docs/guide.md")
+    project("docs/other.md")
+    assert walk(project) == ["docs/guide.md"]
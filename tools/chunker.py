@@ -0,0 +1,145 @@
+import ast
+import re
+import zlib
+from typing import Dict, List
+
+# Rough size of a token for code; good enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+# Top-level definitions in the non-Python languages we handle
+DEFINITION_RE = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?"
+    r"(?:def|class|function|func|fn|pub|impl|struct|interface|enum|type|const|let|var|"
+    r"public|private|protected|static|internal)\b"
+)
+
+# A chunk may be closed after any segment whose hash hits this modulus. The
+# boundaries then depend only on nearby content, so an edit near the top of
+# a file doesn't re-pack (and invalidate cached summaries of) every chunk.
+BOUNDARY_MODULUS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens a piece of text will use."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _python_boundaries(code: str) -> List[int]:
+    """Start lines (1-based) of top-level statements and class members."""
+    tree = ast.parse(code)
+    starts = []
+    nodes = list(tree.body)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            nodes.extend(node.body[1:])  # the first member stays with the class header
+    for node in nodes:
+        decorators = getattr(node, "decorator_list", [])
+        start = min([node.lineno] + [d.lineno for d in decorators])
+        starts.append(start)
+    return starts
+
+
+def _generic_boundaries(lines: List[str]) -> List[int]:
+    """Start lines of unindented definitions in brace/keyword languages."""
+    starts = []
+    for i, line in enumerate(lines, start=1):
+        if line[:1].isspace():
+            continue
+        if DEFINITION_RE.match(line):
+            starts.append(i)
+    return starts
+
+
+def split_segments(code: str, filename: str = "") -> List[Dict]:
+    """Split code into segments on function/class boundaries."""
+    lines = code.splitlines(keepends=True)
+    if not lines:
+        return []
+
+    starts = None
+    if filename.endswith(".py"):
+        try:
+            starts = _python_boundaries(code)
+        except (SyntaxError, ValueError):
+            starts = None
+    if starts is None:
+        starts = _generic_boundaries(lines)
+
+    # Anything before the first boundary (headers, comments) is a segment too
+    starts = sorted(set([1] + [s for s in starts if 1 <= s <= len(lines)]))
+
+    segments = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] - 1 if i + 1 < len(starts) else len(lines)
+        segments.append({
+            "start": start,
+            "end": end,
+            "text": "".join(lines[start - 1:end]),
+        })
+
+    return segments
+
+
+def _split_oversized(segment: Dict, token_budget: int) -> List[Dict]:
+    """Cut a segment that alone exceeds the budget into line-based pieces."""
+    lines = segment["text"].splitlines(keepends=True)
+    pieces = []
+    current = []
+    current_tokens = 0
+    start = segment["start"]
+
+    for offset, line in enumerate(lines):
+        tokens = estimate_tokens(line)
+        if current and current_tokens + tokens > token_budget:
+            pieces.append({"start": start, "end": start + len(current) - 1, "text": "".join(current)})
+            start = segment["start"] + offset
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += tokens
+
+    if current:
+        pieces.append({"start": start, "end": start + len(current) - 1, "text": "".join(current)})
+
+    return pieces
+
+
+def split_code(code: str, filename: str = "", token_budget: int = 2000) -> List[Dict]:
+    """Split code into chunks of whole definitions that fit a token budget.
+
+    Each chunk is a dict with 1-based "start"/"end" lines and its "text".
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append({
+                "start": current[0]["start"],
+                "end": current[-1]["end"],
+                "text": "".join(s["text"] for s in current),
+            })
+        current = []
+        current_tokens = 0
+
+    for segment in split_segments(code, filename):
+        tokens = estimate_tokens(segment["text"])
+
+        if tokens > token_budget:
+            flush()
+            chunks.extend(_split_oversized(segment, token_budget))
+            continue
+
+        if current_tokens + tokens > token_budget:
+            flush()
+
+        current.append(segment)
+        current_tokens += tokens
+
+        if zlib.crc32(segment["text"].encode("utf-8")) % BOUNDARY_MODULUS == 0:
+            flush()
+
+    flush()
+    return chunks
@@ -0,0 +1,220 @@
+import os
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .chunker import split_code
+
+INDEX_VERSION = 2
+
+
+class OllamaEmbedder:
+    """Embeds text with a local Ollama embedding model."""
+
+    def __init__(self, model: str = "nomic-embed-text", batch_size: int = 32):
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"ollama:{model}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        import ollama
+
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            try:
+                vectors.extend(ollama.embed(model=self.model, input=batch)["embeddings"])
+            except ollama.ResponseError:
+                # Older Ollama servers only have the one-prompt endpoint
+                for text in batch:
+                    vectors.append(ollama.embeddings(model=self.model, prompt=text)["embedding"])
+        return vectors
+
+
+class HashEmbedder:
+    """Deterministic bag-of-words embedder that needs no model.
+
+    Identifiers are hashed into a fixed number of buckets, which is enough
+    for lexical retrieval and makes the index testable offline.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hash:{dim}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for word in re.findall(r"[A-Za-z_][A-Za-z0-9_]*", text.lower()):
+                vector[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+            vectors.append(vector)
+        return vectors
+
+
+class EmbeddingIndex:
+    """Chunk embeddings for every project file, stored under the cache dir.
+
+    Vectors live in a float32 .npy matrix with L2-normalised rows, and chunk
+    metadata (file, line range) in a JSON file alongside it. ``update`` only
+    re-embeds files whose content hash in the workspace manifest changed.
+    """
+
+    def __init__(self, file_ops, embedder, chunk_tokens: int = 300):
+        self.file_ops = file_ops
+        self.embedder = embedder
+        self.chunk_tokens = chunk_tokens
+        self.vectors_path = file_ops.cache_dir / "embeddings.npy"
+        self.meta_path = file_ops.cache_dir / "embeddings.json"
+        self.files: Dict[str, str] = {}  # path -> content hash
+        self.chunks: List[Dict] = []  # {"file", "start", "end"} per vector row
+        self.vectors = None
+
+    def exists(self) -> bool:
+        return self.meta_path.exists() and self.vectors_path.exists()
+
+    def load(self) -> bool:
+        """Load the index from disk; returns False if it is missing or stale."""
+        if not self.exists():
+            return False
+
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            vectors = np.load(self.vectors_path)
+        except (OSError, ValueError):
+            return False
+
+        if meta.get("version") != INDEX_VERSION or meta.get("embedder") != self.embedder.name:
+            return False
+
+        self.files = meta["files"]
+        self.chunks = meta["chunks"]
+        self.vectors = vectors
+        return True
+
+    def save(self):
+        self.file_ops.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "version": INDEX_VERSION,
+            "embedder": self.embedder.name,
+            "files": self.files,
+            "chunks": self.chunks,
+        }
+
+        tmp_vectors = self.vectors_path.with_suffix(".tmp.npy")
+        np.save(tmp_vectors, self.vectors)
+        os.replace(tmp_vectors, self.vectors_path)
+
+        tmp_meta = self.meta_path.with_suffix(".tmp")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, separators=(",", ":"))
+        os.replace(tmp_meta, self.meta_path)
+
+    @staticmethod
+    def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def update(self, directory: str = ".", progress=None) -> Dict:
+        """Embed new and changed files and drop deleted ones."""
+        files_result = self.file_ops.list_files(directory)
+        if "error" in files_result:
+            return {"error": files_result["error"]}
+
+        self.load()
+
+        # Only prune files that belong to the directory being indexed
+        whole_project = Path(files_result["directory"]).resolve() == self.file_ops.project_root
+        self.file_ops.changed_files(files_result["files"], prune=whole_project)
+        current = self.file_ops.manifest.hashes(files_result["files"])
+
+        changed = [path for path, digest in current.items() if self.files.get(path) != digest]
+        if whole_project:
+            removed = set(self.files) - set(current)
+        else:
+            removed = set()
+        stale = removed | set(changed)
+
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk["file"] not in stale]
+        chunks = [self.chunks[i] for i in keep]
+        parts = [self.vectors[keep]] if self.vectors is not None and keep else []
+
+        new_chunks = []
+        texts = []
+        indexed = []
+        for count, rel_path in enumerate(changed, start=1):
+            result = self.file_ops.read_file(rel_path)
+            if "error" in result:
+                continue  # left out of self.files, so the next update retries it
+            indexed.append(rel_path)
+            for chunk in split_code(result["content"], rel_path, self.chunk_tokens):
+                if not chunk["text"].strip():
+                    continue
+                new_chunks.append({"file": rel_path, "start": chunk["start"], "end": chunk["end"]})
+                texts.append(f"{rel_path}\n{chunk['text']}")
+            if progress:
+                progress(count, len(changed))
+
+        if texts:
+            parts.append(self._normalize(np.asarray(self.embedder.embed(texts), dtype=np.float32)))
+
+        for path in stale:
+            self.files.pop(path, None)
+        for path in indexed:
+            self.files[path] = current[path]
+
+        self.chunks = chunks + new_chunks
+        if parts:
+            self.vectors = np.vstack(parts)
+        else:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+        if changed or removed or not self.exists():
+            self.save()
+
+        return {
+            "files_indexed": len(indexed),
+            "files_removed": len(removed),
+            "chunks_embedded": len(new_chunks),
+            "total_chunks": len(self.chunks),
+        }
+
+    def search(self, query: str, top_k: int = 4) -> List[Dict]:
+        """Return the chunks most similar to a query, best first."""
+        if self.vectors is None and not self.load():
+            return []
+        if not len(self.chunks):
+            return []
+
+        query_vector = self._normalize(
+            np.asarray(self.embedder.embed([query]), dtype=np.float32)
+        )[0]
+        if query_vector.shape[0] != self.vectors.shape[1]:
+            return []
+
+        scores = self.vectors @ query_vector
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for i in best:
+            chunk = self.chunks[i]
+            result = self.file_ops.read_lines(chunk["file"], chunk["start"], chunk["end"])
+            if "error" in result:
+                continue
+            results.append({
+                "file": chunk["file"],
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "score": float(scores[i]),
+                "text": result["content"],
+            })
+
+        return results
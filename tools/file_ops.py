@@ -1,7 +1,13 @@
 import os
 import json
+import time
 from pathlib import Path
 
+from .line_index import LineIndex
+from .manifest import WorkspaceManifest
+from .profiler import NULL_PROFILER
+from .walker import FileWalker
+
 
 class FileOperations:
     def __init__(self, config_path="config.json"):
@@ -13,15 +19,36 @@ class FileOperations:
         self.allowed_extensions = set(
             ext.lower() for ext in self.config['allowed_extensions']
         )
+        # Directory (under the project root) where indexes and caches live
+        self.cache_dir = self.project_root / self.config.get('cache_dir', '.ai_assistant')
+        self.walker = FileWalker(
+            self.project_root,
+            self.excluded_dirs,
+            self.allowed_extensions,
+            use_gitignore=self.config.get('use_gitignore', True),
+        )
+        # Remembers directory listings and file hashes between runs
+        self.manifest = WorkspaceManifest(self.walker, self.cache_dir / "manifest.json")
+        # Long-lived sessions (shell/serve) reuse listings for this many seconds
+        self.listing_ttl = 0
+        self._listing_cache = {}
+        # Per-phase timings of the running command (see tools/profiler.py)
+        self.profiler = NULL_PROFILER
+        # Line offsets of recently read files, for read_lines
+        self.line_index = LineIndex()
 
     def is_valid_path(self, path: Path) -> bool:
         """Check if a path should be processed (Windows friendly)."""
         try:
-            path_str = str(path).lower()
-
-            for excluded in self.excluded_dirs:
-                if excluded.lower() in path_str:
-                    return False
+            try:
+                parts = path.resolve().relative_to(self.project_root).parts
+            except ValueError:
+                parts = path.parts
+
+            # Compare whole directory names, so "env" doesn't drop "environment.py"
+            excluded = {name.lower() for name in self.excluded_dirs}
+            if any(part.lower() in excluded for part in parts[:-1]):
+                return False
 
             if path.suffix.lower() not in self.allowed_extensions:
                 return False
@@ -31,8 +58,17 @@ class FileOperations:
         except Exception:
             return False
 
-    def read_file(self, file_path: str) -> dict:
-        """Read file content with Windows-safe path handling."""
+    def read_file(self, file_path: str, start_line: int | None = None, end_line: int | None = None) -> dict:
+        """Read file content with Windows-safe path handling.
+
+        With start_line or end_line, only that range is read (see read_lines).
+        """
+        if start_line is not None or end_line is not None:
+            return self.read_lines(file_path, start_line or 1, end_line)
+        with self.profiler.phase("read"):
+            return self._read_file(file_path)
+
+    def _read_file(self, file_path: str) -> dict:
         try:
             file_path = file_path.replace('/', os.sep).replace('\\', os.sep)
             path = Path(file_path)
@@ -59,8 +95,52 @@ class FileOperations:
         except Exception as e:
             return {"error": f"Error reading file: {str(e)}"}
 
+    def read_lines(self, file_path: str, start: int = 1, end: int | None = None) -> dict:
+        """Read lines start..end (1-based, inclusive) without loading the whole file.
+
+        The file's line offsets are cached (see LineIndex), so further ranges
+        of an unchanged file are a seek and a read of just those lines.
+        """
+        file_path = file_path.replace('/', os.sep).replace('\\', os.sep)
+        path = Path(file_path)
+
+        if not path.is_absolute():
+            path = self.project_root / path
+
+        try:
+            with self.profiler.phase("read"):
+                lines = self.line_index.lines(str(path), start, end)
+        except FileNotFoundError:
+            return {"error": f"File not found: {file_path}"}
+        except IsADirectoryError:
+            return {"error": f"Not a file: {file_path}"}
+        except Exception as e:
+            return {"error": f"Error reading file: {str(e)}"}
+
+        start = max(1, start)
+        return {
+            "path": str(path),
+            "start": start,
+            "end": start + len(lines) - 1,
+            "content": "\n".join(lines),
+            "lines": len(lines),
+        }
+
     def list_files(self, directory: str = ".", recursive: bool = True) -> dict:
         """List all files in a directory (Windows friendly)."""
+        if self.listing_ttl:
+            cached = self._listing_cache.get((directory, recursive))
+            if cached and time.monotonic() - cached[0] < self.listing_ttl:
+                return dict(cached[1], files=list(cached[1]["files"]))
+
+        with self.profiler.phase("walk"):
+            result = self._list_files(directory, recursive)
+        if self.listing_ttl and "error" not in result:
+            self._listing_cache[(directory, recursive)] = (time.monotonic(), result)
+            result = dict(result, files=list(result["files"]))
+        return result
+
+    def _list_files(self, directory: str, recursive: bool) -> dict:
         try:
             directory = directory.replace('/', os.sep).replace('\\', os.sep)
             dir_path = Path(directory)
@@ -71,24 +151,14 @@ class FileOperations:
             if not dir_path.exists():
                 return {"error": f"Directory not found: {directory}"}
 
-            files = []
+            root_prefix = str(self.project_root) + os.sep
+            resolved = os.path.abspath(dir_path)
 
-            if recursive:
-                for path in dir_path.rglob('*'):
-                    if path.is_file() and self.is_valid_path(path):
-                        try:
-                            rel_path = path.relative_to(self.project_root)
-                            files.append(str(rel_path))
-                        except ValueError:
-                            files.append(str(path))
+            if resolved == str(self.project_root) or resolved.startswith(root_prefix):
+                files = self.manifest.list(resolved, recursive=recursive)
+                self.save_manifest()
             else:
-                for path in dir_path.iterdir():
-                    if path.is_file() and self.is_valid_path(path):
-                        try:
-                            rel_path = path.relative_to(self.project_root)
-                            files.append(str(rel_path))
-                        except ValueError:
-                            files.append(str(path))
+                files = list(self.walker.walk(str(dir_path), recursive=recursive))
 
             return {
                 "directory": str(dir_path),
@@ -99,6 +169,19 @@ class FileOperations:
         except Exception as e:
             return {"error": f"Error listing files: {str(e)}"}
 
+    def save_manifest(self):
+        try:
+            self.manifest.save()
+        except OSError:
+            pass  # a read-only checkout still gets the in-memory manifest
+
+    def changed_files(self, files, prune: bool = False) -> dict:
+        """Update the manifest's hashes for these files and return the delta."""
+        with self.profiler.phase("hash"):
+            delta = self.manifest.update_files(files, prune=prune)
+            self.save_manifest()
+        return delta
+
     def get_file_info(self, file_path: str) -> dict:
         """Get metadata about a file."""
         try:
@@ -126,7 +209,7 @@ class FileOperations:
             return {"error": f"Error getting file info: {str(e)}"}
 
 
-# Test
+# Test (python -m tools.file_ops)
 if __name__ == "__main__":
     print("Testing File Operations...")
     ops = FileOperations()
@@ -0,0 +1,165 @@
+import os
+import posixpath
+import re
+from typing import Dict, List, Optional
+
+from .chunker import estimate_tokens
+from .symbols import extract_symbols
+
+# Python traceback frames: File "app/x.py", line 45, in handler
+TRACEBACK_RE = re.compile(r'File "([^"]+)", line (\d+)')
+# file.js:45:10, file.c:45: error, (file.cs:45), file.go:45 ...
+FILE_LINE_RE = re.compile(r"([\w./\\-]+\.\w+)[:(](\d+)")
+# "line 45", "Line 45", "at line 45", "on line 45"
+LINE_RE = re.compile(r"\bline\s+(\d+)", re.IGNORECASE)
+
+# Import-like lines worth keeping from outside the focused window
+IMPORT_RE = re.compile(
+    r"^\s*(?:import\b|from\s+\S+\s+import\b|#\s*include\b|using\s+[\w.]+\s*;|use\s+\w|package\s+\w|"
+    r"(?:const|let|var)\s+.*=\s*require\()"
+)
+# Share of the budget imports may take before they are cut
+IMPORT_SHARE = 0.25
+
+
+def _same_file(candidate: str, file_path: str) -> bool:
+    """Whether a path from an error message names file_path.
+
+    Paths are compared by whole components: an absolute path matches a
+    relative one it ends with ("/src/app/x.py" and "app/x.py"), and two
+    relative or two absolute paths must be equal ("fix.py" is not "x.py").
+    """
+    candidate = posixpath.normpath(candidate.replace("\\", "/"))
+    file_path = posixpath.normpath(file_path.replace("\\", "/"))
+    if os.path.isabs(candidate) == os.path.isabs(file_path):
+        return candidate == file_path
+    longer, shorter = (candidate, file_path) if os.path.isabs(candidate) else (file_path, candidate)
+    return longer.endswith("/" + shorter)
+
+
+def parse_error_line(error: str, file_path: str = "") -> Optional[int]:
+    """Line number an error message or traceback points at, if any.
+
+    Traceback frames and "file:line" references are preferred when they
+    name ``file_path``; the innermost such frame wins. Otherwise a bare
+    "line N" is used.
+    """
+    if not error:
+        return None
+
+    if file_path:
+        for regex in (TRACEBACK_RE, FILE_LINE_RE):
+            frames = [int(line) for name, line in regex.findall(error) if _same_file(name, file_path)]
+            if frames:
+                return frames[-1]
+
+    # Frames in other files don't count as a bare "line N"
+    found = LINE_RE.findall(TRACEBACK_RE.sub("", error))
+    return int(found[-1]) if found else None
+
+
+def enclosing_symbol(symbols: List[List], line: int) -> Optional[List]:
+    """Innermost function or class (from extract_symbols) spanning a line."""
+    best = None
+    for symbol in symbols:
+        start, end = symbol[2], symbol[3]
+        if start <= line <= end and (best is None or end - start < best[3] - best[2]):
+            best = symbol
+    return best
+
+
+def _imports(lines: List[str]) -> List[int]:
+    """1-based numbers of import lines, including Go-style import ( ... ) blocks."""
+    numbers = []
+    in_block = False
+    for number, text in enumerate(lines, start=1):
+        stripped = text.strip()
+        if in_block:
+            numbers.append(number)
+            in_block = stripped != ")"
+        elif IMPORT_RE.match(text):
+            numbers.append(number)
+            in_block = stripped.endswith("(") and stripped.startswith("import")
+    return numbers
+
+
+def numbered_lines(lines: List[str], numbers: List[int], marked) -> str:
+    """The given lines with their numbers; lines in ``marked`` get ">>"."""
+    out = []
+    previous = 0
+    for number in numbers:
+        if previous and number != previous + 1:
+            out.append("      ...")
+        marker = ">>" if number in marked else "  "
+        out.append(f"{marker}{number:>4} | {lines[number - 1]}")
+        previous = number
+    return "\n".join(out)
+
+
+def focus_context(code: str, filename: str, line: int, window: int = 20,
+                  token_budget: int = 2000) -> Dict:
+    """The part of a file that matters for an error at ``line``.
+
+    Keeps the enclosing function or class, ``window`` lines either side of
+    the line, and the file's imports, shrinking the window (and then the
+    enclosing definition) around the line until it fits ``token_budget``.
+    Lines are numbered and the target line is marked with ">>".
+    """
+    lines = code.splitlines()
+    if not lines:
+        return {"content": "", "start": 0, "end": 0, "line": line, "symbol": None, "focused": False}
+    line = min(max(line, 1), len(lines))
+
+    symbol = enclosing_symbol(extract_symbols(code, filename), line)
+    start, end = max(1, line - window), min(len(lines), line + window)
+    if symbol:
+        start, end = min(start, symbol[2]), max(end, symbol[3])
+
+    # Imports first, capped at a share of the budget
+    import_numbers = []
+    used = 0
+    for number in _imports(lines):
+        if start <= number <= end:
+            continue
+        cost = estimate_tokens(lines[number - 1]) + 2
+        if used + cost > token_budget * IMPORT_SHARE:
+            break
+        import_numbers.append(number)
+        used += cost
+
+    # Then the widest region around the line that fits what's left
+    def cost_of(a, b):
+        return sum(estimate_tokens(lines[n - 1]) + 2 for n in range(a, b + 1))
+
+    remaining = token_budget - used
+    while start < end and cost_of(start, end) > remaining:
+        above, below = line - start, end - line
+        if above >= below:
+            start += max(1, above // 4)
+        else:
+            end -= max(1, below // 4)
+        start, end = min(start, line), max(end, line)
+
+    numbers = sorted(set(import_numbers) | set(range(start, end + 1)))
+    return {
+        "content": numbered_lines(lines, numbers, {line}),
+        "start": start,
+        "end": end,
+        "line": line,
+        "symbol": f"{symbol[4]}.{symbol[0]}" if symbol and symbol[4] else (symbol[0] if symbol else None),
+        "focused": start > 1 or end < len(lines),
+    }
+
+
+# Simple test when running directly (python -m tools.focus)
+if __name__ == "__main__":
+    traceback = 'Traceback (most recent call last):\n  File "cli.py", line 600, in <module>\n' \
+                '  File "tools/focus.py", line 40, in parse_error_line\nValueError: bad'
+    print("Traceback line:", parse_error_line(traceback, "tools/focus.py"))
+    print("Message line:", parse_error_line("TypeError on line 45"))
+
+    with open(__file__, 'r', encoding='utf-8') as f:
+        source = f.read()
+    result = focus_context(source, __file__, 40, window=5, token_budget=400)
+    print(f"Lines {result['start']}-{result['end']} in {result['symbol']}:")
+    print(result["content"])
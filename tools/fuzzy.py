@@ -0,0 +1,213 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+# Entries scored per query. Names equal to the query are always scored;
+# beyond that, once this many prefix, substring or scattered matches are
+# found (in that order) the rest are left out, so short, unselective
+# queries stay as fast as long ones.
+MAX_CANDIDATES = 2000
+# Recent queries whose ranked results are kept
+QUERY_CACHE_SIZE = 64
+
+
+class FuzzyIndex:
+    """Fuzzy matcher over file paths or symbol names.
+
+    Entries are kept as one newline-joined string plus an array of offsets
+    (and a second string of lowercased last components), not as a list of
+    string objects. Names that equal or start with the query are found by
+    bisecting an array of entries sorted by name, and names containing it
+    with str.find over the names string. For the scattered matches,
+    the index builds, once per character a query uses, a bytes-as-int mask
+    of the entries that contain it; a query ANDs the masks of its
+    characters, so only entries holding all of them are scored.
+    """
+
+    def __init__(self, entries: Iterable[str], separator: str = "/"):
+        entries = sorted(set(entries), key=lambda entry: (len(entry), entry))
+        self.separator = separator
+        self.size = len(entries)
+
+        self._text = "\n".join(entries)
+        lowered = [entry.lower() for entry in entries]
+        # lower() can change the length of non-ASCII text; such entries are
+        # matched case-sensitively so every offset stays valid
+        lowered = [low if len(low) == len(entry) else entry for low, entry in zip(lowered, entries)]
+        self._lower = "\n".join(lowered)
+        names = [low[low.rfind(separator) + 1:] for low in lowered]
+        self._names = "\n" + "\n".join(names) + "\n"
+
+        self._starts = array("L", [0])
+        for entry in entries:
+            self._starts.append(self._starts[-1] + len(entry) + 1)
+        self._name_starts = array("L", [1])
+        for name in names:
+            self._name_starts.append(self._name_starts[-1] + len(name) + 1)
+        self._by_name = array("L", sorted(range(self.size), key=names.__getitem__))
+
+        self._masks: Dict[Tuple[str, str], int] = {}
+        self._results: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def entry(self, i: int) -> str:
+        return self._text[self._starts[i]:self._starts[i + 1] - 1]
+
+    def _mask(self, chars: str, field: str) -> int:
+        """Entries (one byte each) whose path or name contains every char."""
+        missing = [c for c in chars if (field, c) not in self._masks]
+        if missing:
+            text = self._names[1:-1] if field == "name" else self._lower
+            values = text.split("\n")
+            for c in missing:
+                self._masks[(field, c)] = int.from_bytes(bytes([c in value for value in values]), "little")
+
+        mask = -1
+        for c in chars:
+            mask &= self._masks[(field, c)]
+        return mask
+
+    def _name(self, i: int) -> str:
+        return self._names[self._name_starts[i]:self._name_starts[i + 1] - 1]
+
+    def _name_hits(self, query: str, found: List[int], seen: set):
+        """Add entries whose name equals or starts with query.
+
+        Exact names (with or without an extension) are all added, however
+        long their paths; prefix matches stop at MAX_CANDIDATES entries.
+        """
+        by_name, name = self._by_name, self._name
+        # Names sort as query, query.ext..., then other names starting with it
+        low = bisect_left(by_name, query, key=name)
+        exact = list(range(low, bisect_right(by_name, query, key=name)))
+        exact += range(bisect_left(by_name, query + ".", key=name), bisect_left(by_name, query + "/", key=name))
+        for k in exact:
+            seen.add(by_name[k])
+            found.append(by_name[k])
+
+        k = low
+        while k < self.size and len(found) < MAX_CANDIDATES and name(by_name[k]).startswith(query):
+            if by_name[k] not in seen:
+                seen.add(by_name[k])
+                found.append(by_name[k])
+            k += 1
+
+    def _substring_hits(self, query: str, found: List[int], seen: set):
+        """Add entries whose name contains query, up to MAX_CANDIDATES."""
+        names = self._names
+        i = names.find(query)
+        while i != -1 and len(found) < MAX_CANDIDATES:
+            entry = bisect_right(self._name_starts, i) - 1
+            if entry not in seen:
+                seen.add(entry)
+                found.append(entry)
+            # On to the next name; names always end with a newline
+            i = names.find(query, names.find("\n", i) + 1)
+
+    def _candidates(self, query: str) -> List[int]:
+        """Entries worth scoring, best-placed first (see MAX_CANDIDATES)."""
+        found: List[int] = []
+        seen = set()
+        self._name_hits(query, found, seen)
+        chars = "".join(sorted(set(query)))
+        name_mask = self._mask(chars, "name")
+        # When every name holding the query's characters fits under the cap,
+        # the name mask below adds the substring matches without a scan
+        if name_mask.bit_count() > MAX_CANDIDATES - len(found):
+            self._substring_hits(query, found, seen)
+        # Then scattered matches, preferring entries with all the characters
+        # in their name
+        for field in ("name", "path"):
+            if len(found) >= MAX_CANDIDATES:
+                break
+            mask = name_mask if field == "name" else self._mask(chars, field)
+            flags = mask.to_bytes(self.size, "little")
+            i = flags.find(1)
+            while i != -1 and len(found) < MAX_CANDIDATES:
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+                i = flags.find(1, i + 1)
+        return found
+
+    def _rank(self, query: str) -> List[int]:
+        # "a[^b]*b[^c]*c": each gap stops at the next query character, so a
+        # failed match never backtracks
+        in_order = re.compile(re.escape(query[0]) + "".join(
+            f"[^{re.escape(c)}]*{re.escape(c)}" for c in query[1:]
+        ))
+        separator = self.separator
+        scored = []
+        for i in self._candidates(query):
+            path = self._lower[self._starts[i]:self._starts[i + 1] - 1]
+            name = path[path.rfind(separator) + 1:]
+            if name == query or name.split(".", 1)[0] == query:
+                tier = 0
+            elif name.startswith(query):
+                tier = 1
+            elif query in name:
+                tier = 2
+            elif in_order.search(name):
+                tier = 3
+            elif query in path:
+                tier = 4
+            elif in_order.search(path):
+                tier = 5
+            else:
+                continue
+            scored.append((tier, len(name), len(path), i))
+        scored.sort()
+        return [item[3] for item in scored]
+
+    def search(self, query: str, limit: int | None = 20) -> List[str]:
+        """Entries matching query, best first.
+
+        The query's characters must appear in order (case-insensitively);
+        exact and prefix matches of the last component come first, then
+        substrings, then scattered matches, shorter entries first.
+        """
+        return [self.entry(i) for i in self.search_ids(query)[:limit]]
+
+    def search_ids(self, query: str) -> List[int]:
+        query = "".join(query.split()).lower()
+        if not query or not self.size:
+            return []
+
+        ranked = self._results.get(query)
+        if ranked is None:
+            ranked = self._results[query] = self._rank(query)
+            if len(self._results) > QUERY_CACHE_SIZE:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(query)
+        return ranked
+
+
+# Simple test when running directly (python -m tools.fuzzy)
+if __name__ == "__main__":
+    import time
+
+    paths = [
+        "cli.py", "ollama_client.py", "tools/search.py", "tools/symbols.py",
+        "tools/file_ops.py", "tools/trigram_index.py", "benchmarks/suite.py",
+    ]
+    index = FuzzyIndex(paths)
+    for query in ("search", "tsym", "fops", "olcl", "zzz"):
+        print(f"{query!r}: {index.search(query, 3)}")
+
+    # An exact name on a long path is not crowded out by shorter substring hits
+    crowded = [f"pkg/test_utils_{i}.py" for i in range(3000)] + ["services/billing/internal/util.py"]
+    assert FuzzyIndex(crowded).search("util", 1) == ["services/billing/internal/util.py"]
+    print("✓ Exact names beat shorter substring matches")
+
+    many = [f"pkg{i % 50}/module{i % 997}/file_{i}.py" for i in range(200_000)]
+    index = FuzzyIndex(many)
+    index.search("warm up the character masks: file_0123456789")
+    for query in ("file_1234", "m99f12", "pkg7/f"):
+        start = time.perf_counter()
+        hits = index.search(query, 5)
+        print(f"{query!r}: {(time.perf_counter() - start) * 1000:.2f} ms, {hits[:2]}")
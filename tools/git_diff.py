@@ -0,0 +1,218 @@
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .chunker import estimate_tokens
+from .focus import enclosing_symbol, numbered_lines
+from .search import BINARY_SNIFF_BYTES, is_binary
+from .symbols import extract_symbols
+
+# @@ -12,3 +14,5 @@  (counts default to 1, and are 0 for pure insertions/deletions)
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+# Unchanged lines kept on either side of a change (as in git's own diffs)
+CONTEXT_LINES = 3
+# Enclosing definitions longer than this (e.g. a class around a changed
+# attribute) are left out; only the lines around the change are sent
+MAX_ENCLOSING_LINES = 150
+
+
+def _diff_path(header: str) -> Optional[str]:
+    """Path from a "+++ b/path" header; None for deleted files."""
+    path = header[4:].rstrip("\t")
+    if path.startswith('"') and path.endswith('"'):
+        path = path[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    if path == "/dev/null":
+        return None
+    return path[2:] if path.startswith("b/") else path
+
+
+def parse_diff(output: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Changed line ranges (new-file numbering) per file of a --unified=0 diff.
+
+    A hunk that only deletes lines is "+N,0", N being the line before the
+    deletion (0 at the top of the file); it is reported as lines N and N+1,
+    the two lines around the gap, so the code there is still reviewed.
+    """
+    files: Dict[str, List[Tuple[int, int]]] = {}
+    path = None
+    for line in output.splitlines():
+        if line.startswith("+++ "):
+            path = _diff_path(line)
+            continue
+        if path is None or not line.startswith("@@"):
+            continue
+        match = HUNK_RE.match(line)
+        if not match:
+            continue
+        start = int(match.group(1))
+        count = int(match.group(2)) if match.group(2) is not None else 1
+        if count == 0:
+            files.setdefault(path, []).append((max(start, 1), start + 1))
+        else:
+            files.setdefault(path, []).append((start, start + count - 1))
+    return files
+
+
+def new_side(rev: Optional[str]) -> Optional[str]:
+    """The revision "git diff rev" compares against; None for the working tree.
+
+    A range A..B or A...B ends at B (HEAD when B is left out).
+    """
+    for dots in ("...", ".."):
+        if rev and dots in rev:
+            return rev.split(dots, 1)[1] or "HEAD"
+    return None
+
+
+def changed_lines(project_root, rev: Optional[str] = None) -> Dict:
+    """Run git diff in project_root and return the changed ranges per file.
+
+    Compares the working tree (staged or not) with ``rev``, HEAD by
+    default; ``rev`` may also be a range such as main...HEAD, whose line
+    numbers refer to the files as of its end, returned as "target" (None
+    for the working tree). Paths are relative to project_root and deleted
+    files are left out.
+    """
+    if rev and rev.startswith("-"):
+        # git would take it for an option
+        return {"error": f"Not a git revision: {rev}"}
+
+    command = [
+        "git", "-c", "core.quotePath=false", "diff", "--relative", "--unified=0",
+        "--no-color", "--no-ext-diff", "--diff-filter=d", rev or "HEAD", "--",
+    ]
+    try:
+        result = subprocess.run(command, cwd=str(project_root), capture_output=True,
+                                text=True, encoding="utf-8", errors="replace")
+    except FileNotFoundError:
+        return {"error": "git is not installed or not on PATH"}
+    except OSError as e:
+        return {"error": f"Error running git: {str(e)}"}
+
+    if result.returncode != 0:
+        message = result.stderr.strip().splitlines()
+        return {"error": f"git diff failed: {message[0] if message else result.returncode}"}
+
+    return {"rev": rev or "HEAD", "target": new_side(rev), "files": parse_diff(result.stdout)}
+
+
+def read_source(project_root, path: str, target: Optional[str] = None,
+                max_file_size: Optional[int] = None) -> Optional[str]:
+    """Text of a changed file as of target (a revision), or the working tree.
+
+    None for binary files, files over max_file_size bytes and files that
+    can't be read.
+    """
+    if target is None:
+        full = Path(project_root) / path
+        try:
+            if max_file_size and full.stat().st_size > max_file_size:
+                return None
+            data = full.read_bytes()
+        except OSError:
+            return None
+    else:
+        # "rev:./path" is relative to the working directory, like --relative
+        try:
+            result = subprocess.run(["git", "show", f"{target}:./{path}"], cwd=str(project_root),
+                                    capture_output=True)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+        data = result.stdout
+        if max_file_size and len(data) > max_file_size:
+            return None
+
+    if is_binary(data[:BINARY_SNIFF_BYTES]):
+        return None
+    return data.decode("utf-8", errors="ignore")
+
+
+def diff_excerpt(code: str, filename: str, ranges: List[Tuple[int, int]],
+                 context: int = CONTEXT_LINES, token_budget: int = 2000) -> Dict:
+    """The changed lines of a file with their enclosing functions, numbered.
+
+    Changed lines are marked with ">>". If the enclosing definitions
+    don't fit ``token_budget``, only the changes and ``context`` lines
+    around them are kept.
+    """
+    lines = code.splitlines()
+    if not lines:
+        return {"file": filename, "content": "", "lines": 0, "changed": 0, "tokens": 0}
+
+    ranges = [(min(max(start, 1), len(lines)), min(max(end, 1), len(lines))) for start, end in ranges]
+    changed = {number for start, end in ranges for number in range(start, end + 1)}
+    symbols = extract_symbols(code, filename)
+
+    def excerpt(with_symbols: bool) -> List[int]:
+        numbers = set()
+        for start, end in ranges:
+            low, high = max(1, start - context), min(len(lines), end + context)
+            if with_symbols:
+                for line in (start, end):
+                    symbol = enclosing_symbol(symbols, line)
+                    if symbol and symbol[3] - symbol[2] < MAX_ENCLOSING_LINES:
+                        low, high = min(low, symbol[2]), max(high, symbol[3])
+            numbers.update(range(low, high + 1))
+        return sorted(numbers)
+
+    numbers = excerpt(True)
+    content = numbered_lines(lines, numbers, changed)
+    if symbols and estimate_tokens(content) > token_budget:
+        numbers = excerpt(False)
+        content = numbered_lines(lines, numbers, changed)
+
+    return {
+        "file": filename,
+        "content": content,
+        "lines": len(numbers),
+        "changed": len(changed),
+        "tokens": estimate_tokens(content),
+    }
+
+
+def batch_excerpts(excerpts: List[Dict], token_budget: int = 2000) -> List[Dict]:
+    """Group excerpts, in order, into prompts of at most token_budget tokens.
+
+    An excerpt larger than the budget gets a batch of its own.
+    """
+    batches: List[Dict] = []
+    for item in excerpts:
+        if not item["content"]:
+            continue
+        section = f"### {item['file']}\n{item['content']}"
+        cost = estimate_tokens(section)
+        if batches and batches[-1]["tokens"] + cost <= token_budget:
+            batch = batches[-1]
+            batch["files"].append(item["file"])
+            batch["content"] += "\n\n" + section
+            batch["tokens"] += cost
+        else:
+            batches.append({"files": [item["file"]], "content": section, "tokens": cost})
+    return batches
+
+
+# Simple test when running directly (python -m tools.git_diff)
+if __name__ == "__main__":
+    root = Path(__file__).resolve().parent.parent
+    result = changed_lines(root)
+    if "error" in result:
+        print("Error:", result["error"])
+    else:
+        print(f"✓ {len(result['files'])} files changed since {result['rev']}")
+        excerpts = []
+        for path, ranges in result["files"].items():
+            source = read_source(root, path, result["target"])
+            if source is None:
+                continue
+            item = diff_excerpt(source, path, ranges)
+            print(f"  {path}: {len(ranges)} hunks, {item['lines']} of {len(source.splitlines())} "
+                  f"lines, ~{item['tokens']} of ~{estimate_tokens(source)} tokens")
+            excerpts.append(item)
+        print(f"✓ {len(batch_excerpts(excerpts))} batches")
+
+    assert new_side(None) is None and new_side("main") is None
+    assert new_side("main...feature") == "feature" and new_side("v1..") == "HEAD"
+    print("✓ Ranges are read as of their end")
@@ -0,0 +1,85 @@
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from typing import List, Tuple
+
+# Files whose offsets are kept; the least recently used are dropped
+MAX_FILES = 256
+
+
+class LineIndex:
+    """Byte offsets of the line starts of recently read files.
+
+    With the offsets, lines start..end are one seek and one read of just
+    those bytes, however far into the file they are. Offsets are an array
+    of ints (4 bytes per line for files under 4 GB), built with one read
+    of the file and rebuilt when its mtime or size changes. Lines end at
+    "\\n" (a trailing "\\r" is dropped), as in search results.
+    """
+
+    def __init__(self, max_files: int = MAX_FILES):
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._files: "OrderedDict[str, Tuple[Tuple[int, int], array]]" = OrderedDict()
+
+    def offsets(self, path: str) -> array:
+        """Start offset of every line, plus the file size as the last entry."""
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._files.get(path)
+            if cached and cached[0] == signature:
+                self._files.move_to_end(path)
+                return cached[1]
+
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+        # Running sum of the line lengths plus their newlines, all in C
+        starts = accumulate(map((1).__add__, map(len, data.split(b"\n"))), initial=0)
+        offsets = array("I" if len(data) < 1 << 32 else "q", starts)
+        if not data or data.endswith(b"\n"):
+            offsets.pop()  # nothing after the last newline
+        else:
+            offsets[-1] = len(data)  # last line has no newline
+
+        with self._lock:
+            self._files[path] = ((st.st_mtime_ns, st.st_size), offsets)
+            self._files.move_to_end(path)
+            while len(self._files) > self.max_files:
+                self._files.popitem(last=False)
+        return offsets
+
+    def line_count(self, path: str) -> int:
+        return len(self.offsets(path)) - 1
+
+    def lines(self, path: str, start: int = 1, end: int | None = None) -> List[str]:
+        """Lines start..end (1-based, inclusive) of a file."""
+        offsets = self.offsets(path)
+        count = len(offsets) - 1
+        start = max(1, start)
+        end = count if end is None else min(end, count)
+        if start > end:
+            return []
+
+        with open(path, 'rb') as f:
+            f.seek(offsets[start - 1])
+            data = f.read(offsets[end] - offsets[start - 1])
+        text = data.decode('utf-8', errors='ignore')
+        return [line.rstrip('\r') for line in text.split('\n')[:end - start + 1]]
+
+
+# Simple test when running directly (python -m tools.line_index)
+if __name__ == "__main__":
+    import time
+
+    index = LineIndex()
+    start = time.perf_counter()
+    total = index.line_count(__file__)
+    print(f"✓ {total} lines indexed in {(time.perf_counter() - start) * 1000:.2f} ms")
+    start = time.perf_counter()
+    lines = index.lines(__file__, total - 2, total)
+    print(f"✓ Last 3 lines read in {(time.perf_counter() - start) * 1000:.3f} ms:")
+    print("\n".join(lines))
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .walker import FileWalker, GitIgnore
+
+MANIFEST_VERSION = 1
+HASH_BLOCK = 1 << 20
+
+
+def bytes_hash(data: bytes) -> str:
+    """The digest content_hash gives a file holding these bytes."""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def content_hash(path: str) -> Optional[str]:
+    """Short BLAKE2 digest of a file's bytes, or None if it can't be read."""
+    digest = hashlib.blake2b(digest_size=8)
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class WorkspaceManifest:
+    """Persistent record of the project's directories and files.
+
+    For every directory it keeps the mtime, the valid file names and
+    subdirectories found when it was last scanned, and the .gitignore
+    files in effect. A listing only re-scans directories whose mtime (or
+    governing .gitignore) changed; the others are one stat each.
+
+    For files it keeps size, mtime and a content hash. ``update_files``
+    re-hashes only files whose size or mtime changed and reports which
+    ones actually differ, so derived caches can work from that delta.
+
+    ``generation`` goes up whenever a listing or a file record changes, so
+    in-memory caches can tell whether anything moved since they were built.
+    """
+
+    def __init__(self, walker: FileWalker, path: Path):
+        self.walker = walker
+        self.root = walker.project_root
+        self.path = Path(path)
+        self.dirs: Dict[str, List] = {}  # rel dir -> [mtime_ns, files, subdirs, own_ignore, chain]
+        self.files: Dict[str, List] = {}  # rel path -> [size, mtime_ns, hash]
+        self._settings = [
+            sorted(walker.excluded_dirs), sorted(walker.allowed_extensions), walker.use_gitignore,
+        ]
+        self._dirty = False
+        self._loaded = False
+        self.generation = 0
+        self._lock = threading.RLock()
+
+    def load(self):
+        """Load the manifest from disk (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        # Listings depend on the walker settings; start over if they changed
+        if data.get("version") != MANIFEST_VERSION or data.get("settings") != self._settings:
+            return
+
+        self.dirs = data["dirs"]
+        self.files = data["files"]
+
+    def save(self):
+        """Write the manifest back to disk if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": MANIFEST_VERSION,
+                "settings": self._settings,
+                "dirs": self.dirs,
+                "files": self.files,
+            }
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Per-process temp name: the CLI and a daemon may save at once
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def _rel(self, path: str) -> str:
+        return "." if path == self.root else path[len(self.root) + 1:]
+
+    @staticmethod
+    def _join(rel_dir: str, name: str) -> str:
+        return name if rel_dir == "." else rel_dir + os.sep + name
+
+    def _ignore_signature(self, directory: str) -> Optional[List[int]]:
+        if not self.walker.use_gitignore:
+            return None
+        try:
+            st = os.stat(os.path.join(directory, '.gitignore'))
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def _ancestor_chain(self, directory: str) -> List[List]:
+        """.gitignore signatures of the directories above ``directory``."""
+        chain = []
+        rel = self._rel(directory)
+        parts = [] if rel == "." else rel.split(os.sep)
+        current = self.root
+        for part in parts:
+            signature = self._ignore_signature(current)
+            if signature:
+                chain.append([self._rel(current)] + signature)
+            current = os.path.join(current, part)
+        return chain
+
+    def list(self, directory: str, recursive: bool = True) -> List[str]:
+        """Relative paths of the valid files under a directory inside the project."""
+        with self._lock:
+            self.load()
+            return self._list(os.path.abspath(directory), recursive)
+
+    def _list(self, start: str, recursive: bool) -> List[str]:
+        parsed = {}  # .gitignore files parsed during this refresh
+
+        def ignores_for(chain):
+            ignores = []
+            for rel_dir, *_ in chain:
+                base = self.root if rel_dir == "." else os.path.join(self.root, rel_dir)
+                if base not in parsed:
+                    parsed[base] = GitIgnore.from_file(os.path.join(base, '.gitignore'))
+                if parsed[base]:
+                    ignores.append((base, parsed[base]))
+            return ignores
+
+        files = []
+        seen = set()
+        stack = [(start, self._ancestor_chain(start))]
+
+        while stack:
+            current, chain = stack.pop()
+            rel = self._rel(current)
+
+            try:
+                mtime = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+
+            record = self.dirs.get(rel)
+            fresh = False
+            if record and record[0] == mtime and record[4] == chain:
+                # A .gitignore can be edited in place without touching the directory
+                own = self._ignore_signature(current) if record[3] else None
+                fresh = own == record[3]
+
+            if not fresh:
+                own = self._ignore_signature(current)
+                scope = chain + ([[rel] + own] if own else [])
+                try:
+                    names, subdirs = self.walker.scan_dir(current, ignores_for(scope))
+                except OSError:
+                    continue
+                old, record = record, [mtime, sorted(names), sorted(subdirs), own, chain]
+                if old is None or old[1:3] != record[1:3]:
+                    self.generation += 1
+                self.dirs[rel] = record
+                self._dirty = True
+
+            seen.add(rel)
+            files.extend(self._join(rel, name) for name in record[1])
+
+            if recursive:
+                own = record[3]
+                child_chain = chain + ([[rel] + own] if own else [])
+                for name in reversed(record[2]):
+                    stack.append((os.path.join(current, name), child_chain))
+
+        if recursive:
+            self._prune(self._rel(start), seen)
+
+        return files
+
+    def _prune(self, rel_start: str, seen: set):
+        """Forget directories under rel_start that no longer exist or are now excluded."""
+        prefix = "" if rel_start == "." else rel_start + os.sep
+        gone = [
+            rel for rel in self.dirs
+            if rel not in seen and (rel_start == "." or rel == rel_start or rel.startswith(prefix))
+        ]
+        for rel in gone:
+            del self.dirs[rel]
+        if gone:
+            self._dirty = True
+            self.generation += 1
+
+    def update_files(self, paths: Iterable[str], prune: bool = False) -> Dict[str, List[str]]:
+        """Refresh size/mtime/hash for the given files.
+
+        Returns the delta: files that are new, whose content changed, and
+        (with ``prune``, when ``paths`` is the whole project) that are gone.
+        """
+        with self._lock:
+            self.load()
+            paths = list(paths)
+            delta = {"added": [], "modified": [], "removed": []}
+
+            prefix = self.root + os.sep
+            for rel_path in paths:
+                full = rel_path if os.path.isabs(rel_path) else prefix + rel_path
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    if self.files.pop(rel_path, None):
+                        delta["removed"].append(rel_path)
+                        self.generation += 1
+                    continue
+
+                known = self.files.get(rel_path)
+                if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                    continue
+
+                digest = content_hash(full)
+                if known is None:
+                    delta["added"].append(rel_path)
+                elif known[2] != digest:
+                    delta["modified"].append(rel_path)
+                self.files[rel_path] = [st.st_size, st.st_mtime_ns, digest]
+                self._dirty = True
+                self.generation += 1
+
+            if prune:
+                current = set(paths)
+                for rel_path in [p for p in self.files if p not in current]:
+                    del self.files[rel_path]
+                    delta["removed"].append(rel_path)
+                    self._dirty = True
+                    self.generation += 1
+
+            return delta
+
+    def hashes(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Content hashes recorded by the last ``update_files``."""
+        with self._lock:
+            return {path: self.files[path][2] for path in paths if path in self.files}
+
+    def mtimes(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Modification times (ns) recorded by the last ``update_files``."""
+        with self._lock:
+            return {path: self.files[path][1] for path in paths if path in self.files}
@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List
+
+# Timing and token fields Ollama reports with the final chunk of an answer
+# (durations are in nanoseconds)
+OLLAMA_FIELDS = (
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+    "total_duration",
+)
+
+
+def request_stats(response, elapsed: float, cached: bool = False, error: bool = False,
+                  **extra) -> Dict:
+    """Stats of one model request: wall time plus whatever Ollama reported.
+
+    ``extra`` adds fields of our own, e.g. the model a request was routed to.
+    """
+    stats = {"wall_ms": round(elapsed * 1000, 2), "cached": cached, **extra}
+    if error:
+        stats["error"] = True
+    if response is not None:
+        for field in OLLAMA_FIELDS:
+            value = response.get(field)
+            if value is not None:
+                stats[field] = value
+    return stats
+
+
+class NullProfiler:
+    """Records nothing; the default wherever no command is being profiled."""
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def add_request(self, stats: Dict):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    """Per-phase wall-clock timings of one command.
+
+    Phases are exclusive: a phase entered inside another (e.g. "walk"
+    inside a search) pauses the outer one, so the phases add up to the
+    time actually spent. Model requests are added with ``add_request``
+    and counted under "model"; requests made in parallel (chunked
+    explain) are summed, so "model" can exceed the wall-clock total.
+    """
+
+    def __init__(self, command: str = "", args: List[str] | None = None):
+        self.command = command
+        self.args = list(args or [])
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _add(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        now = time.perf_counter()
+        if stack:
+            self._add(stack[-1][0], now - stack[-1][1])
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            name, start = stack.pop()
+            self._add(name, now - start)
+            if stack:
+                stack[-1][1] = now
+
+    def add_request(self, stats: Dict):
+        with self._lock:
+            self.requests.append(stats)
+        self._add("model", stats["wall_ms"] / 1000)
+
+    def model_summary(self) -> Dict:
+        """Totals over the model requests, with prefill and decode rates."""
+        def total(field):
+            return sum(request.get(field, 0) for request in self.requests)
+
+        summary = {
+            "requests": len(self.requests),
+            "cached": sum(1 for request in self.requests if request.get("cached")),
+            "load_ms": round(total("load_duration") / 1e6, 2),
+            "prefill_ms": round(total("prompt_eval_duration") / 1e6, 2),
+            "decode_ms": round(total("eval_duration") / 1e6, 2),
+            "prompt_tokens": total("prompt_eval_count"),
+            "output_tokens": total("eval_count"),
+        }
+        if summary["prefill_ms"]:
+            summary["prefill_tokens_per_sec"] = round(summary["prompt_tokens"] / (summary["prefill_ms"] / 1000), 1)
+        if summary["decode_ms"]:
+            summary["decode_tokens_per_sec"] = round(summary["output_tokens"] / (summary["decode_ms"] / 1000), 1)
+        return summary
+
+    def record(self) -> Dict:
+        """The metrics-log record for this command."""
+        total = time.perf_counter() - self._start
+        with self._lock:
+            phases = dict(self.phases)
+            requests = list(self.requests)
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "command": self.command,
+            "args": self.args,
+            "total_ms": round(total * 1000, 2),
+            "phases": {name: round(seconds * 1000, 2) for name, seconds in phases.items()},
+            "model": self.model_summary(),
+            "requests": requests,
+        }
+
+    def summary(self) -> List[str]:
+        """Human-readable lines for --profile."""
+        record = self.record()
+        lines = [f"Total {record['total_ms']:.1f} ms"]
+        accounted = 0.0
+        for name, ms in sorted(record["phases"].items(), key=lambda item: -item[1]):
+            accounted += ms
+            lines.append(f"  {name:<10} {ms:>10.1f} ms")
+        if record["total_ms"] > accounted:
+            lines.append(f"  {'other':<10} {record['total_ms'] - accounted:>10.1f} ms")
+
+        model = record["model"]
+        if model["requests"]:
+            line = f"Model: {model['requests']} request(s)"
+            if model["cached"]:
+                line += f", {model['cached']} cached"
+            line += (f"; load {model['load_ms']:.0f} ms, prefill {model['prompt_tokens']} tokens "
+                     f"in {model['prefill_ms']:.0f} ms")
+            if "prefill_tokens_per_sec" in model:
+                line += f" ({model['prefill_tokens_per_sec']:.0f}/s)"
+            line += f", decode {model['output_tokens']} tokens in {model['decode_ms']:.0f} ms"
+            if "decode_tokens_per_sec" in model:
+                line += f" ({model['decode_tokens_per_sec']:.1f}/s)"
+            lines.append(line)
+        return lines
+
+
+def append_record(path, record: Dict):
+    """Append one record to a JSONL metrics log."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+# Simple test when running directly (python -m tools.profiler)
+if __name__ == "__main__":
+    profiler = Profiler("search", ["TODO"])
+    with profiler.phase("walk"):
+        time.sleep(0.01)
+        with profiler.phase("read"):
+            time.sleep(0.02)
+    profiler.add_request(request_stats(
+        {"prompt_eval_count": 120, "prompt_eval_duration": 60_000_000,
+         "eval_count": 40, "eval_duration": 400_000_000, "load_duration": 0},
+        0.5,
+    ))
+    print("\n".join(profiler.summary()))
+    print(json.dumps(profiler.record(), indent=2))
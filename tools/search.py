@@ -1,127 +1,654 @@
+import heapq
+import mmap
+import os
 import re
-from typing import List, Dict
+import time
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from typing import Iterator, List, Dict, Optional, Tuple
 from pathlib import Path
 
+from .chunker import estimate_tokens
+from .fuzzy import FuzzyIndex
+from .symbols import FUNCTION_KINDS, TYPE_KINDS, SymbolIndex
+from .trigram_index import TrigramIndex
+
+# Below this many files the pool start-up costs more than it saves
+PARALLEL_MIN_FILES = 200
+# Shards per worker, so one slow shard doesn't leave the other workers idle
+SHARDS_PER_JOB = 4
+# A NUL byte in this many leading bytes marks a file as binary
+BINARY_SNIFF_BYTES = 8192
+# Mapped files are inspected in blocks of this size, so no single step
+# copies the whole mapping
+BLOCK_SIZE = 1 << 20
+# Longest definition body included in a usage context
+MAX_DEFINITION_LINES = 80
+# Matches search_code returns when no limit is given
+MAX_RESULTS = 100
+
+# Lines that define something rather than use it; ranked first
+_DEFINITION_LINE = re.compile(
+    r"(?:export\s+)?(?:default\s+)?(?:(?:public|private|protected|static|async|pub|abstract)\s+)*"
+    r"(?:def|class|function|func|fn|struct|interface|enum|trait|type|impl)\b"
+)
+
+# Besides non-ASCII bytes, these are where the ASCII and Unicode meanings
+# of \s differ
+_UNICODE_SPACES = (b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+# Constructs that behave differently on one line than on a whole buffer
+_LINE_ONLY = re.compile(r"\\[AZ]|\(\?<?[=!]")
+
+
+def compile_query(query: str, case_sensitive: bool = False) -> "re.Pattern":
+    """Compile a search query, treating invalid regexes as literal text."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+
+    # Try to compile as regex; if it fails, escape and treat as literal
+    try:
+        return re.compile(query, flags)
+    except re.error:
+        return re.compile(re.escape(query), flags)
+
+
+def is_binary(head: bytes) -> bool:
+    return b"\0" in head
+
+
+@lru_cache(maxsize=64)
+def buffer_patterns(pattern: "re.Pattern") -> Tuple[Optional["re.Pattern"], Optional["re.Pattern"]]:
+    """Whole-buffer (MULTILINE) twins of a line pattern: (bytes, str).
+
+    Every line the line pattern matches contains the start of a match of
+    its twin, so the twins can be used to jump from hit to hit; each hit
+    is then confirmed against its line with the original pattern. A twin
+    is None where that doesn't hold.
+    """
+    source = pattern.pattern
+    if _LINE_ONLY.search(source):
+        return None, None
+
+    text_twin = re.compile(source, pattern.flags | re.MULTILINE)
+    bytes_twin = None
+    if source.isascii():
+        try:
+            bytes_twin = re.compile(source.encode("ascii"), (pattern.flags & ~re.UNICODE) | re.MULTILINE)
+        except re.error:
+            pass  # e.g. an inline (?u) flag
+    return bytes_twin, text_twin
+
+
+def _is_plain(buf: mmap.mmap) -> bool:
+    """Whether a bytes pattern sees the same text as its str original."""
+    for block in range(0, len(buf), BLOCK_SIZE):
+        if not buf[block:block + BLOCK_SIZE].isascii():
+            return False
+    return all(buf.find(byte) == -1 for byte in _UNICODE_SPACES)
+
+
+def _count_newlines(buf, start: int, end: int) -> int:
+    if isinstance(buf, str):
+        return buf.count("\n", start, end)
+    count = 0
+    for block in range(start, end, BLOCK_SIZE):
+        count += buf[block:min(block + BLOCK_SIZE, end)].count(b"\n")
+    return count
+
+
+def _match(file_path: str, line_no: int, line: str, found: "re.Match") -> Dict:
+    match = {
+        "line": line_no,
+        "content": line.strip(),
+        "file": file_path,
+    }
+    if found.lastgroup:
+        match["rule"] = found.lastgroup
+    return match
+
+
+def _line(buf, start: int, stop: int) -> str:
+    line = buf[start:stop]
+    if not isinstance(line, str):
+        line = line.decode("ascii")
+    return line.removesuffix("\r")
+
+
+def search_buffer(buf, file_path: str, pattern: "re.Pattern", twin: "re.Pattern",
+                  count: bool = False) -> List[Dict] | int:
+    """Find matching lines by searching a whole buffer (bytes, mmap or str).
+
+    Line numbers are only worked out for hits, by counting the newlines
+    since the previous hit. With count, only the number of matching lines
+    is returned, and neither line numbers nor match dicts are made.
+    """
+    newline, return_ = ("\n", "\r") if isinstance(buf, str) else (b"\n", b"\r")
+    matches = []
+    hits = 0
+    line_no = 1
+    counted = 0
+    pos = 0
+    size = len(buf)
+
+    while pos < size:
+        found = twin.search(buf, pos)
+        if not found:
+            break
+
+        start = buf.rfind(newline, 0, found.start()) + 1
+        if start == size:
+            break  # past the final newline: not a line of its own
+        stop = buf.find(newline, found.start())
+        if stop == -1:
+            stop = size
+
+        # A CRLF line ends at its "\r". A match reaching the end of the line
+        # (e.g. "\s" or "\W" matching the "\r", or "\B" on an empty line)
+        # may depend on what follows, so the line itself decides
+        end = stop - 1 if stop > start and buf[stop - 1:stop] == return_ else stop
+
+        line = None
+        if found.end() < end:
+            hit = found  # within one line, the twin matches where the original does
+        else:
+            line = _line(buf, start, stop)
+            hit = pattern.search(line)  # matched across lines: the line itself decides
+
+        if hit and count:
+            hits += 1
+        elif hit:
+            line_no += _count_newlines(buf, counted, start)
+            counted = start
+            matches.append(_match(file_path, line_no, line or _line(buf, start, stop), hit))
+        pos = stop + 1
+
+    return hits if count else matches
+
+
+def scan_file(project_root: Path, file_path: str, pattern: "re.Pattern",
+              max_file_size: int | None = None, count: bool = False) -> List[Dict] | int:
+    """Match a compiled pattern against every line of a file.
+
+    The file is memory-mapped and searched as one buffer, as bytes when
+    both the pattern and the file are plain ASCII. Binary files and files
+    over max_file_size bytes are skipped. With count, returns the number
+    of matching lines instead of the matches.
+    """
+    skipped = 0 if count else []
+    path = Path(file_path)
+    if not path.is_absolute():
+        path = Path(project_root) / path
+
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or (max_file_size and size > max_file_size):
+                return skipped
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if is_binary(buf[:BINARY_SNIFF_BYTES]):
+                    return skipped
+                return _scan_mapped(buf, file_path, pattern, count)
+    except (OSError, ValueError):
+        return skipped
+
+
+def _scan_mapped(buf: mmap.mmap, file_path: str, pattern: "re.Pattern",
+                 count: bool = False) -> List[Dict] | int:
+    bytes_twin, text_twin = buffer_patterns(pattern)
+
+    # "$" can't match before the "\r" of a CRLF line in buffer mode
+    if text_twin is not None and "$" in pattern.pattern and buf.find(b"\r") != -1:
+        bytes_twin = text_twin = None
+
+    if bytes_twin is not None and _is_plain(buf):
+        return search_buffer(buf, file_path, pattern, bytes_twin, count)
+
+    text = str(buf, 'utf-8', 'ignore')
+    if text_twin is not None:
+        return search_buffer(text, file_path, pattern, text_twin, count)
+
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()  # the file ends with a newline
+
+    if count:
+        return sum(1 for line in lines if pattern.search(line.removesuffix("\r")))
+
+    matches = []
+    for i, line in enumerate(lines, start=1):
+        line = line.removesuffix("\r")
+        found = pattern.search(line)
+        if found:
+            matches.append(_match(file_path, i, line, found))
+    return matches
+
+
+def scan_shard(project_root: Path, files: List[str], pattern: "re.Pattern",
+               max_file_size: int | None = None, count: bool = False) -> List[Tuple[str, List[Dict] | int]]:
+    """Scan a shard of files; runs inside a worker process or thread.
+
+    Returns (file, matches or count) for the files with matches.
+    """
+    results = []
+    for file_path in files:
+        found = scan_file(project_root, file_path, pattern, max_file_size, count)
+        if found:
+            results.append((file_path, found))
+    return results
+
 
 class CodeSearch:
-    def __init__(self, file_ops):
+    def __init__(self, file_ops, use_index: bool = True, jobs: int = 1, backend: str = "process"):
         # file_ops is an instance of FileOperations
         self.file_ops = file_ops
+        self.index = None
+        # jobs > 1 scans large trees in a pool; "process" or "thread" backend
+        self.jobs = jobs
+        self.backend = backend
+        self._executor = None
+        # Larger files (typically generated or minified) are skipped
+        self.max_file_size = int(file_ops.config.get("max_file_size_mb", 10) * 1024 * 1024)
 
-    def search_in_file(self, file_path: str, query: str, case_sensitive: bool = False) -> List[Dict]:
-        """Search for a query in a single file."""
-        result = self.file_ops.read_file(file_path)
+        if use_index:
+            self.index = TrigramIndex(
+                file_ops.project_root, file_ops.cache_dir / "trigram_index.json",
+                max_file_size=self.max_file_size,
+            )
+        self.symbols = SymbolIndex(file_ops, max_file_size=self.max_file_size)
+        # (listing or names, FuzzyIndex over them) for find
+        self._fuzzy_files = None
+        self._fuzzy_symbols = None
+        self._fuzzy_checked = 0.0
 
-        if "error" in result:
-            return []
+    def search_in_file(self, file_path: str, query: str, case_sensitive: bool = False,
+                       before: int = 0, after: int = 0) -> List[Dict]:
+        """Search for a query in a single file, with optional context lines (see add_context)."""
+        return self.add_context(self._search_file(file_path, compile_query(query, case_sensitive)),
+                                before, after)
 
-        content = result["content"]
-        lines = content.splitlines()
+    def add_context(self, matches: List[Dict], before: int = 0, after: int = 0) -> List[Dict]:
+        """Give each match a "context": ``before`` and ``after`` lines around it.
 
-        matches = []
-        flags = 0 if case_sensitive else re.IGNORECASE
+        The context is {"start": first line number, "lines": [...]} and
+        includes the matching line itself, unstripped. Lines are read by
+        seeking through the file's cached line offsets, so many matches in
+        one file don't re-read it.
+        """
+        if not before and not after:
+            return matches
+        for match in matches:
+            start = max(1, match["line"] - before)
+            text = self.file_ops.read_lines(match["file"], start, match["line"] + after)
+            if "error" not in text:
+                match["context"] = {"start": start, "lines": text["content"].split("\n")}
+        return matches
+
+    def _search_file(self, file_path: str, pattern: "re.Pattern") -> List[Dict]:
+        return scan_file(self.file_ops.project_root, file_path, pattern, self.max_file_size)
+
+    def _scan(self, files: List[str], pattern: "re.Pattern") -> List[Dict]:
+        """All matches in the files, in file/line order."""
+        with self.file_ops.profiler.phase("scan"):
+            return [match for _, found in self._iter_scan(files, pattern) for match in found]
+
+    def _iter_scan(self, files: List[str], pattern: "re.Pattern",
+                   count: bool = False) -> Iterator[Tuple[str, List[Dict] | int]]:
+        """Yield (file, matches), or (file, count) with count, for files with matches.
+
+        Files are scanned serially, or sharded across a pool for large
+        trees. Shards are contiguous slices of the sorted file list, taken
+        in order, so results are always in file/line order. Only a few
+        shards are in flight at a time, so a consumer that stops early
+        stops the scan too.
+        """
+        if self.jobs <= 1 or len(files) < PARALLEL_MIN_FILES:
+            for file_path in files:
+                found = scan_file(self.file_ops.project_root, file_path, pattern, self.max_file_size, count)
+                if found:
+                    yield file_path, found
+            return
+
+        shard_count = min(len(files), self.jobs * SHARDS_PER_JOB)
+        shard_size = -(-len(files) // shard_count)
+        shards = (files[i:i + shard_size] for i in range(0, len(files), shard_size))
+
+        executor = self._get_executor()
+        root = self.file_ops.project_root
+
+        def submit(shard):
+            return executor.submit(scan_shard, root, shard, pattern, self.max_file_size, count)
 
-        # Try to compile as regex; if it fails, escape and treat as literal
+        in_flight = deque(submit(shard) for shard in islice(shards, self.jobs * 2))
         try:
-            pattern = re.compile(query, flags)
-        except re.error:
-            pattern = re.compile(re.escape(query), flags)
-
-        for i, line in enumerate(lines, start=1):
-            if pattern.search(line):
-                matches.append(
-                    {
-                        "line": i,
-                        "content": line.strip(),
-                        "file": file_path,
-                    }
-                )
+            while in_flight:
+                results = in_flight.popleft().result()
+                in_flight.extend(submit(shard) for shard in islice(shards, 1))
+                yield from results
+        finally:
+            for future in in_flight:
+                future.cancel()
 
-        return matches
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-    def search_code(self, query: str, directory: str = ".", case_sensitive: bool = False) -> Dict:
-        """Search for a query across all valid files in the project."""
-        files_result = self.file_ops.list_files(directory, recursive=True)
+            if self.backend == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.jobs)
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+        return self._executor
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
+    def _plan(self, query: str, directory: str, case_sensitive: bool) -> Dict:
+        """List the directory, compile the query and narrow the files to scan."""
+        files_result = self.file_ops.list_files(directory, recursive=True)
         if "error" in files_result:
             return {"error": files_result["error"]}
 
-        all_matches = []
-        files_with_matches = set()
+        pattern = compile_query(query, case_sensitive)
+        return {
+            "files_result": files_result,
+            "pattern": pattern,
+            "files": self._candidate_files(files_result, [pattern]),
+        }
+
+    def iter_search(self, query: str, directory: str = ".", case_sensitive: bool = False) -> Iterator[Dict]:
+        """Yield matches as they are found, in file/line order.
 
-        for file_path in files_result["files"]:
-            matches = self.search_in_file(file_path, query, case_sensitive)
-            if matches:
-                all_matches.extend(matches)
-                files_with_matches.add(file_path)
+        Files are only read as matches are consumed, so stopping early
+        (break, islice) skips the rest of the tree. Raises ValueError if
+        the directory can't be listed.
+        """
+        plan = self._plan(query, directory, case_sensitive)
+        if "error" in plan:
+            raise ValueError(plan["error"])
 
+        for _, found in self._iter_scan(plan["files"], plan["pattern"]):
+            yield from found
+
+    def search_code(self, query: str, directory: str = ".", case_sensitive: bool = False,
+                    limit: int | None = None, count_only: bool = False, rank: bool = False,
+                    before: int = 0, after: int = 0) -> Dict:
+        """Search for a query across all valid files in the project.
+
+        By default every match is counted and the first MAX_RESULTS are
+        returned. With ``limit``, at most that many are returned and the
+        scan stops once they are found (``complete`` is then False). With
+        ``rank``, the whole tree is scanned but only the best ``limit``
+        matches are kept, in a bounded heap: definitions first, then the
+        most recently modified files. ``count_only`` counts matching lines
+        without building the matches. ``before``/``after`` add context
+        lines to the returned matches (see add_context).
+        """
+        plan = self._plan(query, directory, case_sensitive)
+        if "error" in plan:
+            return {"error": plan["error"]}
+
+        files, pattern = plan["files"], plan["pattern"]
+        keep = MAX_RESULTS if limit is None else max(0, limit)
+        total = 0
+        files_with_matches = 0
+        matches = []
+        complete = True
+
+        with self.file_ops.profiler.phase("scan"):
+            if count_only:
+                for _, count in self._iter_scan(files, pattern, count=True):
+                    total += count
+                    files_with_matches += 1
+            elif rank:
+                matches, total, files_with_matches = self._ranked(files, pattern, keep)
+            else:
+                scan = self._iter_scan(files, pattern)
+                for _, found in scan:
+                    total += len(found)
+                    files_with_matches += 1
+                    matches.extend(found[:keep - len(matches)])
+                    if limit is not None and len(matches) >= keep:
+                        complete = False
+                        break
+                scan.close()
+
+        self.add_context(matches, before, after)
         return {
             "query": query,
-            "total_matches": len(all_matches),
-            "files_searched": files_result["count"],
-            "files_with_matches": len(files_with_matches),
-            "matches": all_matches[:100],  # limit to 100 results
+            "total_matches": total,
+            "files_searched": plan["files_result"]["count"],
+            "files_scanned": len(files),
+            "files_with_matches": files_with_matches,
+            "complete": complete,
+            "matches": matches,
         }
 
-    def find_function(self, function_name: str, directory: str = ".") -> Dict:
-        """Find function definitions by name in various languages."""
-        patterns = [
-            rf"\bdef\s+{function_name}\s*\(",  # Python
-            rf"\bfunction\s+{function_name}\s*\(",  # JavaScript
-            rf"\bconst\s+{function_name}\s*=",  # JS arrow function
-            rf"\b{function_name}\s*:\s*function",  # JS object method
-            rf"\b(public|private|protected|static)?\s*\w+\s+{function_name}\s*\(",  # Java/C#/C++
-            rf"\bfunc\s+{function_name}\s*\(",  # Go
-            rf"\bfn\s+{function_name}\s*\(",  # Rust
-        ]
+    def _ranked(self, files: List[str], pattern: "re.Pattern", keep: int) -> Tuple[List[Dict], int, int]:
+        """Scan every file, keeping the ``keep`` best matches in a min-heap.
+
+        Returns (best matches, total matches, files with matches).
+        """
+        mtimes = self.file_ops.manifest.mtimes(files)
+        heap = []
+        total = 0
+        files_with_matches = 0
+
+        for file_path, found in self._iter_scan(files, pattern):
+            files_with_matches += 1
+            mtime = mtimes.get(file_path)
+            if mtime is None:
+                try:
+                    mtime = os.stat(self.file_ops.project_root / file_path).st_mtime_ns
+                except OSError:
+                    mtime = 0
+
+            for match in found:
+                # The negative running count keeps keys unique and earlier
+                # matches ahead on ties
+                total += 1
+                key = (_DEFINITION_LINE.match(match["content"]) is not None, mtime, -total)
+                if len(heap) < keep:
+                    heapq.heappush(heap, (key, match))
+                elif heap and key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, match))
+
+        return [match for _, match in sorted(heap, key=lambda item: item[0], reverse=True)], total, files_with_matches
+
+    def _candidate_files(self, files_result: Dict, patterns: List["re.Pattern"]) -> List[str]:
+        """Use the trigram index to drop files that cannot match any pattern."""
+        files = files_result["files"]
+
+        if self.index is None:
+            return files
 
-        all_matches = []
+        directory = Path(files_result["directory"]).resolve()
+        prune = directory == self.file_ops.project_root
+        # Only files whose content hash changed get re-indexed
+        self.file_ops.changed_files(files, prune=prune)
+        with self.file_ops.profiler.phase("index"):
+            self.index.refresh(files, prune=prune, signatures=self.file_ops.manifest.hashes(files))
+            try:
+                self.index.save()
+            except OSError:
+                pass  # a read-only checkout still gets the in-memory index
 
+        candidates = set()
         for pattern in patterns:
-            result = self.search_code(pattern, directory, case_sensitive=True)
-            if "matches" in result:
-                all_matches.extend(result["matches"])
-
-        # Remove duplicates by (file, line)
-        seen = set()
-        unique_matches = []
-        for match in all_matches:
-            key = (match["file"], match["line"])
-            if key not in seen:
-                seen.add(key)
-                unique_matches.append(match)
+            narrowed = self.index.candidates(pattern, files)
+            if narrowed is None:
+                return files  # no trigrams to go on: full scan
+            candidates.update(narrowed)
 
-        return {
-            "function": function_name,
-            "total_matches": len(unique_matches),
-            "matches": unique_matches,
-        }
+        return [path for path in files if path in candidates]
+
+    def _symbol_files(self, directory: str) -> Dict:
+        """List a directory and bring the symbol index up to date for it."""
+        files_result = self.file_ops.list_files(directory, recursive=True)
+        if "error" in files_result:
+            return files_result
+
+        prune = Path(files_result["directory"]).resolve() == self.file_ops.project_root
+        with self.file_ops.profiler.phase("index"):
+            self.symbols.update(files_result["files"], prune=prune)
+            try:
+                self.symbols.save()
+            except OSError:
+                pass
+        return files_result
+
+    def find_symbols(self, name: str, kinds: Optional[set] = None, directory: str = ".") -> Dict:
+        """Definitions named ``name`` (an identifier, ``prefix.*`` or a regex)."""
+        files_result = self._symbol_files(directory)
+        if "error" in files_result:
+            return {"error": files_result["error"]}
+        files = set(files_result["files"])
+
+        if re.fullmatch(r"[\w$~]+", name):
+            matches = self.symbols.lookup(name, kinds, files)
+        elif re.fullmatch(r"[\w$]+\.\*", name):
+            matches = self.symbols.prefix(name[:-2], kinds, files)
+        else:
+            try:
+                pattern = re.compile(name)
+            except re.error as e:
+                return {"error": f"Invalid pattern: {str(e)}"}
+            matches = self.symbols.matching(pattern, kinds, files)
+
+        matches.sort(key=lambda match: (match["file"], match["line"]))
+        for match in matches:
+            # The definition line, for display
+            text = self.file_ops.read_lines(match["file"], match["line"], match["line"])
+            match["content"] = text["content"].strip() if "error" not in text else ""
+        return {"total_matches": len(matches), "matches": matches}
+
+    def find_function(self, function_name: str, directory: str = ".") -> Dict:
+        """Find function and method definitions by name in various languages."""
+        result = self.find_symbols(function_name, FUNCTION_KINDS, directory)
+        if "error" in result:
+            return {"function": function_name, "total_matches": 0, "matches": [], "error": result["error"]}
+        return {"function": function_name, **result}
 
     def find_class(self, class_name: str, directory: str = ".") -> Dict:
         """Find class or type definitions by name."""
-        patterns = [
-            rf"\bclass\s+{class_name}\s*[:\(]",  # Python, Java, C++, C#
-            rf"\binterface\s+{class_name}\b",  # TypeScript/Java
-            rf"\bstruct\s+{class_name}\b",  # C/C++/Rust/Go
+        result = self.find_symbols(class_name, TYPE_KINDS, directory)
+        if "error" in result:
+            return {"class": class_name, "total_matches": 0, "matches": [], "error": result["error"]}
+        return {"class": class_name, **result}
+
+    def find(self, query: str, limit: int = 20, directory: str = ".") -> Dict:
+        """Fuzzy-match file paths and symbol names.
+
+        The query's characters must appear in order, e.g. "tsrch" finds
+        tools/search.py. Both indexes are kept until the listing or the
+        symbol table changes, so in a shell or the daemon repeated queries
+        only pay for the matching.
+        """
+        files_result = self.file_ops.list_files(directory, recursive=True)
+        if "error" in files_result:
+            return {"error": files_result["error"]}
+        files = files_result["files"]
+
+        # In a warm session, the symbols refreshed by a query less than
+        # listing_ttl seconds ago for the same files are still current
+        ttl = self.file_ops.listing_ttl
+        if not (ttl and time.monotonic() - self._fuzzy_checked < ttl
+                and self._fuzzy_files is not None and self._fuzzy_files[0] == files):
+            files_result = self._symbol_files(directory)
+            if "error" in files_result:
+                return {"error": files_result["error"]}
+            files = files_result["files"]
+            self._fuzzy_checked = time.monotonic()
+
+        with self.file_ops.profiler.phase("index"):
+            if self._fuzzy_files is None or self._fuzzy_files[0] != files:
+                self._fuzzy_files = (files, FuzzyIndex(files, os.sep))
+            names = self.symbols.names()
+            if self._fuzzy_symbols is None or self._fuzzy_symbols[0] is not names:
+                self._fuzzy_symbols = (names, FuzzyIndex(names))
+
+        with self.file_ops.profiler.phase("match"):
+            paths = self._fuzzy_files[1].search(query, limit)
+
+            # The symbol table covers the whole project
+            whole_project = Path(files_result["directory"]).resolve() == self.file_ops.project_root
+            in_directory = None if whole_project else set(files)
+            symbols = []
+            for name in self._fuzzy_symbols[1].search(query, None):
+                if len(symbols) >= limit:
+                    break
+                definitions = self.symbols.lookup(name, files=in_directory)
+                if definitions:
+                    first = min(definitions, key=lambda match: (match["file"], match["line"]))
+                    symbols.append({**first, "definitions": len(definitions)})
+
+        return {"query": query, "files": paths, "symbols": symbols}
+
+    def usage_context(self, function_name: str, directory: str = ".", max_sites: int = 20,
+                      radius: int = 2, token_budget: int = 2000) -> Dict:
+        """The definitions of a function and the lines around its call sites.
+
+        This is what the model needs to explain how a function is used,
+        without sending the whole files it appears in. Sections are added
+        definitions first and stop once ``token_budget`` is reached.
+        """
+        if not re.fullmatch(r"\w+", function_name):
+            return {"error": "Usage lookups need a plain function name"}
+        definitions = self.find_function(function_name, directory)
+        if "error" in definitions:
+            return {"error": definitions["error"]}
+
+        files_result = self.file_ops.list_files(directory, recursive=True)
+        if "error" in files_result:
+            return {"error": files_result["error"]}
+        pattern = re.compile(rf"\b{function_name}\s*\(")
+        own_lines = {(d["file"], d["line"]) for d in definitions["matches"]}
+        call_sites = [
+            match for match in self._scan(self._candidate_files(files_result, [pattern]), pattern)
+            if (match["file"], match["line"]) not in own_lines
         ]
 
-        all_matches = []
+        sections = []
+        used = 0
+        for definition in definitions["matches"]:
+            end = min(definition["end"], definition["line"] + MAX_DEFINITION_LINES - 1)
+            text = self.file_ops.read_lines(definition["file"], definition["line"], end)
+            if "error" in text:
+                continue
+            section = (f"# Definition in {definition['file']} "
+                       f"(lines {definition['line']}-{text['end']})\n{text['content']}")
+            cost = estimate_tokens(section)
+            if sections and used + cost > token_budget:
+                break
+            sections.append(section)
+            used += cost
 
-        for pattern in patterns:
-            result = self.search_code(pattern, directory, case_sensitive=True)
-            if "matches" in result:
-                all_matches.extend(result["matches"])
+        included = 0
+        for site in call_sites[:max_sites]:
+            text = self.file_ops.read_lines(site["file"], max(1, site["line"] - radius), site["line"] + radius)
+            if "error" in text:
+                continue
+            section = f"# Call site in {site['file']}:{site['line']}\n{text['content']}"
+            cost = estimate_tokens(section)
+            if used + cost > token_budget:
+                break
+            sections.append(section)
+            used += cost
+            included += 1
 
         return {
-            "class": class_name,
-            "total_matches": len(all_matches),
-            "matches": all_matches,
+            "function": function_name,
+            "definitions": definitions["matches"],
+            "call_sites": call_sites,
+            "sites_included": included,
+            "context": "\n\n".join(sections),
         }
 
 
-# Simple test when running directly
+# Simple test when running directly (python -m tools.search)
 if __name__ == "__main__":
-    from file_ops import FileOperations
+    from tools.file_ops import FileOperations
 
     print("Testing Code Search...")
     ops = FileOperations()
@@ -132,3 +659,15 @@ if __name__ == "__main__":
         print("Error:", result["error"])
     else:
         print(f"✓ Found {result['total_matches']} matches in {result['files_with_matches']} files")
+
+    # CRLF lines: a match on the "\r" (or at the end of an empty line)
+    # must only count where the line itself matches
+    crlf = "return x\r\nreturn\r\n\r\nfoo bar\r\n"
+    for query in (r"return\s", r"\W", r"[^a]", r"[\s\S]", r"foo\s", r"\B"):
+        pattern = compile_query(query)
+        expected = [i for i, line in enumerate(crlf.split("\r\n")[:-1], start=1) if pattern.search(line)]
+        bytes_twin, text_twin = buffer_patterns(pattern)
+        for buf, twin in ((crlf, text_twin), (crlf.encode(), bytes_twin)):
+            found = [match["line"] for match in search_buffer(buf, "crlf.txt", pattern, twin)]
+            assert found == expected, (query, found, expected)
+    print("✓ CRLF lines match like the lines themselves")
@@ -0,0 +1,605 @@
+import ast
+import bisect
+import gc
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+INDEX_VERSION = 2
+
+# Language family per extension; other extensions have no symbols
+LANGUAGES = {
+    ".py": "python",
+    ".js": "js", ".jsx": "js", ".ts": "js", ".tsx": "js",
+    ".java": "c", ".cs": "c", ".cpp": "c", ".c": "c",
+    ".go": "go",
+    ".rs": "rust",
+}
+
+FUNCTION_KINDS = {"function", "method"}
+TYPE_KINDS = {"class", "interface", "struct", "enum", "trait"}
+
+_TOKEN_PATTERN = r"""
+    (?P<nl>\n)
+  | [ \t\r\f\v]+
+  %s
+  | //[^\n]*
+  | /\*.*?\*/
+  | (?P<str>%s)
+  | (?P<id>[A-Za-z_$][A-Za-z0-9_$]*)
+  | \d[\w.]*
+  | (?P<op>=>|::|->|.)
+"""
+_DIRECTIVE = r"| ^[ \t]*\#(?:[^\n\\]|\\.)*    # preprocessor lines, Rust attributes"
+_DOUBLE = r'"(?:\\.|[^"\\\n])*"'
+_SINGLE = r"'(?:\\.|[^'\\\n])*'"
+_CHAR = r"'(?:\\.|[^'\\\n])'"  # a lone ' (a Rust lifetime) stays an op
+_RAW = r"`(?:\\.|[^`\\])*`"
+# Per language family: '...' is a string in JS but one character elsewhere,
+# backticks quote JS templates and Go raw strings, and only C-like and Rust
+# sources have "#" lines (in JS, "#name" is a private member)
+_TOKEN_PATTERNS = {
+    "js": _TOKEN_PATTERN % ("", "|".join((_DOUBLE, _SINGLE, _RAW))),
+    "go": _TOKEN_PATTERN % ("", "|".join((_DOUBLE, _CHAR, _RAW))),
+    "c": _TOKEN_PATTERN % (_DIRECTIVE, "|".join((_DOUBLE, _CHAR))),
+    "rust": _TOKEN_PATTERN % (_DIRECTIVE, "|".join((_DOUBLE, _CHAR))),
+}
+
+# Words that can precede "name(" without it being a definition
+_NOT_A_TYPE = {
+    "return", "new", "else", "throw", "case", "goto", "await", "yield", "typeof",
+    "sizeof", "delete", "in", "of", "instanceof", "do", "and", "or", "not",
+}
+# Words that look like "name(" but are statements
+_STATEMENTS = {
+    "if", "for", "while", "switch", "catch", "return", "sizeof", "using", "lock",
+    "fixed", "foreach", "synchronized", "typeof", "nameof", "default", "new",
+    "throw", "else", "do", "case", "function", "operator", "super", "this", "await",
+}
+# Modifiers that may come before a method name inside a JS/TS class body
+_JS_METHOD_PREV = {
+    "{", "}", ";", ")", "*", "#", "static", "async", "get", "set", "public", "private",
+    "protected", "readonly", "override", "abstract", "declare",
+}
+# Statement fields that can hold nested definitions
+_BODY_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+_ACCESS = {"public", "private", "protected"}
+_C_TYPE_KEYWORDS = {"class": "class", "struct": "struct", "interface": "interface",
+                    "enum": "enum", "record": "class"}
+
+
+def tokenize(code: str, language: str = "c") -> List[tuple]:
+    """Split C-like source of a language family into (kind, text, line) tokens.
+
+    Comments, whitespace and preprocessor lines are dropped; strings are
+    kept as single "str" tokens so they can't be mistaken for code.
+    """
+    tokens = []
+    line = 1
+    # Compiled on first use (re caches it) so importing this module stays cheap
+    for found in re.finditer(_TOKEN_PATTERNS[language], code, re.S | re.M | re.X):
+        kind = found.lastgroup
+        if kind == "nl":
+            line += 1
+            continue
+        text = found.group()
+        if kind in ("id", "op", "str"):
+            tokens.append((kind, text, line))
+        line += text.count("\n")
+    return tokens
+
+
+def python_symbols(code: str) -> Optional[List[List]]:
+    """Functions, methods and classes of Python source, or None if it doesn't parse."""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    symbols = []
+
+    def visit(statements, parent_class, in_class):
+        for node in statements:
+            if isinstance(node, ast.ClassDef):
+                symbols.append([node.name, "class", node.lineno, node.end_lineno, parent_class])
+                qualified = f"{parent_class}.{node.name}" if parent_class else node.name
+                visit(node.body, qualified, True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+                symbols.append([node.name, kind, node.lineno, node.end_lineno, parent_class])
+                visit(node.body, parent_class, False)
+            else:
+                # Nested definitions only live in statement bodies (if/try/with/match ...)
+                for field in _BODY_FIELDS:
+                    children = getattr(node, field, None)
+                    if children:
+                        visit(children, parent_class, in_class)
+
+    visit(tree.body, None, False)
+    return symbols
+
+
+class _BraceParser:
+    """Finds definitions in a token stream of a brace-delimited language."""
+
+    def __init__(self, tokens: List[tuple], language: str):
+        self.tokens = tokens
+        self.language = language
+        self.symbols: List[List] = []
+        # index of a "{" token -> (symbol or None, scope kind, scope name)
+        self.opens: Dict[int, tuple] = {}
+
+    def text(self, i: int) -> str:
+        return self.tokens[i][1] if 0 <= i < len(self.tokens) else ""
+
+    def is_id(self, i: int) -> bool:
+        return 0 <= i < len(self.tokens) and self.tokens[i][0] == "id"
+
+    def closing(self, i: int, open_text: str = "(", close_text: str = ")") -> Optional[int]:
+        depth = 0
+        for j in range(i, len(self.tokens)):
+            text = self.tokens[j][1]
+            if text == open_text:
+                depth += 1
+            elif text == close_text:
+                depth -= 1
+                if depth == 0:
+                    return j
+        return None
+
+    def body_after(self, i: int, stops=(";", "}")) -> Optional[int]:
+        """Index of the "{" that starts a body after token i, if one comes before a stop."""
+        depth = 0
+        for j in range(i, len(self.tokens)):
+            text = self.tokens[j][1]
+            if text in ("(", "["):
+                depth += 1
+            elif text in (")", "]"):
+                depth -= 1
+            elif depth == 0:
+                if text == "{":
+                    return j
+                if text in stops:
+                    return None
+        return None
+
+    def add(self, name, kind, i, brace, parent, scope_kind=None):
+        line = self.tokens[i][2]
+        symbol = [name, kind, line, line, parent]
+        self.symbols.append(symbol)
+        if brace is not None:
+            self.opens[brace] = (symbol, scope_kind or kind, name)
+
+    def parse(self) -> List[List]:
+        # Scopes: (kind, name, symbol, definitions allowed)
+        stack = [("file", None, None, True)]
+        tokens = self.tokens
+
+        for i, (kind, text, line) in enumerate(tokens):
+            if text == "{":
+                if i in self.opens:
+                    symbol, scope_kind, name = self.opens[i]
+                    stack.append((scope_kind, name, symbol, scope_kind not in FUNCTION_KINDS))
+                else:
+                    # namespace X {, extern "C" {, mod x { keep allowing definitions
+                    allowed = stack[-1][3] and tokens[i - 1][0] in ("id", "str") if i else True
+                    stack.append(("block", None, None, allowed))
+                continue
+            if text == "}":
+                if len(stack) > 1:
+                    scope = stack.pop()
+                    if scope[2] is not None:
+                        scope[2][3] = line
+                continue
+            if kind != "id":
+                continue
+
+            parent = next((s[1] for s in reversed(stack)
+                           if s[0] in TYPE_KINDS or s[0] == "impl"), None)
+            in_class = stack[-1][0] in TYPE_KINDS or stack[-1][0] == "impl"
+
+            if self.language == "js":
+                self._js(i, text, parent, in_class)
+            elif self.language == "c":
+                self._c(i, text, parent, in_class, stack[-1][3])
+            elif self.language == "go":
+                self._go(i, text)
+            elif self.language == "rust":
+                self._rust(i, text, parent)
+
+        return self.symbols
+
+    def _js(self, i, text, parent, in_class):
+        prev = self.text(i - 1)
+        nxt = self.text(i + 1)
+
+        if text == "function":
+            j = i + 1
+            if self.text(j) == "*":
+                j += 1
+            if self.is_id(j) and self.text(j + 1) in ("(", "<"):
+                self.add(self.text(j), "function", j, self.body_after(j + 1), parent)
+            return
+
+        if text in ("class", "interface", "enum") and self.is_id(i + 1) and prev != ".":
+            kind = text
+            self.add(self.text(i + 1), kind, i + 1, self.body_after(i + 2), parent)
+            return
+
+        if text in ("const", "let", "var") and self.is_id(i + 1):
+            self._js_assignment(i + 1, parent, "function")
+            return
+
+        if in_class and prev in _JS_METHOD_PREV and text not in _STATEMENTS:
+            if nxt in ("(", "<"):
+                paren = i + 1 if nxt == "(" else (self.closing(i + 1, "<", ">") or i) + 1
+                if self.text(paren) == "(":
+                    close = self.closing(paren)
+                    if close is not None:
+                        brace = self.body_after(close + 1, stops=(";", "}", "=", ","))
+                        if brace is not None:
+                            self.add(text, "method", i, brace, parent)
+                return
+            if nxt in ("=", ":"):
+                self._js_assignment(i, parent, "method")
+                return
+
+        # name: function (...) in object literals
+        if nxt == ":" and self.text(i + 2) in ("function", "async") and prev in ("{", ","):
+            j = i + 2 if self.text(i + 2) == "function" else i + 3
+            if self.text(j) == "function":
+                self.add(text, "function", i, self.body_after(j + 1), parent)
+
+    def _js_assignment(self, i, parent, kind):
+        """name [: Type] = [async] (params) [: Type] => ... or = function (...)"""
+        j = i + 1
+        if self.text(j) == ":":
+            # Skip a type annotation up to the "="
+            depth = 0
+            while j < len(self.tokens):
+                t = self.text(j)
+                if t in ("(", "<", "[", "{"):
+                    depth += 1
+                elif t in (")", ">", "]", "}"):
+                    depth -= 1
+                elif t == "=" and depth <= 0:
+                    break
+                elif t == ";" and depth <= 0:
+                    return
+                j += 1
+        if self.text(j) != "=":
+            return
+        j += 1
+        if self.text(j) == "async":
+            j += 1
+
+        if self.text(j) == "function":
+            self.add(self.text(i), kind, i, self.body_after(j + 1), parent)
+            return
+        if self.text(j) == "(":
+            close = self.closing(j)
+            if close is None:
+                return
+            arrow = close + 1
+            if self.text(arrow) == ":":
+                while arrow < len(self.tokens) and self.text(arrow) not in ("=>", ";", "{", "}"):
+                    arrow += 1
+        elif self.is_id(j):
+            arrow = j + 1
+        else:
+            return
+
+        if self.text(arrow) != "=>":
+            return
+        brace = arrow + 1 if self.text(arrow + 1) == "{" else None
+        self.add(self.text(i), kind, i, brace, parent)
+
+    def _c(self, i, text, parent, in_class, allowed):
+        prev = self.text(i - 1)
+        nxt = self.text(i + 1)
+
+        if text in _C_TYPE_KEYWORDS and prev != ".":
+            j = i + 1
+            if text == "enum" and self.text(j) in ("class", "struct"):
+                j += 1
+            if not self.is_id(j):
+                return
+            # Stop at "(" unless it directly follows the name (records,
+            # primary constructors): "struct foo *make(...)" is a function
+            k = j + 1
+            if self.text(k) == "(":
+                k = (self.closing(k) or k) + 1
+            depth = 0
+            while k < len(self.tokens):
+                t = self.text(k)
+                if t == "<":
+                    depth += 1
+                elif t == ">":
+                    depth -= 1
+                elif depth <= 0 and t in (";", "(", ")", "=", "}"):
+                    return
+                elif depth <= 0 and t == "{":
+                    self.add(self.text(j), _C_TYPE_KEYWORDS[text], j, k, parent)
+                    return
+                k += 1
+            return
+
+        if nxt != "(" or not allowed or text in _STATEMENTS or prev in _C_TYPE_KEYWORDS:
+            return
+        if self.is_id(i - 1):
+            if prev in _NOT_A_TYPE or self.text(i - 2) == "@":
+                return  # expressions, annotation arguments
+        elif prev == ":":
+            if self.text(i - 2) not in _ACCESS:
+                return  # only "public: Widget(...)" style constructors
+        elif prev not in (">", "*", "&", "]", "~", "::"):
+            return
+
+        close = self.closing(i + 1)
+        if close is None:
+            return
+        brace = self.body_after(close + 1, stops=(";", "}", "=", "=>"))
+        if brace is None:
+            # C# expression-bodied members: Name(...) => expr;
+            k = close + 1
+            while self.is_id(k):
+                k += 1
+            if self.text(k) != "=>":
+                return
+
+        owner = parent
+        if prev == "::" and self.is_id(i - 2):
+            owner = self.text(i - 2)  # C++ out-of-class definition Foo::bar
+        if prev == "~":
+            text = "~" + text
+        self.add(text, "method" if in_class or prev == "::" else "function", i, brace, owner)
+
+    def _go(self, i, text):
+        if text == "func":
+            j = i + 1
+            receiver = None
+            if self.text(j) == "(":
+                close = self.closing(j)
+                if close is None:
+                    return
+                names = [self.text(k) for k in range(j + 1, close) if self.is_id(k)]
+                receiver = names[-1] if names else None
+                j = close + 1
+            if self.is_id(j) and self.text(j + 1) in ("(", "["):
+                kind = "method" if receiver else "function"
+                self.add(self.text(j), kind, j, self.body_after(j + 1, stops=(";", "}")), receiver)
+            return
+
+        if text == "type" and self.is_id(i + 1) and self.text(i + 2) in ("struct", "interface"):
+            kind = self.text(i + 2)
+            brace = i + 3 if self.text(i + 3) == "{" else None
+            self.add(self.text(i + 1), kind, i + 1, brace, None)
+
+    def _rust(self, i, text, parent):
+        if text == "fn" and self.is_id(i + 1):
+            brace = self.body_after(i + 2, stops=(";", "}"))
+            if brace is not None:
+                kind = "method" if parent else "function"
+                self.add(self.text(i + 1), kind, i + 1, brace, parent)
+            return
+
+        if text in ("struct", "enum", "trait") and self.is_id(i + 1):
+            brace = self.body_after(i + 2, stops=(";",))
+            self.add(self.text(i + 1), text, i + 1, brace, None)
+            return
+
+        if text == "impl":
+            brace = self.body_after(i + 1, stops=(";",))
+            if brace is None:
+                return
+            # impl<T> Trait for Type<T> { ... } -> methods belong to Type
+            names = []
+            depth = 0
+            for k in range(i + 1, brace):
+                t = self.text(k)
+                if t == "<":
+                    depth += 1
+                elif t == ">":
+                    depth -= 1
+                elif t == "for" and depth == 0:
+                    names = []
+                elif t == "where" and depth == 0:
+                    break
+                elif depth == 0 and self.is_id(k):
+                    names.append(t)
+            if names:
+                self.opens[brace] = (None, "impl", names[-1])
+
+
+class _NoGC:
+    """Pause the cyclic garbage collector while building large containers.
+
+    Loading hundreds of thousands of small lists otherwise triggers
+    repeated full collections that cost more than the work itself.
+    """
+
+    def __enter__(self):
+        self.enabled = gc.isenabled()
+        gc.disable()
+
+    def __exit__(self, *exc):
+        if self.enabled:
+            gc.enable()
+
+
+def extract_symbols(code: str, filename: str) -> List[List]:
+    """Definitions in a source file as [name, kind, line, end, parent]."""
+    language = LANGUAGES.get(os.path.splitext(filename)[1].lower())
+    if language is None:
+        return []
+
+    if language == "python":
+        symbols = python_symbols(code)
+        if symbols is not None:
+            return symbols
+        # Unparseable (e.g. mid-edit): fall back to matching def/class lines
+        symbols = []
+        for number, line in enumerate(code.splitlines(), start=1):
+            found = re.match(r"\s*(?:async\s+)?(def|class)\s+(\w+)", line)
+            if found:
+                kind = "class" if found.group(1) == "class" else "function"
+                symbols.append([found.group(2), kind, number, number, None])
+        return symbols
+
+    return _BraceParser(tokenize(code, language), language).parse()
+
+
+class SymbolIndex:
+    """Persisted table of the functions, methods and types in the project.
+
+    Files are re-parsed only when their content hash in the workspace
+    manifest changes. Lookups by exact name are dictionary hits; prefix
+    queries bisect a sorted list of names.
+    """
+
+    def __init__(self, file_ops, max_file_size: int | None = None):
+        self.file_ops = file_ops
+        self.index_path = file_ops.cache_dir / "symbols.json"
+        self.max_file_size = max_file_size
+        self.files: Dict[str, Dict] = {}  # path -> {"hash": ..., "symbols": [...]}
+        self._by_name: Optional[Dict[str, List[tuple]]] = None
+        self._names: List[str] = []
+        self._dirty = False
+        self._loaded = False
+
+    def load(self):
+        """Load the index from disk (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f, _NoGC():
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == INDEX_VERSION:
+            self.files = data["files"]
+
+    def save(self):
+        """Write the index back to disk if it changed."""
+        if not self._dirty:
+            return
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # dumps uses the C encoder; dump would encode in pure Python
+            f.write(json.dumps({"version": INDEX_VERSION, "files": self.files}, separators=(",", ":")))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def update(self, files: Iterable[str], prune: bool = False) -> int:
+        """Re-parse files whose content changed; returns how many were parsed."""
+        self.load()
+
+        files = [path for path in files if os.path.splitext(path)[1].lower() in LANGUAGES]
+        self.file_ops.changed_files(files)
+        hashes = self.file_ops.manifest.hashes(files)
+
+        parsed = 0
+        for rel_path in files:
+            digest = hashes.get(rel_path)
+            known = self.files.get(rel_path)
+            if known and digest and known["hash"] == digest:
+                continue
+
+            symbols = []
+            path = Path(rel_path)
+            if not path.is_absolute():
+                path = self.file_ops.project_root / path
+            try:
+                if not self.max_file_size or path.stat().st_size <= self.max_file_size:
+                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                        symbols = extract_symbols(f.read(), rel_path)
+            except OSError:
+                continue
+
+            self.files[rel_path] = {"hash": digest, "symbols": symbols}
+            parsed += 1
+
+        removed = set(self.files) - set(files) if prune else set()
+        for rel_path in removed:
+            del self.files[rel_path]
+
+        if parsed or removed:
+            self._dirty = True
+            self._by_name = None
+        return parsed
+
+    def _build(self):
+        if self._by_name is not None:
+            return
+        by_name: Dict[str, List[tuple]] = {}
+        with _NoGC():
+            for rel_path, entry in self.files.items():
+                for symbol in entry["symbols"]:
+                    by_name.setdefault(symbol[0], []).append((rel_path, symbol))
+        self._by_name = by_name
+        self._names = sorted(by_name)
+
+    @staticmethod
+    def _filter(entries: List[tuple], kinds: Optional[Set[str]], files: Optional[Set[str]]) -> List[Dict]:
+        return [
+            {"name": name, "kind": kind, "file": rel_path, "line": line, "end": end, "parent": parent}
+            for rel_path, (name, kind, line, end, parent) in entries
+            if (kinds is None or kind in kinds) and (files is None or rel_path in files)
+        ]
+
+    def lookup(self, name: str, kinds: Optional[Set[str]] = None,
+               files: Optional[Set[str]] = None) -> List[Dict]:
+        """Symbols with exactly this name."""
+        self.load()
+        self._build()
+        return self._filter(self._by_name.get(name, []), kinds, files)
+
+    def prefix(self, prefix: str, kinds: Optional[Set[str]] = None,
+               files: Optional[Set[str]] = None) -> List[Dict]:
+        """Symbols whose name starts with prefix."""
+        self.load()
+        self._build()
+        results = []
+        i = bisect.bisect_left(self._names, prefix)
+        while i < len(self._names) and self._names[i].startswith(prefix):
+            results.extend(self._filter(self._by_name[self._names[i]], kinds, files))
+            i += 1
+        return results
+
+    def matching(self, pattern: "re.Pattern", kinds: Optional[Set[str]] = None,
+                 files: Optional[Set[str]] = None) -> List[Dict]:
+        """Symbols whose whole name matches a regex."""
+        self.load()
+        self._build()
+        results = []
+        for name in self._names:
+            if pattern.fullmatch(name):
+                results.extend(self._filter(self._by_name[name], kinds, files))
+        return results
+
+    def names(self) -> List[str]:
+        """All symbol names, sorted. The list is replaced, not changed, on updates."""
+        self.load()
+        self._build()
+        return self._names
+
+
+# Simple test when running directly (python -m tools.symbols)
+if __name__ == "__main__":
+    samples = {
+        "a.py": "class A:\n    @property\n    async def run(self):\n        pass\n\ndef helper():\n    pass\n",
+        "a.ts": "export class Svc {\n  async load(id: string): Promise<void> {\n  }\n}\n"
+                "const add = (a: number, b: number): number => a + b;\nfunction main() { add(1, 2); }\n",
+        "A.java": "public class A {\n  @Override\n  public String toString() {\n    return foo(1);\n  }\n}\n",
+        "m.go": "type S struct {\n}\nfunc (s *S) Run() error {\n  return nil\n}\n",
+        "l.rs": "struct P;\nimpl Display for P {\n    fn fmt(&self) -> bool { true }\n}\n",
+    }
+    for filename, code in samples.items():
+        print(filename, [(s[0], s[1], s[2], s[3], s[4]) for s in extract_symbols(code, filename)])
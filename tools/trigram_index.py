@@ -0,0 +1,244 @@
+import os
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older Pythons
+    import sre_parse
+
+try:
+    from re import _constants as sre_constants  # Python 3.11+
+except ImportError:  # pragma: no cover - older Pythons
+    import sre_constants
+
+
+INDEX_VERSION = 1
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the set of case-folded trigrams in a piece of text."""
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _literal_runs(parsed) -> List[str]:
+    """Collect runs of literal characters that every match must contain.
+
+    Only the top level of the parsed pattern is inspected. Anything that is
+    not a plain literal (classes, repeats, groups, alternations...) ends the
+    current run, which keeps the extraction conservative: the returned strings
+    are guaranteed to appear in any text the pattern matches.
+    """
+    runs = []
+    current = []
+
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            current.append(chr(av))
+            continue
+
+        if current:
+            runs.append("".join(current))
+            current = []
+
+    if current:
+        runs.append("".join(current))
+
+    return runs
+
+
+def pattern_trigrams(pattern: "re.Pattern") -> Optional[Set[str]]:
+    """Return the trigrams a regex requires, or None if none can be derived."""
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+
+    required = set()
+    for run in _literal_runs(parsed):
+        # IGNORECASE uses simple case folding, the index casefold(); they
+        # only agree on ASCII, so other literals need a full scan
+        if pattern.flags & re.IGNORECASE and not run.isascii():
+            return None
+        required |= trigrams(run)
+
+    return required or None
+
+
+class TrigramIndex:
+    """On-disk trigram inverted index used to narrow down search candidates.
+
+    The index maps every case-folded trigram to the set of files containing
+    it. Files are re-indexed lazily whenever their signature (content hash,
+    or mtime and size) changes, so the index never returns stale candidates.
+    Binary and oversized files are recorded as {"skipped": signature}, so
+    they are not re-read until they change, and are always candidates.
+    """
+
+    def __init__(self, project_root: Path, index_path: Path, max_file_size: int | None = None):
+        self.project_root = Path(project_root)
+        self.index_path = Path(index_path)
+        # Larger files and binary files have no trigrams; they are never
+        # ruled out as candidates
+        self.max_file_size = max_file_size
+        self.files: Dict[str, object] = {}  # path -> content hash, [mtime, size] or {"skipped": either}
+        # Postings hold file ids (positions in _paths), which load much
+        # faster than sets of path strings
+        self.postings: Dict[str, Set[int]] = {}
+        self._paths: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._dirty = False
+        self._loaded = False
+
+    def load(self):
+        """Load the index from disk (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if not self.index_path.exists():
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            return
+
+        self._paths = data["paths"]
+        self._ids = {path: i for i, path in enumerate(self._paths)}
+        self.files = dict(zip(self._paths, data["meta"]))
+        self.postings = {tri: set(ids) for tri, ids in data["postings"].items()}
+
+    def save(self):
+        """Write the index back to disk if it changed."""
+        if not self._dirty:
+            return
+
+        # Renumber so ids stay dense after files were dropped
+        paths = sorted(self.files)
+        new_ids = {self._ids[path]: i for i, path in enumerate(paths)}
+        data = {
+            "version": INDEX_VERSION,
+            "paths": paths,
+            "meta": [self.files[path] for path in paths],
+            "postings": {
+                tri: sorted(new_ids[i] for i in ids if i in new_ids)
+                for tri, ids in self.postings.items()
+                if ids
+            },
+        }
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        # Per-process temp name: the CLI, a daemon and the MCP server may save at once
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def _index_file(self, rel_path: str, meta):
+        path = self.project_root / rel_path
+        content = None
+        try:
+            if not (self.max_file_size and os.path.getsize(path) > self.max_file_size):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if b"\0" not in data[:8192]:  # else binary
+                    content = data.decode('utf-8', errors='ignore')
+        except OSError:
+            return  # not recorded, so the next refresh tries again
+
+        file_id = self._ids.get(rel_path)
+        if file_id is None:
+            file_id = self._ids[rel_path] = len(self._paths)
+            self._paths.append(rel_path)
+
+        if content is None:
+            self.files[rel_path] = {"skipped": meta}
+            return
+        for tri in trigrams(content):
+            self.postings.setdefault(tri, set()).add(file_id)
+        self.files[rel_path] = meta
+
+    def refresh(self, files: Iterable[str], prune: bool = False,
+                signatures: Optional[Dict[str, str]] = None):
+        """Re-index any of the given files that changed since the last run.
+
+        When ``prune`` is set, ``files`` is taken to be the complete file list
+        of the project and entries for everything else are dropped.
+        ``signatures`` (e.g. content hashes from the workspace manifest) spare
+        the stat calls; files without one are compared by mtime and size.
+        """
+        self.load()
+
+        files = list(files)
+        stale = set()
+        changed = []
+
+        for rel_path in files:
+            meta = signatures.get(rel_path) if signatures else None
+            if meta is None:
+                try:
+                    stat = os.stat(self.project_root / rel_path)
+                except OSError:
+                    stale.add(rel_path)
+                    continue
+                meta = [stat.st_mtime, stat.st_size]
+
+            known = self.files.get(rel_path)
+            if isinstance(known, dict):
+                known = known["skipped"]
+            if known != meta:
+                if rel_path in self.files:
+                    stale.add(rel_path)
+                changed.append((rel_path, meta))
+
+        if prune:
+            stale |= set(self.files) - set(files)
+
+        if stale:
+            stale_ids = {self._ids[path] for path in stale if path in self._ids}
+            for posting in self.postings.values():
+                posting -= stale_ids
+            for rel_path in stale:
+                self.files.pop(rel_path, None)
+                file_id = self._ids.pop(rel_path, None)
+                if file_id is not None:
+                    self._paths[file_id] = None
+
+        for rel_path, meta in changed:
+            self._index_file(rel_path, meta)
+
+        if stale or changed:
+            self._dirty = True
+
+    def candidates(self, pattern: "re.Pattern", files: List[str]) -> Optional[List[str]]:
+        """Return the subset of ``files`` that may match ``pattern``.
+
+        Returns None when the pattern has no usable trigrams, in which case
+        the caller has to fall back to scanning every file.
+        """
+        required = pattern_trigrams(pattern)
+        if required is None:
+            return None
+
+        matching = None
+        for tri in sorted(required, key=lambda t: len(self.postings.get(t, ()))):
+            posting = self.postings.get(tri, set())
+            matching = set(posting) if matching is None else matching & posting
+            if not matching:
+                break
+
+        matching = {self._paths[i] for i in matching or ()}
+        # Files the index does not know about (e.g. outside the project root)
+        # or has no trigrams for cannot be ruled out.
+        known = self.files
+        return [path for path in files
+                if path in matching or not isinstance(known.get(path, {}), (str, list))]
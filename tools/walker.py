@@ -0,0 +1,226 @@
+import os
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a gitignore glob into a regular expression body."""
+    out = []
+    i = 0
+    n = len(glob)
+
+    while i < n:
+        c = glob[i]
+
+        if c == '*':
+            if glob.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if glob.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+
+        elif c == '?':
+            out.append('[^/]')
+
+        elif c == '[':
+            end = glob.find(']', i + 2 if glob.startswith('[!', i) else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+                continue
+
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+
+        else:
+            out.append(re.escape(c))
+
+        i += 1
+
+    return ''.join(out)
+
+
+class GitIgnore:
+    """Compiled rules from one .gitignore file.
+
+    ``match`` takes a path relative to the directory holding the .gitignore
+    (with "/" separators) and returns True if it is ignored, False if a
+    negated rule re-includes it, or None if no rule applies.
+    """
+
+    def __init__(self, lines: List[str]):
+        # (regex, negate, dir_only, match_basename) in file order
+        self.rules: List[Tuple["re.Pattern", bool, bool, bool]] = []
+
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line or line.startswith('#'):
+                continue
+            # Trailing spaces are ignored unless escaped
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            # Patterns without an inner slash match the name at any depth
+            match_basename = '/' not in line
+            line = line.lstrip('/')
+
+            try:
+                regex = re.compile(_glob_to_regex(line) + r'\Z', re.DOTALL)
+            except re.error:
+                continue
+            self.rules.append((regex, negate, dir_only, match_basename))
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional["GitIgnore"]:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                ignore = cls(f.readlines())
+        except OSError:
+            return None
+        return ignore if ignore.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        name = rel_path.rsplit('/', 1)[-1]
+
+        # Last matching rule wins
+        for regex, negate, dir_only, match_basename in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(name if match_basename else rel_path):
+                return not negate
+
+        return None
+
+
+class FileWalker:
+    """Directory walker built on os.scandir.
+
+    Excluded directories (matched by exact, case-insensitive name) and
+    anything covered by .gitignore files are pruned before descending, so
+    their contents are never listed or stat'ed.
+    """
+
+    def __init__(self, project_root: Path, excluded_dirs: Set[str],
+                 allowed_extensions: Set[str], use_gitignore: bool = True):
+        self.project_root = str(Path(project_root).resolve())
+        self.excluded_dirs = {name.lower() for name in excluded_dirs}
+        self.allowed_extensions = {ext.lower() for ext in allowed_extensions}
+        self.use_gitignore = use_gitignore
+
+    def _load_ignores(self, directory: str) -> List[Tuple[str, GitIgnore]]:
+        """Collect .gitignore files from the project root down to a directory."""
+        if not self.use_gitignore:
+            return []
+
+        ignores = []
+        current = self.project_root
+        rel = os.path.relpath(directory, self.project_root)
+        parts = [] if rel == '.' or rel.startswith('..') else rel.split(os.sep)
+
+        for part in [None] + parts:
+            if part is not None:
+                current = os.path.join(current, part)
+            ignore = GitIgnore.from_file(os.path.join(current, '.gitignore'))
+            if ignore:
+                ignores.append((current, ignore))
+
+        return ignores
+
+    def _is_ignored(self, path: str, is_dir: bool, ignores: List[Tuple[str, GitIgnore]]) -> bool:
+        # Deeper .gitignore files take precedence over shallower ones
+        for base, ignore in reversed(ignores):
+            rel = path[len(base) + 1:].replace(os.sep, '/')
+            result = ignore.match(rel, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def _has_allowed_extension(self, name: str) -> bool:
+        dot = name.rfind('.')
+        return dot > 0 and name[dot:].lower() in self.allowed_extensions
+
+    def scan_dir(self, current: str, ignores: List[Tuple[str, GitIgnore]],
+                 recursive: bool = True) -> Tuple[List[str], List[str]]:
+        """Names of the valid files in one directory and of the subdirectories to descend into.
+
+        ``ignores`` must already include the directory's own .gitignore.
+        Raises OSError if the directory can't be read.
+        """
+        with os.scandir(current) as it:
+            entries = list(it)
+
+        files = []
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_dir:
+                if not recursive or entry.name.lower() in self.excluded_dirs:
+                    continue
+                if ignores and self._is_ignored(entry.path, True, ignores):
+                    continue
+                subdirs.append(entry.name)
+                continue
+
+            if not self._has_allowed_extension(entry.name):
+                continue
+            if ignores and self._is_ignored(entry.path, False, ignores):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+
+            files.append(entry.name)
+
+        return files, subdirs
+
+    def walk(self, directory: str, recursive: bool = True) -> Iterator[str]:
+        """Yield absolute paths of the valid files under a directory."""
+        directory = os.path.abspath(directory)
+        stack = [(directory, self._load_ignores(directory))]
+
+        while stack:
+            current, ignores = stack.pop()
+
+            if self.use_gitignore and current != directory:
+                ignore = GitIgnore.from_file(os.path.join(current, '.gitignore'))
+                if ignore:
+                    ignores = ignores + [(current, ignore)]
+
+            try:
+                files, subdirs = self.scan_dir(current, ignores, recursive)
+            except OSError:
+                continue
+
+            for name in files:
+                yield os.path.join(current, name)
+
+            for name in reversed(subdirs):
+                stack.append((os.path.join(current, name), ignores))